@@ -0,0 +1,235 @@
+#!./venv/bin/python3
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from packlib.corpus import build_corpus
+from packlib.jsonenc import backend_name
+from packlib.output import OUTPUT_FORMATS, PackOutput
+from packlib.phases import PHASES, start_timer, stop_timer
+from packlib.pipeline import (
+    BUILD_PACKS_DIR,
+    PACK_DEPENDENCIES,
+    PACKS_BASE,
+    add_unique_documents,
+    load_generator,
+)
+from packlib.yamlio import loader_name, use_fast_loader
+
+RESULTS_VERSION = 1
+DEFAULT_RESULTS = os.path.join(BUILD_PACKS_DIR, "build", "benchmark.json")
+
+# Differences smaller than this many seconds are noise, whatever the ratio
+NOISE_FLOOR = 0.02
+
+
+def run_pack(pack, generator, corpus, build_dir, outputs, output_format):
+    """
+    Generates one pack from the corpus, timing each phase, and returns the
+    PhaseTimer and the number of documents written.
+    """
+    output_dir = os.path.join(build_dir, pack)
+    os.makedirs(output_dir, exist_ok=True)
+    output = PackOutput(
+        output_dir,
+        deferred=True,
+        script_path=generator.__file__,
+        output_format=output_format,
+    )
+    data_dir = os.path.join(corpus, pack, "data")
+    # The per-record progress lines are part of the cost, but not the terminal
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        timer = start_timer()
+        try:
+            deps = PACK_DEPENDENCIES[pack]
+            if deps:
+                items = [doc for dep in deps for doc in outputs[dep].documents()]
+                generator.generate(data_dir, output, items)
+            else:
+                generator.generate(data_dir, output)
+            add_unique_documents(os.path.join(corpus, pack, "unique"), output)
+            output.close()
+        finally:
+            stop_timer()
+    outputs[pack] = output
+    return timer, len(output.order)
+
+
+def run_scale(packs, corpus, repeat, output_format):
+    """Returns the benchmark results for each pack generated from corpus, keyed by pack."""
+    generators = {pack: load_generator(pack) for pack in packs}
+    samples = {pack: [] for pack in packs}
+    documents = {}
+    for _ in range(repeat):
+        outputs = {}
+        with tempfile.TemporaryDirectory() as build_dir:
+            for pack in packs:
+                timer, documents[pack] = run_pack(
+                    pack, generators[pack], corpus, build_dir, outputs, output_format
+                )
+                samples[pack].append(dict(timer.wall, total=timer.total))
+    return {
+        pack: {
+            "documents": documents[pack],
+            "wall": {
+                name: statistics.median(sample[name] for sample in samples[pack])
+                for name in ("total",) + PHASES
+            },
+        }
+        for pack in packs
+    }
+
+
+def git_commit():
+    try:
+        proc = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BUILD_PACKS_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return proc.stdout.strip()
+
+
+def run_benchmarks(packs, scales, repeat, output_format):
+    results = {}
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as corpus:
+            if scale > 1:
+                print(f"Building {scale}x corpus")
+            build_corpus(PACKS_BASE, corpus, scale)
+            for pack, result in run_scale(packs, corpus, repeat, output_format).items():
+                results[f"{pack}@{scale}x"] = dict(pack=pack, scale=scale, **result)
+                print(format_result(pack, scale, result))
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "yamlLoader": loader_name(),
+            "jsonBackend": backend_name(),
+            "outputFormat": output_format,
+        },
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def format_result(pack, scale, result):
+    wall = result["wall"]
+    phases = ", ".join(f"{name} {wall[name]:.3f}s" for name in PHASES)
+    return (
+        f"{pack:>16} {scale:>4}x {result['documents']:>7} docs "
+        f"{wall['total']:8.3f}s ({phases})"
+    )
+
+
+def compare(baseline, current, threshold):
+    """
+    Prints how each result of current compares with the same pack and scale
+    in baseline, and returns the list of (key, measure) pairs that are slower
+    by more than threshold (a fraction).
+    """
+    if baseline.get("version") != RESULTS_VERSION:
+        raise ValueError("Baseline was written by an incompatible benchmark version")
+    for name, value in current["environment"].items():
+        if name != "commit" and baseline["environment"].get(name) != value:
+            print(f"Warning: baseline {name} was {baseline['environment'].get(name)}, now {value}")
+    regressions = []
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            print(f"{key:>24}: not in baseline")
+            continue
+        changes = []
+        for name in ("total",) + PHASES:
+            if name not in base["wall"]:
+                continue
+            old, new = base["wall"][name], result["wall"][name]
+            ratio = new / old if old else float("inf") if new else 1.0
+            slower = new - old > NOISE_FLOOR and ratio > 1 + threshold
+            if slower:
+                regressions.append((key, name))
+            changes.append(f"{name} {ratio:.2f}x{' !' if slower else ''}")
+        print(f"{key:>24}: {', '.join(changes)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time each pack generator, in total and per phase, on the "
+        "real data and on synthetic corpora scaled from it"
+    )
+    parser.add_argument("packs", nargs="*", help="packs to benchmark (default: all)")
+    parser.add_argument(
+        "-s",
+        "--scale",
+        type=int,
+        action="append",
+        help="corpus scale factor, may be repeated (default: 1, 10 and 100)",
+    )
+    parser.add_argument(
+        "-n", "--repeat", type=int, default=3, help="runs per measurement; the median is kept"
+    )
+    parser.add_argument(
+        "-f",
+        "--fast-yaml",
+        action="store_true",
+        help="load data files with the libyaml-backed safe loader",
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=OUTPUT_FORMATS,
+        default="files",
+        help="output format of the generated packs",
+    )
+    parser.add_argument(
+        "-o", "--output", default=DEFAULT_RESULTS, help=f"results file (default: {DEFAULT_RESULTS})"
+    )
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10,
+        help="percentage slowdown reported as a regression (default: 10)",
+    )
+    args = parser.parse_args()
+
+    packs = [p for p in PACK_DEPENDENCIES if p in (args.packs or PACK_DEPENDENCIES)]
+    for pack in packs:
+        missing = [dep for dep in PACK_DEPENDENCIES[pack] if dep not in packs]
+        if missing:
+            parser.error(f"pack {pack} requires {', '.join(missing)} to be benchmarked as well")
+    use_fast_loader(args.fast_yaml)
+
+    current = run_benchmarks(packs, args.scale or [1, 10, 100], args.repeat, args.output_format)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf8") as outfile:
+        json.dump(current, outfile, indent=2)
+        outfile.write("\n")
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf8") as infile:
+            baseline = json.load(infile)
+        regressions = compare(baseline, current, args.threshold / 100)
+        if regressions:
+            print(f"{len(regressions)} measurements regressed by more than {args.threshold:g}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
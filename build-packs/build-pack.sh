@@ -1,21 +1,49 @@
 #!/bin/bash
+# Usage: build-pack.sh [-i] [-f] [-c] [-r] [-p] [-P] [-o FORMAT] PACK
+#   -i  incremental build: keep the previous build directory and only
+#       regenerate documents whose source records have changed
+#   -f  load data files with the libyaml-backed safe loader
+#   -c  cache parsed data files between builds
+#   -r  release build: minified, key-sorted JSON
+#   -p  write a profile report of the generator to build/PACK.profile.json
+#   -P  also dump cProfile statistics and measure peak memory
+#   -o  output format: files (default), ndjson (one bundle per pack,
+#       compiled with compile-bundle.py) or both
+INCREMENTAL=""
+GENOPTS=""
+FORMAT=files
+while getopts "ifcrpPo:" opt; do
+    case $opt in
+        i) INCREMENTAL="--incremental" ;;
+        f) GENOPTS="$GENOPTS --fast-yaml" ;;
+        c) GENOPTS="$GENOPTS --source-cache" ;;
+        r) GENOPTS="$GENOPTS --release" ;;
+        p) GENOPTS="$GENOPTS --profile" ;;
+        P) GENOPTS="$GENOPTS --profile-detail" ;;
+        o) FORMAT=$OPTARG ;;
+        *) exit 1 ;;
+    esac
+done
+shift $((OPTIND - 1))
 PACK=$1
 PACKBASE=../assets/packs/$PACK
 DATADIR=$PACKBASE/data
-UNIQUEDIR=$PACKBASE/unique
 BUILDDIR=build/$PACK
 PACKDIR=../packs
 GENFILE=generate-$PACK.py
 [ ! -f $GENFILE ] && { echo -e "\033[0;31mERROR:\033[0m No such file $GENFILE"; exit 1; }
 PACKTYPE=$(grep "^type=" $PACKBASE/pack.properties| cut -d= -f2)
-[ -d $BUILDDIR ] && rm -rf $BUILDDIR
+[ -z "$INCREMENTAL" -a -d $BUILDDIR ] && rm -rf $BUILDDIR
 mkdir -p $BUILDDIR
-python3 ./generate-$PACK.py $DATADIR $BUILDDIR
+python3 ./generate-$PACK.py $INCREMENTAL $GENOPTS --output-format $FORMAT $DATADIR $BUILDDIR
 if [ $? -eq 0 ]; then
-    [ -d $UNIQUEDIR -a ! -z "$( ls -A $UNIQUEDIR/*.json 2>/dev/null )" ] && cp $UNIQUEDIR/*.json $BUILDDIR
-    fvtt package pack -n $PACK -v --type System --id sohl -t $PACKTYPE --in $BUILDDIR --out $PACKDIR
+    if [ "$FORMAT" = "ndjson" ]; then
+        python3 ./compile-bundle.py $PACK build || exit 1
+    else
+        fvtt package pack -n $PACK -v --type System --id sohl -t $PACKTYPE --in $BUILDDIR --out $PACKDIR
+    fi
 else
     echo -e "\033[0;31mERROR:\033[0m Build Failed!!"
-    rm -rf $BUILDDIR
+    rm -rf $BUILDDIR $BUILDDIR.ndjson $BUILDDIR.ndjson.index
     exit 1
 fi
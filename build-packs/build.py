@@ -0,0 +1,190 @@
+#!./venv/bin/python3
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from packlib.output import OUTPUT_FORMATS
+from packlib.compendium import CompendiumError
+from packlib.profiling import format_report, profile_path
+from packlib.pipeline import (
+    BUILD_PACKS_DIR,
+    PACK_DEPENDENCIES,
+    compile_pack,
+    run_pipeline,
+    write_packs,
+)
+from packlib.scheduler import TaskGraph, TaskFailedError, critical_path, run_graph
+
+
+class PackBuildError(Exception):
+    """Exception raised when build-pack.sh fails for a pack."""
+    pass
+
+
+# build-pack.sh flags for the generator options, which are also the
+# keyword arguments of run_pipeline()
+BUILD_PACK_FLAGS = {
+    "incremental": "-i",
+    "fast_yaml": "-f",
+    "source_cache": "-c",
+    "release": "-r",
+    "profile": "-p",
+    "profile_detail": "-P",
+}
+
+
+def build_pack(pack, options):
+    cmd = ["./build-pack.sh"]
+    cmd.extend(flag for name, flag in BUILD_PACK_FLAGS.items() if options.get(name))
+    cmd.extend(["-o", options.get("output_format", "files")])
+    cmd.append(pack)
+    proc = subprocess.run(
+        cmd,
+        cwd=BUILD_PACKS_DIR,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise PackBuildError(f"build-pack.sh {pack} failed:\n{proc.stdout}")
+    return proc.stdout
+
+
+def pack_graph(options):
+    graph = TaskGraph()
+    for pack, deps in PACK_DEPENDENCIES.items():
+        graph.add(pack, build_pack, pack, options, deps=deps)
+    return graph
+
+
+def build_single_process(packs, options, native=False):
+    start = time.perf_counter()
+    try:
+        outputs = run_pipeline(packs, os.path.join(BUILD_PACKS_DIR, "build"), **options)
+        if native:
+            write_packs(outputs)
+        else:
+            for pack in packs:
+                compile_pack(pack, os.path.join(BUILD_PACKS_DIR, "build"), options["output_format"])
+    except (subprocess.CalledProcessError, ValueError, CompendiumError) as e:
+        print(f"\033[0;31mERROR:\033[0m {e}", file=sys.stderr)
+        return 1
+    print(f"Total wall time: {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build compendium packs in dependency order, in parallel"
+    )
+    parser.add_argument(
+        "packs",
+        nargs="*",
+        help="packs to build, along with the packs they depend on (default: all)",
+    )
+    parser.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="only regenerate documents whose source records have changed",
+    )
+    parser.add_argument(
+        "-f",
+        "--fast-yaml",
+        action="store_true",
+        help="load data files with the libyaml-backed safe loader",
+    )
+    parser.add_argument(
+        "-c",
+        "--source-cache",
+        action="store_true",
+        help="cache parsed data files between builds",
+    )
+    parser.add_argument(
+        "-r",
+        "--release",
+        action="store_true",
+        help="write minified, key-sorted JSON and report the size saved per pack",
+    )
+    parser.add_argument(
+        "-p",
+        "--profile",
+        action="store_true",
+        help="write a report of the time spent in each build phase per pack "
+        "(build/<pack>.profile.json)",
+    )
+    parser.add_argument(
+        "-P",
+        "--profile-detail",
+        action="store_true",
+        help="also dump cProfile statistics and measure peak memory per pack "
+        "(implies --profile)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-format",
+        choices=OUTPUT_FORMATS,
+        default="files",
+        help="write one JSON file per document, one NDJSON bundle per pack, or both",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="number of worker processes"
+    )
+    parser.add_argument(
+        "-s",
+        "--single-process",
+        action="store_true",
+        help="run all generators in this process, keeping documents in memory "
+        "until every pack has been generated",
+    )
+    parser.add_argument(
+        "-n",
+        "--native",
+        action="store_true",
+        help="write the compendium packs from Python instead of the Foundry CLI "
+        "(implies --single-process)",
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="show the output of each pack build"
+    )
+    args = parser.parse_args()
+
+    options = {name: getattr(args, name) for name in BUILD_PACK_FLAGS}
+    options["output_format"] = args.output_format
+    graph = pack_graph(options)
+    if args.packs:
+        graph = graph.subgraph(args.packs)
+
+    if args.single_process or args.native:
+        return build_single_process(graph.order(), options, args.native)
+
+    def on_complete(pack, output, duration):
+        if args.verbose:
+            print(output, end="")
+        print(f"Built pack {pack} in {duration:.2f}s")
+        if (args.profile or args.profile_detail) and not args.verbose:
+            # The generator's own summary line is only shown with --verbose
+            path = profile_path(os.path.join(BUILD_PACKS_DIR, "build", pack))
+            with open(path, "r", encoding="utf8") as infile:
+                print(format_report(json.load(infile)))
+
+    start = time.perf_counter()
+    try:
+        results = run_graph(graph, max_workers=args.jobs, on_complete=on_complete)
+    except TaskFailedError as e:
+        print(f"\033[0;31mERROR:\033[0m {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+
+    durations = {pack: duration for pack, (_, duration) in results.items()}
+    path, length = critical_path(graph, durations)
+    print(f"Total wall time: {elapsed:.2f}s (serial: {sum(durations.values()):.2f}s)")
+    print(f"Critical path: {' -> '.join(path)} ({length:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
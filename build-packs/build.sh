@@ -1,12 +1,3 @@
 #!/bin/bash
-# Build Items first
-for i in characteristics mysteries possessions; do
-    ./build-pack.sh $i
-    [ $? ] || exit 1
-done
-
-# Build Actors last
-for i in characters creatures; do
-    ./build-pack.sh $i
-    [ $? ] || exit 1
-done
+# Builds all packs; see build.py for options (e.g. -i for an incremental build)
+exec python3 ./build.py "$@"
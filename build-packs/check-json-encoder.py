@@ -0,0 +1,52 @@
+#!./venv/bin/python3
+
+import argparse
+import filecmp
+import os
+import sys
+import tempfile
+from packlib.jsonenc import canonical_check, use_backend
+from packlib.pipeline import PACK_DEPENDENCIES, compare_dirs, run_pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that orjson and the stdlib json module write "
+        "byte-identical pack documents and bundles"
+    )
+    parser.add_argument("packs", nargs="*", help="packs to check (default: all)")
+    args = parser.parse_args()
+    packs = args.packs or list(PACK_DEPENDENCIES)
+
+    if not canonical_check():
+        print("orjson is not installed or fails the canonical check; the stdlib is used")
+        return 1
+
+    failed = False
+    for release in (False, True):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for backend in ("stdlib", "orjson"):
+                use_backend(backend)
+                run_pipeline(
+                    packs,
+                    os.path.join(tmpdir, backend),
+                    fast_yaml=True,
+                    output_format="both",
+                    release=release,
+                )
+            mode = "release" if release else "development"
+            for pack in packs:
+                left = os.path.join(tmpdir, "stdlib", pack)
+                right = os.path.join(tmpdir, "orjson", pack)
+                diffs = compare_dirs(left, right)
+                if not filecmp.cmp(left + ".ndjson", right + ".ndjson", shallow=False):
+                    diffs.append(os.path.basename(left) + ".ndjson")
+                for fname in diffs:
+                    print(f"MISMATCH {mode} {pack}/{fname}")
+                failed = failed or bool(diffs)
+    print("Encoders differ" if failed else "Encoded JSON is byte-identical")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
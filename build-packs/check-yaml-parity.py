@@ -0,0 +1,39 @@
+#!./venv/bin/python3
+
+import argparse
+import os
+import sys
+import tempfile
+from packlib.pipeline import PACK_DEPENDENCIES, compare_dirs, run_pipeline
+from packlib.yamlio import loader_name, use_fast_loader
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that the round-trip and fast YAML loaders generate "
+        "byte-identical pack documents"
+    )
+    parser.add_argument("packs", nargs="*", help="packs to check (default: all)")
+    args = parser.parse_args()
+    packs = args.packs or list(PACK_DEPENDENCIES)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        rtdir = os.path.join(tmpdir, "rt")
+        fastdir = os.path.join(tmpdir, "fast")
+        run_pipeline(packs, rtdir)
+        run_pipeline(packs, fastdir, fast_yaml=True)
+        use_fast_loader(True)
+        print(f"Compared ruamel round-trip against {loader_name()}")
+
+        failed = False
+        for pack in packs:
+            diffs = compare_dirs(os.path.join(rtdir, pack), os.path.join(fastdir, pack))
+            for fname in diffs:
+                print(f"MISMATCH {pack}/{fname}")
+            failed = failed or bool(diffs)
+        print("Loaders differ" if failed else "Generated JSON is byte-identical")
+        return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!./venv/bin/python3
+
+import argparse
+import os
+import sys
+from packlib.compendium import CompendiumError, read_pack
+
+
+def pack_dirs(path):
+    """Returns a dict mapping pack name to directory, for a pack or a folder of packs."""
+    if not os.path.isdir(path):
+        raise CompendiumError(f"No such directory {path}")
+    if os.path.isfile(os.path.join(path, "CURRENT")):
+        return {os.path.basename(os.path.normpath(path)): path}
+    return {
+        name: os.path.join(path, name)
+        for name in sorted(os.listdir(path))
+        if os.path.isfile(os.path.join(path, name, "CURRENT"))
+    }
+
+
+def compare_packs(left, right):
+    """Returns a list of differences between two compendium packs, by key."""
+    lentries = read_pack(left)
+    rentries = read_pack(right)
+    diffs = []
+    for key in sorted(lentries.keys() | rentries.keys()):
+        if key not in rentries:
+            diffs.append(f"only in {left}: {key}")
+        elif key not in lentries:
+            diffs.append(f"only in {right}: {key}")
+        elif lentries[key] != rentries[key]:
+            diffs.append(f"value differs: {key}")
+    return diffs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare compendium packs entry by entry, for instance packs "
+        "written by build.py --native against packs compiled by the Foundry CLI"
+    )
+    parser.add_argument("left", help="a LevelDB pack, or a folder of packs")
+    parser.add_argument("right", help="a LevelDB pack, or a folder of packs")
+    args = parser.parse_args()
+
+    try:
+        left = pack_dirs(args.left)
+        right = pack_dirs(args.right)
+    except CompendiumError as e:
+        print(f"\033[0;31mERROR:\033[0m {e}", file=sys.stderr)
+        return 2
+    failed = False
+    for pack in sorted(left.keys() | right.keys()):
+        if pack not in left or pack not in right:
+            print(f"MISSING {pack}: only in {args.left if pack in left else args.right}")
+            failed = True
+            continue
+        try:
+            diffs = compare_packs(left[pack], right[pack])
+        except CompendiumError as e:
+            print(f"\033[0;31mERROR:\033[0m {e}", file=sys.stderr)
+            return 2
+        for diff in diffs:
+            print(f"MISMATCH {pack}: {diff}")
+        print(f"{pack}: {'differs' if diffs else 'identical'}")
+        failed = failed or bool(diffs)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+#!./venv/bin/python3
+
+import argparse
+import sys
+from packlib.pipeline import compile_pack
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile a pack from the NDJSON bundle written by its generator"
+    )
+    parser.add_argument("pack", help="name of the pack to compile")
+    parser.add_argument(
+        "buildDir", nargs="?", default="build", help="folder containing <pack>.ndjson"
+    )
+    parser.add_argument(
+        "-n",
+        "--native",
+        action="store_true",
+        help="write the compendium pack from Python instead of the Foundry CLI",
+    )
+    args = parser.parse_args()
+    compile_pack(args.pack, args.buildDir, output_format="ndjson", native=args.native)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
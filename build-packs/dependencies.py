@@ -0,0 +1,62 @@
+#!./venv/bin/python3
+
+import argparse
+import os
+import sys
+from packlib.depgraph import DependencyGraph
+from packlib.pipeline import BUILD_PACKS_DIR
+
+
+def describe(graph, node):
+    pack = graph.packs.get(node)
+    if pack is None:
+        return node
+    return f"{pack}: {graph.names.get(node)} ({node})"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Look up the dependency graph of the last build: which "
+        "documents use a source record or item, or what a document uses"
+    )
+    parser.add_argument(
+        "queries",
+        nargs="+",
+        help="document names, document keys (e.g. !items!<id>) or source records "
+        "(e.g. possessions/weapongear.yaml#<id>)",
+    )
+    parser.add_argument(
+        "-u",
+        "--uses",
+        action="store_true",
+        help="list what the documents were built from, rather than what uses them",
+    )
+    parser.add_argument(
+        "-b",
+        "--build-dir",
+        default=os.path.join(BUILD_PACKS_DIR, "build"),
+        help="build directory of the packs",
+    )
+    args = parser.parse_args()
+
+    graph = DependencyGraph.load(args.build_dir)
+    status = 0
+    for query in args.queries:
+        nodes = graph.find(query)
+        if not nodes:
+            print(f"{query}: not found", file=sys.stderr)
+            status = 1
+            continue
+        for node in sorted(nodes):
+            print(describe(graph, node))
+            if args.uses:
+                related = graph.uses.get(node, ())
+            else:
+                related = graph.dependents([node])
+            for other in sorted(related):
+                print(f"    {describe(graph, other)}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,82 +1,97 @@
 #!./venv/bin/python3
 
-from ruamel.yaml import YAML
-import json
-import argparse
-from unidecode import unidecode
-from mergedeep import merge
-import re
-
-yaml = YAML(typ="rt")
-
-parser = argparse.ArgumentParser()
-parser.add_argument("dataDir", help="folder where data files are located")
-parser.add_argument("outputDir", help="folder where generated files should be placed")
-args = parser.parse_args()
-
-stats = {
-    "systemId": "sohl",
-    "systemVersion": "0.9.0",
-    "coreVersion": "12.330",
-    "createdTime": 0,
-    "modifiedTime": 0,
-    "lastModifiedBy": "TMJsvJWT6ytpHZ0M",
-}
-
-with open(f"{args.dataDir}/traits.yaml", "r", encoding="utf8") as infile:
-    traitsData = yaml.load(infile)
-
-for trait in traitsData:
-    print(f"Processing trait {trait['name']}")
-    fname = trait["name"] + "_" + trait["id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-
-    out = {
-        "name": trait["name"],
-        "type": "trait",
-        "img": trait["img"],
-        "_id": trait["id"],
-        "system": {
-            "subType": trait["subType"],
+import mergedeep
+from packlib.docspec import (
+    STATS,
+    Computed,
+    DocumentSpec,
+    Field,
+    Shared,
+    compile_template,
+    folder_template,
+    item_template,
+    slug,
+)
+from packlib.hitlocations import add_hit_tables, add_location_layout
+from packlib.impact import add_impact_table
+from packlib.incremental import record_digest
+from packlib.phases import timed
+from packlib.pipeline import run_generator
+from packlib.skillbase import add_skill_base, attribute_index, referenced_attributes
+from packlib.traitrules import record_changes
+from packlib.yamlio import iter_yaml
+
+merge = timed("merge", mergedeep.merge)
+
+
+def characteristic_template(type, system, **fields):
+    # Characteristic documents have always carried their _key last
+    template = item_template(type, system, **fields)
+    template["_key"] = template.pop("_key")
+    return template
+
+
+def prepare_trait(trait):
+    # Compiles the valueDesc labels into ascending integer thresholds and
+    # the parallel labels, so that describing a value is a binary search
+    thresholds = []
+    labels = []
+    for desc in trait.get("valueDesc") or []:
+        try:
+            maxValue = int(desc["maxValue"])
+        except (TypeError, ValueError):
+            raise ValueError(
+                f"Trait {trait['name']}: valueDesc {desc['label']!r} has a non-integer "
+                f"maxValue {desc['maxValue']!r}"
+            ) from None
+        if thresholds and maxValue <= thresholds[-1]:
+            raise ValueError(
+                f"Trait {trait['name']}: valueDesc {desc['label']!r} maxValue {maxValue} "
+                f"is not above the previous maxValue {thresholds[-1]}"
+            )
+        desc["maxValue"] = maxValue
+        thresholds.append(maxValue)
+        labels.append(desc["label"])
+    if thresholds:
+        merge(
+            trait["flags"],
+            {"sohl": {"valueDescTable": {"thresholds": thresholds, "labels": labels}}},
+        )
+
+
+TRAIT = DocumentSpec(
+    "trait",
+    "traits.yaml",
+    characteristic_template(
+        "trait",
+        {
+            "subType": Field("subType"),
             "notes": "",
             "textReference": "",
-            "description": trait["description"],
-            "macros": trait["macros"],
+            "description": Field("description"),
+            "macros": Field("macros"),
             "nestedItems": [],
             "transfer": False,
-            "abbrev": trait["abbrev"],
-            "skillBaseFormula": trait["skillBaseFormula"],
+            "abbrev": Field("abbrev"),
+            "skillBaseFormula": Field("skillBaseFormula"),
             "masteryLevelBase": 0,
             "improveFlag": False,
-            "textValue": trait["textValue"],
-            "isNumeric": bool(trait["isNumeric"]),
-            "intensity": trait["intensity"],
-            "max": trait["max"],
-            "valueDesc": trait["valueDesc"],
-            "choices": trait["choices"],
+            "textValue": Field("textValue"),
+            "isNumeric": Computed(lambda trait: bool(trait["isNumeric"])),
+            "intensity": Field("intensity"),
+            "max": Field("max"),
+            "valueDesc": Field("valueDesc"),
+            "choices": Field("choices"),
         },
-        "effects": [],
-        "flags": trait["flags"],
-        "_stats": stats,
-        "ownership": {"default": 3},
-        "folder": trait["folderId"],
-        "_key": "!items!" + trait["id"],
-    }
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(out, outfile, indent=2, ensure_ascii=False)
-
-with open(f"{args.dataDir}/skills.yaml", "r", encoding="utf8") as infile:
-    skillsData = yaml.load(infile)
+        effects=[],
+    ),
+    prepare=prepare_trait,
+    finish=add_skill_base,
+    related_source=("traits.yaml", "id"),
+)
 
-for skill in skillsData:
-    print(f"Processing skill {skill['name']}")
-    fname = skill["name"] + "_" + skill["id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
 
+def prepare_skill(skill):
     merge(
         skill["flags"],
         {
@@ -88,79 +103,72 @@ for skill in skillsData:
             },
         },
     )
-    out = {
-        "name": skill["name"],
-        "type": "skill",
-        "img": skill["img"],
-        "_id": skill["id"],
-        "system": {
-            "subType": skill["subType"],
+
+
+SKILL = DocumentSpec(
+    "skill",
+    "skills.yaml",
+    characteristic_template(
+        "skill",
+        {
+            "subType": Field("subType"),
             "notes": "",
             "textReference": "",
-            "description": skill["description"],
-            "macros": skill["macros"],
+            "description": Field("description"),
+            "macros": Field("macros"),
             "nestedItems": [],
             "transfer": False,
-            "abbrev": skill["abbrev"],
-            "skillBaseFormula": skill["skillBaseFormula"],
+            "abbrev": Field("abbrev"),
+            "skillBaseFormula": Field("skillBaseFormula"),
             "masteryLevelBase": 0,
             "improveFlag": False,
-            "weaponGroup": skill["weaponGroup"],
-            "domain": skill["domain"],
-            "baseSkill": skill["baseSkill"],
+            "weaponGroup": Field("weaponGroup"),
+            "domain": Field("domain"),
+            "baseSkill": Field("baseSkill"),
         },
-        "effects": skill["effects"],
-        "flags": skill["flags"],
-        "_stats": stats,
-        "ownership": {"default": 3},
-        "folder": skill["folderId"],
-        "_key": "!items!" + skill["id"],
-    }
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(out, outfile, indent=2, ensure_ascii=False)
-
-with open(f"{args.dataDir}/combatmaneuvers.yaml", "r", encoding="utf8") as infile:
-    combatmaneuversData = yaml.load(infile)
-
-with open(f"{args.dataDir}/combattechsm.yaml", "r", encoding="utf8") as infile:
-    combattechniquesmData = yaml.load(infile)
-
-combatmaneuvers = {}
-
-for cmbtman in combatmaneuversData:
-    print(f"Processing Combat Maneuver {cmbtman['name']}")
-    id = cmbtman["id"]
-    fname = cmbtman["name"] + "_" + id
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-    combatmaneuvers[id] = {
-        "name": cmbtman["name"],
-        "type": "combatmaneuver",
-        "img": cmbtman["img"],
-        "_id": cmbtman["id"],
+    ),
+    prepare=prepare_skill,
+    finish=add_skill_base,
+    related_source=("traits.yaml", "id"),
+)
+
+build_technique_strike_mode = compile_template(
+    {
+        "name": Field("subDesc"),
+        "type": "combattechniquestrikemode",
+        "img": Field("img"),
+        "_id": Field("id"),
         "system": {
             "notes": "",
             "textReference": "",
-            "description": cmbtman["description"],
-            "macros": cmbtman["macros"],
+            "description": "",
+            "macros": Field("macros"),
             "nestedItems": [],
             "transfer": True,
-            "abbrev": cmbtman["abbrev"],
+            "subType": Field("subType"),
+            "mode": Field("subDesc"),
+            "minParts": Field("minParts"),
+            "assocSkillName": Field("assocSkill"),
+            "lengthBase": Field("lengthBase"),
+            "impactBase": {
+                "numDice": Computed(lambda tech: 1 if tech["impactDie"] > 0 else 0),
+                "die": Field("impactDie"),
+                "modifier": Field("impactMod"),
+                "aspect": Field("impactAspect"),
+            },
         },
-        "effects": cmbtman["effects"],
-        "flags": cmbtman["flags"],
-        "_stats": stats,
+        "effects": [],
+        "flags": Field("flags"),
+        "_stats": Shared(STATS),
         "ownership": {"default": 3},
-        "folder": cmbtman["folderId"],
-        "_key": "!items!" + cmbtman["id"],
+        "folder": None,
     }
+)
+
 
-for cmbttech in combattechniquesmData:
+def build_combat_technique(cmbttech):
     smname = f"{cmbttech['name']} ({cmbttech['subDesc']})"
     print(f"Processing StrikeMode {smname}")
-    maneuver = combatmaneuvers[cmbttech["combatManeuverId"]]
-    subdesc = cmbttech["subDesc"]
 
     merge(
         cmbttech["flags"],
@@ -173,36 +181,7 @@ for cmbttech in combattechniquesmData:
         },
     )
 
-    sm = {
-        "name": cmbttech["subDesc"],
-        "type": "combattechniquestrikemode",
-        "img": cmbttech["img"],
-        "_id": cmbttech["id"],
-        "system": {
-            "notes": "",
-            "textReference": "",
-            "description": "",
-            "macros": cmbttech["macros"],
-            "nestedItems": [],
-            "transfer": True,
-            "subType": cmbttech["subType"],
-            "mode": subdesc,
-            "minParts": cmbttech["minParts"],
-            "assocSkillName": cmbttech["assocSkill"],
-            "lengthBase": cmbttech["lengthBase"],
-            "impactBase": {
-                "numDice": 1 if cmbttech["impactDie"] > 0 else 0,
-                "die": cmbttech["impactDie"],
-                "modifier": cmbttech["impactMod"],
-                "aspect": cmbttech["impactAspect"],
-            },
-        },
-        "effects": [],
-        "flags": cmbttech["flags"],
-        "_stats": stats,
-        "ownership": {"default": 3},
-        "folder": None,
-    }
+    sm = build_technique_strike_mode(cmbttech)
 
     eid = cmbttech["effectId"]
     effect = {
@@ -234,105 +213,114 @@ for cmbttech in combattechniquesmData:
         "_key": "!items.effects!" + sm["_id"] + "." + eid,
     }
 
-    for chg in cmbttech["effectChanges"]:
-        change = {
-            "key": chg["key"],
-            "mode": int(chg["mode"]),
-            "value": str(chg["value"]),
-            "priority": None,
-        }
-        effect["changes"].append(change)
+    effect["changes"].extend(record_changes(cmbttech["effectChanges"]))
     sm["effects"].append(effect)
-    combatmaneuvers[cmbttech["combatManeuverId"]]["system"]["nestedItems"].append(sm)
-
-for cmid in combatmaneuvers.keys():
-    if cmid == None:
-        continue
-    fname = combatmaneuvers[cmid]["name"] + "_" + cmid
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(combatmaneuvers[cmid], outfile, indent=2, ensure_ascii=False)
-
-with open(f"{args.dataDir}/afflictions.yaml", "r", encoding="utf8") as infile:
-    afflictionsData = yaml.load(infile)
-
-for affliction in afflictionsData:
-    print(f"Processing Affliction {affliction['name']}")
-    fname = affliction["name"] + "_" + affliction["id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-
-    out = {
-        "name": affliction["name"],
-        "type": "affliction",
-        "img": affliction["img"],
-        "_id": affliction["id"],
-        "_key": "!items!" + affliction["id"],
-        "system": {
-            "subType": affliction["subType"],
+    add_impact_table(sm)
+    return sm
+
+
+def add_techniques(cmbtman, out, techniques):
+    for cmbttech in techniques:
+        out["system"]["nestedItems"].append(build_combat_technique(cmbttech))
+
+
+COMBAT_MANEUVER = DocumentSpec(
+    "Combat Maneuver",
+    "combatmaneuvers.yaml",
+    characteristic_template(
+        "combatmaneuver",
+        {
+            "notes": "",
+            "textReference": "",
+            "description": Field("description"),
+            "macros": Field("macros"),
+            "nestedItems": [],
+            "transfer": True,
+            "abbrev": Field("abbrev"),
+        },
+    ),
+    finish=add_techniques,
+    related_source=("combattechsm.yaml", "id"),
+)
+
+
+def generate_combat_maneuvers(dataDir, output):
+    # A combat maneuver document embeds its strike modes, so its digest must
+    # cover the maneuver record and every technique record that refers to it.
+    techniquesByManeuver = {}
+    for cmbttech in iter_yaml(f"{dataDir}/combattechsm.yaml"):
+        techniquesByManeuver.setdefault(cmbttech["combatManeuverId"], []).append(cmbttech)
+
+    COMBAT_MANEUVER.generate(
+        dataDir, output, related=lambda cmbtman: techniquesByManeuver.pop(cmbtman["id"], [])
+    )
+
+    if techniquesByManeuver:
+        raise KeyError(
+            f"Combat techniques refer to unknown combat maneuvers: {list(techniquesByManeuver)}"
+        )
+
+
+AFFLICTION = DocumentSpec(
+    "Affliction",
+    "afflictions.yaml",
+    item_template(
+        "affliction",
+        {
+            "subType": Field("subType"),
             "notes": "",
             "textReference": "",
-            "description": affliction["description"],
-            "macros": affliction["macros"],
+            "description": Field("description"),
+            "macros": Field("macros"),
             "nestedItems": [],
             "transfer": False,
             "isDormant": False,
             "isTreated": False,
-            "diagnosisBonusBase": affliction["diagnosisBonus"],
-            "levelBase": affliction["level"],
-            "healingRateBase": affliction["healingRate"],
-            "contagionIndexBase": affliction["contagionIndex"],
-            "transmission": affliction["transmission"],
+            "diagnosisBonusBase": Field("diagnosisBonus"),
+            "levelBase": Field("level"),
+            "healingRateBase": Field("healingRate"),
+            "contagionIndexBase": Field("contagionIndex"),
+            "transmission": Field("transmission"),
         },
-        "effects": affliction["effects"],
-        "flags": affliction["flags"],
-        "_stats": stats,
-        "ownership": {"default": 3},
-        "folder": affliction["folderId"],
-    }
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(out, outfile, indent=2, ensure_ascii=False)
-
-with open(f"{args.dataDir}/anatomies.yaml", "r", encoding="utf8") as infile:
-    anatomiesData = yaml.load(infile)
-
-for anatomy in anatomiesData:
-    print(f"Processing Anatomy {anatomy['name']}")
-    fname = anatomy["name"] + "_" + anatomy["_id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-
-    anatomy["_key"] = "!items!" + anatomy["_id"]
-        
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(anatomy, outfile, indent=2, ensure_ascii=False)
-
-with open(f"{args.dataDir}/folders.yaml", "r", encoding="utf8") as infile:
-    foldersData = yaml.load(infile)
-
-for folder in foldersData:
-    print(f"Processing Folder {folder['name']}")
-    fname = folder["name"] + "_" + folder["id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-
-    out = {
-        "name": folder["name"],
-        "sorting": "a",
-        "folder": folder["parentFolderId"] or None,
-        "type": "Item",
-        "_id": folder["id"],
-        "sort": 0,
-        "color": folder["color"],
-        "flags": {},
-        "_stats": stats,
-        "_key": "!folders!" + folder["id"],
-    }
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(out, outfile, indent=2, ensure_ascii=False)
+    ),
+)
+
+
+def generate_anatomies(dataDir, output):
+    # Anatomy records are already in document form
+    for anatomy in iter_yaml(f"{dataDir}/anatomies.yaml"):
+        fname = slug(anatomy["name"], anatomy["_id"]) + ".json"
+        digest = record_digest(anatomy)
+        if output.is_current(fname, digest):
+            continue
+        print(f"Processing Anatomy {anatomy['name']}")
+
+        anatomy["_key"] = "!items!" + anatomy["_id"]
+        add_hit_tables(anatomy)
+        add_location_layout(anatomy)
+
+        output.add(fname, anatomy, digest, [("anatomies.yaml", anatomy["_id"])])
+
+
+FOLDER = DocumentSpec("Folder", "folders.yaml", folder_template(ownership=False))
+
+
+def generate(dataDir, output):
+    # Skill base formulas refer to attribute traits by abbrev; a document
+    # with a formula depends on the traits it refers to, and an unknown
+    # abbrev fails the build
+    attributes = attribute_index(iter_yaml(f"{dataDir}/traits.yaml"))
+
+    def related(rec):
+        return referenced_attributes(rec, attributes)
+
+    TRAIT.generate(dataDir, output, related=related)
+    SKILL.generate(dataDir, output, related=related)
+    generate_combat_maneuvers(dataDir, output)
+    AFFLICTION.generate(dataDir, output)
+    generate_anatomies(dataDir, output)
+    FOLDER.generate(dataDir, output)
+
+
+if __name__ == "__main__":
+    run_generator(generate)
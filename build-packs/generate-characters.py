@@ -1,52 +1,20 @@
 #!./venv/bin/python3
 
-from ruamel.yaml import YAML
 import os
-import json
-import copy
-import argparse
 import random
 import string
-from unidecode import unidecode
-import re
-import copy
+from packlib.bundle import bundle_path, read_bundle
+from packlib.catalogue import ItemCatalogue
+from packlib.docspec import DocumentSpec, folder_template, slug
+from packlib.incremental import record_digest
+from packlib.jsonenc import loads
+from packlib.overlay import overlay
+from packlib.phases import phase, timed
+from packlib.pipeline import run_generator
+from packlib.yamlio import iter_yaml
 
-yaml = YAML(typ="rt")
+overlay = timed("merge", overlay)
 
-parser = argparse.ArgumentParser()
-parser.add_argument("dataDir", help="folder where data files are located")
-parser.add_argument("outputDir", help="folder where generated files should be placed")
-args = parser.parse_args()
-
-class MaxDepthExceededError(Exception):
-    """Exception raised when recursion exceeds the maximum allowed depth."""
-    pass
-
-def deep_replace(dict1, dict2, max_depth=10):
-    """
-    Creates a deep copy of dict1 and performs a deep replace with values from dict2,
-    limiting recursion to a maximum depth.
-    """
-    def recursive_replace(d1, d2, depth):
-        if depth > max_depth:
-            raise MaxDepthExceededError(f"Maximum recursion depth of {max_depth} exceeded.")
-        for key, value in d2.items():
-            if key in d1:
-                if isinstance(value, dict) and isinstance(d1[key], dict):
-                    # If both values are dictionaries, recurse
-                    recursive_replace(d1[key], value, depth + 1)
-                else:
-                    # Replace the value
-                    d1[key] = copy.deepcopy(value)
-            else:
-                # Add new key-value pairs from dict2
-                d1[key] = copy.deepcopy(value)
-
-    # Create a deep copy of dict1
-    result = copy.deepcopy(dict1)
-    # Perform the deep replace with depth tracking
-    recursive_replace(result, dict2, depth=1)
-    return result
 
 def read_json_files_to_dict(directory_path, existing_array):
     # Check if the directory exists
@@ -62,90 +30,85 @@ def read_json_files_to_dict(directory_path, existing_array):
         if os.path.isfile(file_path) and filename.endswith('.json'):
             try:
                 # Read and parse the JSON file
-                with open(file_path, 'r') as file:
-                    json_data = json.load(file)
+                with open(file_path, 'rb') as file:
+                    json_data = loads(file.read())
                 existing_array.append(json_data)
             except Exception as e:
                 print(f"Error reading file '{filename}': {e}")
 
     return existing_array
 
-def get_item(name, type, ary):
-    for item in ary:
-        if item.get("name") == name and item.get("type") == type:
-            return item
-    return None
-
-items = []
-read_json_files_to_dict("build/characteristics", items)
-read_json_files_to_dict("build/mysteries", items)
-read_json_files_to_dict("build/possessions", items)
-# with open("all.json", "w", encoding="utf8") as outfile:
-#     json.dump(items, outfile, indent=2, ensure_ascii=False)
-
-stats = {
-    "systemId": "sohl",
-    "systemVersion": "0.9.0",
-    "coreVersion": "12.330",
-    "createdTime": 0,
-    "modifiedTime": 0,
-    "lastModifiedBy": "TMJsvJWT6ytpHZ0M",
-}
-
-with open(f"{args.dataDir}/characters.yaml", "r", encoding="utf8") as infile:
-    charsData = yaml.load(infile)
-
-for char in charsData:
-    print(f"Processing Character {char['name']}")
-    fname = char["name"] + "_" + char["_id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-    actorid = char["_id"]
-    actorkey = f"!actors!{actorid}"
-    del char["_id"]
-    
-    out = dict(char)
-    out["_id"] = actorid
-    out["_key"] = actorkey
-    out["items"] = []
-    for itemdesc in char["items"]:
-        itemid = itemdesc["_id"]
-        itemkey = f"!actors.items!{actorid}.{itemid}"
-        result = {}
-        if itemdesc["name"] and itemdesc["type"]:
-            result = get_item(itemdesc["name"], itemdesc["type"], items)
-        else:
-            raise ValueError(f"Item with name {name} of type {type} not found")
-        newitem = deep_replace(result, itemdesc)
-        newitem["_id"] = itemid
-        newitem["_key"] = itemkey
-        out["items"].append(newitem)
-
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(out, outfile, indent=2, ensure_ascii=False)
-
-with open(f"{args.dataDir}/folders.yaml", "r", encoding="utf8") as infile:
-    foldersData = yaml.load(infile)
-
-for folder in foldersData:
-    print(f"Processing Folder {folder['name']}")
-    fname = folder["name"] + "_" + folder["id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-
-    out = {
-        "name": folder["name"],
-        "sorting": "a",
-        "folder": folder["parentFolderId"] or None,
-        "type": "Item",
-        "_id": folder["id"],
-        "color": folder["color"],
-        "flags": {},
-        "_stats": stats,
-        "ownership": {"default": 3},
-        "_key": "!folders!" + folder["id"],
-    }
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(out, outfile, indent=2, ensure_ascii=False)
+def read_catalogue():
+    items = []
+    with phase("load"):
+        for pack in ["characteristics", "mysteries", "possessions"]:
+            # Item packs built with --output-format ndjson only have the bundle
+            bundle = bundle_path(f"build/{pack}")
+            if os.path.isfile(bundle):
+                items.extend(read_bundle(bundle))
+            else:
+                read_json_files_to_dict(f"build/{pack}", items)
+    return items
+
+def generate_characters(dataDir, output, catalogue):
+    for char in iter_yaml(f"{dataDir}/characters.yaml"):
+        fname = slug(char["name"], char["_id"]) + ".json"
+        # Actors embed copies of catalogue items, so a change to any of those
+        # items must regenerate the actor as well.
+        baseItems = [
+            catalogue.get(itemdesc["name"], itemdesc["type"])
+            for itemdesc in char["items"]
+        ]
+        digest = record_digest(char, baseItems)
+        if output.is_current(fname, digest):
+            continue
+        print(f"Processing Character {char['name']}")
+        actorid = char["_id"]
+        actorkey = f"!actors!{actorid}"
+        del char["_id"]
+
+        out = dict(char)
+        out["_id"] = actorid
+        out["_key"] = actorkey
+        out["items"] = []
+        for itemdesc, result in zip(char["items"], baseItems):
+            itemid = itemdesc["_id"]
+            itemkey = f"!actors.items!{actorid}.{itemid}"
+            if result is None:
+                raise ValueError(
+                    f"Item with name {itemdesc['name']} of type {itemdesc['type']} not found"
+                )
+            newitem = overlay(result, itemdesc)
+            newitem["_id"] = itemid
+            newitem["_key"] = itemkey
+            out["items"].append(newitem)
+
+        output.add(
+            fname,
+            out,
+            digest,
+            [("characters.yaml", actorid)],
+            [item["_key"] for item in baseItems],
+        )
+
+
+FOLDER = DocumentSpec("Folder", "folders.yaml", folder_template(sort=False))
+
+
+def generate(dataDir, output, items=None):
+    """
+    Generates the character actors. Embedded items are resolved against
+    items, the documents generated for the item packs; if not given, they
+    are read from the item packs' build directories.
+    """
+    if items is None:
+        items = read_catalogue()
+    catalogue = ItemCatalogue(items)
+    for name, type in catalogue.duplicates():
+        print(f"Warning: more than one {type} named {name} in the item catalogue")
+    generate_characters(dataDir, output, catalogue)
+    FOLDER.generate(dataDir, output)
+
+
+if __name__ == "__main__":
+    run_generator(generate)
@@ -1,48 +1,14 @@
 #!python3
 
-from ruamel.yaml import YAML
-import json
-import argparse
-from unidecode import unidecode
-import re
+from packlib.docspec import DocumentSpec, folder_template
+from packlib.pipeline import run_generator
 
-yaml = YAML(typ="rt")
+FOLDER = DocumentSpec("Folder", "folders.yaml", folder_template(sort=False))
 
-parser = argparse.ArgumentParser()
-parser.add_argument("dataDir", help="folder where data files are located")
-parser.add_argument("outputDir", help="folder where generated files should be placed")
-args = parser.parse_args()
 
-stats = {
-    "systemId": "sohl",
-    "systemVersion": "0.9.0",
-    "coreVersion": "12.330",
-    "createdTime": 0,
-    "modifiedTime": 0,
-    "lastModifiedBy": "TMJsvJWT6ytpHZ0M",
-}
+def generate(dataDir, output):
+    FOLDER.generate(dataDir, output)
 
-with open(f"{args.dataDir}/folders.yaml", "r", encoding="utf8") as infile:
-    foldersData = yaml.load(infile)
 
-for folder in foldersData:
-    print(f"Processing Folder {folder['name']}")
-    fname = folder["name"] + "_" + folder["id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-
-    out = {
-        "name": folder["name"],
-        "sorting": "a",
-        "folder": folder["parentFolderId"] or None,
-        "type": "Item",
-        "_id": folder["id"],
-        "color": folder["color"],
-        "flags": {},
-        "_stats": stats,
-        "ownership": {"default": 3},
-        "_key": "!folders!" + folder["id"],
-    }
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(out, outfile, indent=2, ensure_ascii=False)
+if __name__ == "__main__":
+    run_generator(generate)
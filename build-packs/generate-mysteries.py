@@ -1,190 +1,135 @@
 #!./venv/bin/python3
 
-from ruamel.yaml import YAML
-import json
-import argparse
-from unidecode import unidecode
-import re
-
-yaml = YAML(typ="rt")
-
-parser = argparse.ArgumentParser()
-parser.add_argument("dataDir", help="folder where data files are located")
-parser.add_argument("outputDir", help="folder where generated files should be placed")
-args = parser.parse_args()
-
-stats = {
-    "systemId": "sohl",
-    "systemVersion": "0.9.0",
-    "coreVersion": "12.330",
-    "createdTime": 0,
-    "modifiedTime": 0,
-    "lastModifiedBy": "TMJsvJWT6ytpHZ0M",
-}
-
-with open(f"{args.dataDir}/philosophies.yaml", "r", encoding="utf8") as infile:
-    philosophiesData = yaml.load(infile)
-
-for phil in philosophiesData:
-    print(f"Processing Philosophy {phil['name']}")
-    fname = phil["name"] + "_" + phil["id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-
-    out = {
-        "name": phil["name"],
-        "type": "philosophy",
-        "img": phil["img"],
-        "_id": phil["id"],
-        "_key": "!items!" + phil["id"],
+from packlib.docspec import (
+    DocumentSpec,
+    Field,
+    compile_template,
+    folder_template,
+    item_template,
+)
+from packlib.pipeline import run_generator, sibling_data_dir
+from packlib.skillbase import add_skill_base, attribute_index, referenced_attributes
+from packlib.yamlio import iter_yaml
+
+
+def charges_template():
+    return {
+        "usesCharges": Field("usesCharges"),
+        "value": Field("chargesValue"),
+        "max": Field("chargesMax"),
+    }
+
+
+build_domain = compile_template(
+    {
+        "name": Field("name"),
+        "type": "domain",
+        "img": Field("img"),
+        "_id": Field("id"),
         "system": {
             "notes": "",
             "textReference": "",
-            "description": phil["description"],
-            "macros": phil["macros"],
+            "description": Field("description"),
+            "macros": Field("macros"),
             "nestedItems": [],
-            "transfer": False,
-            "category": phil["category"],
+            "transfer": True,
+            "abbrev": Field("abbrev"),
         },
-        "effects": phil["effects"],
-        "flags": phil["flags"],
-        "_stats": stats,
+        "effects": Field("effects"),
         "ownership": {"default": 3},
-        "folder": phil["folderId"],
+        "flags": Field("flags"),
     }
+)
+
+
+def add_domains(phil, out, related):
     for ni in phil["nestedItems"]:
-        nestedItem = {
-            "name": ni["name"],
-            "type": "domain",
-            "img": ni["img"],
-            "_id": ni["id"],
-            "system": {
-                "notes": "",
-                "textReference": "",
-                "description": ni["description"],
-                "macros": ni["macros"],
-                "nestedItems": [],
-                "transfer": True,
-                "abbrev": ni["abbrev"],
-            },
-            "effects": ni["effects"],
-            "ownership": { "default": 3 },
-            "flags": ni["flags"],
-        }
-        out["system"]["nestedItems"].append(nestedItem)
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(out, outfile, indent=2, ensure_ascii=False)
-
-with open(f"{args.dataDir}/mysticalabilities.yaml", "r", encoding="utf8") as infile:
-    mysticalabilitiesData = yaml.load(infile)
-
-for mysticalability in mysticalabilitiesData:
-    print(f"Processing Mystical Ability {mysticalability['name']}")
-    fname = mysticalability["name"] + "_" + mysticalability["id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-
-    out = {
-        "name": mysticalability["name"],
-        "type": "mysticalability",
-        "img": mysticalability["img"],
-        "_id": mysticalability["id"],
-        "_key": "!items!" + mysticalability["id"],
-        "system": {
-            "subType": mysticalability["subType"],
+        out["system"]["nestedItems"].append(build_domain(ni))
+
+
+PHILOSOPHY = DocumentSpec(
+    "Philosophy",
+    "philosophies.yaml",
+    item_template(
+        "philosophy",
+        {
             "notes": "",
             "textReference": "",
-            "description": mysticalability["description"],
-            "macros": mysticalability["macros"],
+            "description": Field("description"),
+            "macros": Field("macros"),
             "nestedItems": [],
             "transfer": False,
-            "abbrev": mysticalability["abbrev"],
-            "skillBaseFormula": mysticalability["skillBaseFormula"],
+            "category": Field("category"),
+        },
+    ),
+    finish=add_domains,
+)
+
+MYSTICAL_ABILITY = DocumentSpec(
+    "Mystical Ability",
+    "mysticalabilities.yaml",
+    item_template(
+        "mysticalability",
+        {
+            "subType": Field("subType"),
+            "notes": "",
+            "textReference": "",
+            "description": Field("description"),
+            "macros": Field("macros"),
+            "nestedItems": [],
+            "transfer": False,
+            "abbrev": Field("abbrev"),
+            "skillBaseFormula": Field("skillBaseFormula"),
             "masteryLevelBase": 0,
             "improveFlag": False,
-            "domain": mysticalability["domain"],
-            "levelBase": mysticalability["level"],
-            "charges": {
-                "usesCharges": mysticalability["usesCharges"],
-                "value": mysticalability["chargesValue"],
-                "max": mysticalability["chargesMax"],
-            },
+            "domain": Field("domain"),
+            "levelBase": Field("level"),
+            "charges": charges_template(),
         },
-        "effects": mysticalability["effects"],
-        "flags": mysticalability["flags"],
-        "_stats": stats,
-        "ownership": {"default": 3},
-        "folder": mysticalability["folderId"],
-    }
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(out, outfile, indent=2, ensure_ascii=False)
-
-with open(f"{args.dataDir}/mysteries.yaml", "r", encoding="utf8") as infile:
-    mysteriesData = yaml.load(infile)
-
-for mystery in mysteriesData:
-    print(f"Processing Mystery {mystery['name']}")
-    fname = mystery["name"] + "_" + mystery["id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-
-    out = {
-        "name": mystery["name"],
-        "type": "mystery",
-        "img": mystery["img"],
-        "_id": mystery["id"],
-        "_key": "!items!" + mystery["id"],
-        "system": {
-            "subType": mystery["subType"],
+    ),
+    finish=add_skill_base,
+    related_source=("traits.yaml", "id", "characteristics"),
+)
+
+MYSTERY = DocumentSpec(
+    "Mystery",
+    "mysteries.yaml",
+    item_template(
+        "mystery",
+        {
+            "subType": Field("subType"),
             "notes": "",
             "textReference": "",
-            "description": mystery["description"],
-            "macros": mystery["macros"],
+            "description": Field("description"),
+            "macros": Field("macros"),
             "nestedItems": [],
             "transfer": False,
-            "domain": mystery["domain"],
-            "skills": mystery["skills"],
-            "levelBase": mystery["level"],
-            "charges": {
-                "usesCharges": mystery["usesCharges"],
-                "value": mystery["chargesValue"],
-                "max": mystery["chargesMax"],
-            },
+            "domain": Field("domain"),
+            "skills": Field("skills"),
+            "levelBase": Field("level"),
+            "charges": charges_template(),
         },
-        "effects": mystery["effects"],
-        "flags": mystery["flags"],
-        "_stats": stats,
-        "ownership": {"default": 3},
-        "folder": mystery["folderId"],
-    }
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(out, outfile, indent=2, ensure_ascii=False)
-
-with open(f"{args.dataDir}/folders.yaml", "r", encoding="utf8") as infile:
-    foldersData = yaml.load(infile)
-
-for folder in foldersData:
-    print(f"Processing Folder {folder['name']}")
-    fname = folder["name"] + "_" + folder["id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-
-    out = {
-        "name": folder["name"],
-        "sorting": "a",
-        "folder": folder["parentFolderId"] or None,
-        "type": "Item",
-        "_id": folder["id"],
-        "sort": 0,
-        "color": folder["color"],
-        "flags": {},
-        "_stats": stats,
-        "ownership": {"default": 3},
-        "_key": "!folders!" + folder["id"],
-    }
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(out, outfile, indent=2, ensure_ascii=False)
+    ),
+)
+
+FOLDER = DocumentSpec("Folder", "folders.yaml", folder_template())
+
+
+def generate(dataDir, output):
+    """
+    Generates the mysteries pack. Skill base formulas are resolved against
+    the attribute traits of the characteristics pack, read from its data
+    files rather than its generated documents, so that the two packs can
+    be built side by side.
+    """
+    attributes = attribute_index(iter_yaml(f"{sibling_data_dir(dataDir, 'characteristics')}/traits.yaml"))
+    PHILOSOPHY.generate(dataDir, output)
+    MYSTICAL_ABILITY.generate(
+        dataDir, output, related=lambda rec: referenced_attributes(rec, attributes)
+    )
+    MYSTERY.generate(dataDir, output)
+    FOLDER.generate(dataDir, output)
+
+
+if __name__ == "__main__":
+    run_generator(generate)
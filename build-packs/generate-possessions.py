@@ -1,191 +1,112 @@
 #!./venv/bin/python3
 
-from ruamel.yaml import YAML
-import json
-import argparse
-from unidecode import unidecode
-from mergedeep import merge
-import re
-
-yaml = YAML(typ="rt")
-
-parser = argparse.ArgumentParser()
-parser.add_argument("dataDir", help="folder where data files are located")
-parser.add_argument("outputDir", help="folder where generated files should be placed")
-args = parser.parse_args()
-
-stats = {
-    "systemId": "sohl",
-    "systemVersion": "0.9.0",
-    "coreVersion": "12.330",
-    "createdTime": 0,
-    "modifiedTime": 0,
-    "lastModifiedBy": "TMJsvJWT6ytpHZ0M",
-}
-
-with open(f"{args.dataDir}/miscgear.yaml", "r", encoding="utf8") as infile:
-    miscgearData = yaml.load(infile)
-
-for miscgear in miscgearData:
-    print(f"Processing Misc Gear {miscgear['name']}")
-    fname = miscgear["name"] + "_" + miscgear["id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-
-    out = {
-        "name": miscgear["name"],
-        "type": "miscgear",
-        "img": miscgear["img"],
-        "_id": miscgear["id"],
-        "_key": "!items!" + miscgear["id"],
-        "system": {
+import mergedeep
+from packlib.docspec import (
+    STATS,
+    Computed,
+    DocumentSpec,
+    Field,
+    Shared,
+    compile_template,
+    folder_template,
+    item_template,
+)
+from packlib.coverage import add_armor_coverage, anatomy_layouts
+from packlib.impact import add_impact_table
+from packlib.phases import phase, timed
+from packlib.pipeline import run_generator, sibling_data_dir
+from packlib.traitrules import (
+    STRIKE_MODE_REWRITES,
+    STRIKE_MODE_TRAITS,
+    apply_rewrites,
+    compile_trait_rules,
+)
+from packlib.yamlio import iter_yaml
+
+merge = timed("merge", mergedeep.merge)
+
+
+MISC_GEAR = DocumentSpec(
+    "Misc Gear",
+    "miscgear.yaml",
+    item_template(
+        "miscgear",
+        {
             "notes": "",
             "textReference": "",
-            "description": miscgear["description"],
-            "macros": miscgear["macros"],
+            "description": Field("description"),
+            "macros": Field("macros"),
             "nestedItems": [],
             "transfer": False,
-            "abbrev": miscgear["abbrev"],
+            "abbrev": Field("abbrev"),
             "quantity": 1,
-            "weightBase": miscgear["weight"],
-            "valueBase": miscgear["value"],
+            "weightBase": Field("weight"),
+            "valueBase": Field("value"),
             "isCarried": True,
             "isEquipped": False,
-            "qualityBase": miscgear["quality"],
-            "durabilityBase": miscgear["durability"],
+            "qualityBase": Field("quality"),
+            "durabilityBase": Field("durability"),
         },
-        "effects": miscgear["effects"],
-        "flags": miscgear["flags"],
-        "_stats": stats,
-        "ownership": {"default": 3},
-        "folder": miscgear["folderId"],
-    }
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(out, outfile, indent=2, ensure_ascii=False)
-
-with open(f"{args.dataDir}/containergear.yaml", "r", encoding="utf8") as infile:
-    containergearData = yaml.load(infile)
-
-for containergear in containergearData:
-    print(f"Processing Container Gear {containergear['name']}")
-    fname = containergear["name"] + "_" + containergear["id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-
-    out = {
-        "name": containergear["name"],
-        "type": "containergear",
-        "img": containergear["img"],
-        "_id": containergear["id"],
-        "_key": "!items!" + containergear["id"],
-        "system": {
+    ),
+)
+
+CONTAINER_GEAR = DocumentSpec(
+    "Container Gear",
+    "containergear.yaml",
+    item_template(
+        "containergear",
+        {
             "notes": "",
             "textReference": "",
-            "description": containergear["description"],
-            "macros": containergear["macros"],
+            "description": Field("description"),
+            "macros": Field("macros"),
             "nestedItems": [],
             "transfer": False,
             "abbrev": "",
             "quantity": 1,
-            "weightBase": containergear["weight"],
-            "valueBase": containergear["value"],
+            "weightBase": Field("weight"),
+            "valueBase": Field("value"),
             "isCarried": True,
             "isEquipped": False,
-            "qualityBase": containergear["quality"],
-            "durabilityBase": containergear["durability"],
-            "maxCapacityBase": containergear["maxCapacity"],
+            "qualityBase": Field("quality"),
+            "durabilityBase": Field("durability"),
+            "maxCapacityBase": Field("maxCapacity"),
         },
-        "effects": containergear["effects"],
-        "flags": containergear["flags"],
-        "_stats": stats,
-        "ownership": {"default": 3},
-        "folder": "dl8lJ729W1mFlDvt",
-    }
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(out, outfile, indent=2, ensure_ascii=False)
-
-with open(f"{args.dataDir}/concoctiongear.yaml", "r", encoding="utf8") as infile:
-    concoctiongearData = yaml.load(infile)
-
-for concoctiongear in concoctiongearData:
-    print(f"Processing Concoction Gear {concoctiongear['name']}")
-    fname = concoctiongear["name"] + "_" + concoctiongear["id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-
-    out = {
-        "name": concoctiongear["name"],
-        "type": "concoctiongear",
-        "img": concoctiongear["img"],
-        "_id": concoctiongear["id"],
-        "_key": "!items!" + concoctiongear["id"],
-        "system": {
+        folder="dl8lJ729W1mFlDvt",
+    ),
+)
+
+CONCOCTION_GEAR = DocumentSpec(
+    "Concoction Gear",
+    "concoctiongear.yaml",
+    item_template(
+        "concoctiongear",
+        {
             "notes": "",
             "textReference": "",
-            "description": concoctiongear["description"],
-            "macros": concoctiongear["macros"],
+            "description": Field("description"),
+            "macros": Field("macros"),
             "nestedItems": [],
             "transfer": False,
-            "subType": concoctiongear["subType"],
+            "subType": Field("subType"),
             "abbrev": "",
             "quantity": 1,
-            "weightBase": concoctiongear["weight"],
-            "valueBase": concoctiongear["value"],
+            "weightBase": Field("weight"),
+            "valueBase": Field("value"),
             "isCarried": True,
             "isEquipped": False,
-            "qualityBase": concoctiongear["quality"],
-            "durabilityBase": concoctiongear["durability"],
-            "potency": concoctiongear["potency"],
-            "strength": concoctiongear["strength"],
+            "qualityBase": Field("quality"),
+            "durabilityBase": Field("durability"),
+            "potency": Field("potency"),
+            "strength": Field("strength"),
         },
-        "effects": concoctiongear["effects"],
-        "flags": concoctiongear["flags"],
-        "_stats": stats,
-        "ownership": {"default": 3},
-        "folder": concoctiongear["folderId"],
-    }
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(out, outfile, indent=2, ensure_ascii=False)
-
-with open(f"{args.dataDir}/folders.yaml", "r", encoding="utf8") as infile:
-    foldersData = yaml.load(infile)
-
-for folder in foldersData:
-    print(f"Processing Folder {folder['name']}")
-    fname = folder["name"] + "_" + folder["id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-
-    out = {
-        "name": folder["name"],
-        "sorting": "a",
-        "folder": folder["parentFolderId"] or None,
-        "type": "Item",
-        "_id": folder["id"],
-        "sort": 0,
-        "color": folder["color"],
-        "flags": {},
-        "_stats": stats,
-        "ownership": {"default": 3},
-        "_key": "!folders!" + folder["id"],
-    }
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(out, outfile, indent=2, ensure_ascii=False)
+    ),
+)
 
-with open(f"{args.dataDir}/armorgear.yaml", "r", encoding="utf8") as infile:
-    armorgearData = yaml.load(infile)
+FOLDER = DocumentSpec("Folder", "folders.yaml", folder_template())
 
-for armorgear in armorgearData:
-    print(f"Processing Armor Gear {armorgear['name']}")
-    fname = armorgear["name"] + "_" + armorgear["id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
 
+def prepare_armor(armorgear):
     merge(
         armorgear["flags"],
         {
@@ -196,58 +117,38 @@ for armorgear in armorgearData:
             },
         },
     )
-    out = {
-        "name": armorgear["name"],
-        "type": "armorgear",
-        "img": armorgear["img"],
-        "_id": armorgear["id"],
-        "_key": "!items!" + armorgear["id"],
-        "system": {
-            "notes": "",
-            "textReference": "",
-            "description": armorgear["description"],
-            "macros": armorgear["macros"],
-            "nestedItems": [],
-            "transfer": False,
-            "abbrev": armorgear["abbrev"],
-            "quantity": 1,
-            "weightBase": armorgear["weight"],
-            "valueBase": armorgear["value"],
-            "isCarried": True,
-            "isEquipped": False,
-            "qualityBase": 0,
-            "durabilityBase": armorgear["durability"],
-            "material": armorgear["material"],
-            "locations": {
-                "flexible": armorgear["flexloc"],
-                "rigid": armorgear["rigidloc"],
-            },
-        },
-        "effects": [],
-        "flags": armorgear["flags"],
-        "_stats": stats,
-        "ownership": {"default": 3},
-        "folder": armorgear["folderId"],
-    }
-    
-    legProt = {
-        "name": "Legendary Protection",
+
+
+def protection_template(subType, effects=True):
+    template = {
+        "name": "Legendary Protection" if subType == "legendary" else "Misty Isle Protection",
         "type": "protection",
-        "img": armorgear["img"],
-        "_id": armorgear["legendary"]["id"],
+        "img": Field("img"),
+        "_id": Field(subType, "id"),
         "system": {
             "transfer": True,
-            "subType": "legendary",
+            "subType": subType,
             "protectionBase": {
-                "blunt": armorgear["legendary"]["blunt"],
-                "edged": armorgear["legendary"]["edged"],
-                "piercing": armorgear["legendary"]["piercing"],
-                "fire": armorgear["legendary"]["fire"],
+                "blunt": Field(subType, "blunt"),
+                "edged": Field(subType, "edged"),
+                "piercing": Field(subType, "piercing"),
+                "fire": Field(subType, "fire"),
             },
         },
         "effects": [],
         "ownership": {"default": 3},
     }
+    if not effects:
+        del template["effects"]
+    return template
+
+
+build_legendary_protection = compile_template(protection_template("legendary"))
+build_mistyisle_protection = compile_template(protection_template("mistyisle", effects=False))
+
+
+def add_protections(armorgear, out, related):
+    legProt = build_legendary_protection(armorgear)
     if armorgear["perception"] != 0:
         legProt["effects"].append(
             {
@@ -330,76 +231,49 @@ for armorgear in armorgearData:
             }
         )
     out["system"]["nestedItems"].append(legProt)
+    out["system"]["nestedItems"].append(build_mistyisle_protection(armorgear))
 
-    out["system"]["nestedItems"].append({
-        "name": "Misty Isle Protection",
-        "type": "protection",
-        "img": armorgear["img"],
-        "_id": armorgear["mistyisle"]["id"],
-        "system": {
-            "transfer": True,
-            "subType": "mistyisle",
-            "protectionBase": {
-                "blunt": armorgear["mistyisle"]["blunt"],
-                "edged": armorgear["mistyisle"]["edged"],
-                "piercing": armorgear["mistyisle"]["piercing"],
-                "fire": armorgear["mistyisle"]["fire"],
-            },
-        },
-        "ownership": {"default": 3},        
-    })
-
-
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(out, outfile, indent=2, ensure_ascii=False)
 
-with open(f"{args.dataDir}/projectilegear.yaml", "r", encoding="utf8") as infile:
-    projectilegearData = yaml.load(infile)
+def finish_armor(armorgear, out, layouts):
+    add_protections(armorgear, out, layouts)
+    add_armor_coverage(armorgear, out, layouts)
 
-for projectilegear in projectilegearData:
-    print(f"Processing Projectile Gear {projectilegear['name']}")
-    fname = projectilegear["name"] + "_" + projectilegear["id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
 
-    out = {
-        "name": projectilegear["name"],
-        "type": "projectilegear",
-        "img": projectilegear["img"],
-        "_id": projectilegear["id"],
-        "_key": "!items!" + projectilegear["id"],
-        "system": {
-            "notes": projectilegear["notes"],
-            "textReference": projectilegear["textReference"],
-            "description": projectilegear["description"],
-            "macros": projectilegear["macros"],
+ARMOR_GEAR = DocumentSpec(
+    "Armor Gear",
+    "armorgear.yaml",
+    item_template(
+        "armorgear",
+        {
+            "notes": "",
+            "textReference": "",
+            "description": Field("description"),
+            "macros": Field("macros"),
             "nestedItems": [],
             "transfer": False,
-            "subType": projectilegear["type"],
-            "abbrev": projectilegear["abbrev"],
+            "abbrev": Field("abbrev"),
             "quantity": 1,
-            "weightBase": projectilegear["weight"],
-            "valueBase": projectilegear["value"],
+            "weightBase": Field("weight"),
+            "valueBase": Field("value"),
             "isCarried": True,
             "isEquipped": False,
             "qualityBase": 0,
-            "durabilityBase": projectilegear["durability"],
-            "shortName": projectilegear["easyname"],
-            "impactBase": {
-                "numDice": 1 if projectilegear["impactDie"] > 0 else 0,
-                "die": projectilegear["impactDie"],
-                "modifier": projectilegear["impactMod"],
-                "aspect": projectilegear["aspect"],
+            "durabilityBase": Field("durability"),
+            "material": Field("material"),
+            "locations": {
+                "flexible": Field("flexloc"),
+                "rigid": Field("rigidloc"),
             },
         },
-        "effects": [],
-        "flags": projectilegear["flags"],
-        "_stats": stats,
-        "ownership": {"default": 3},
-        "folder": "ADQPHjgKsdWsJhyy",
-    }
+        effects=[],
+    ),
+    prepare=prepare_armor,
+    finish=finish_armor,
+    related_source=("anatomies.yaml", "_id", "characteristics"),
+)
 
+
+def add_projectile_effect(projectilegear, out, related):
     if projectilegear["AEID"]:
         effect = {
             "name": f"{projectilegear['easyname']} {projectilegear['type']} Traits",
@@ -455,104 +329,83 @@ for projectilegear in projectilegearData:
 
         out["effects"].append(effect)
 
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(out, outfile, indent=2, ensure_ascii=False)
-
-with open(f"{args.dataDir}/weapongear.yaml", "r", encoding="utf8") as infile:
-    weapongearData = yaml.load(infile)
-
-weapons = {}
-
-for weapongear in weapongearData:
-    weaponname = weapongear["name"]
-    weaponid = weapongear["id"]
-    print(f"Processing Weapon Gear {weaponname}")
-    fname = weapongear["name"] + "_" + weapongear["id"]
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
 
-    merge(
-        weapongear["flags"],
+PROJECTILE_GEAR = DocumentSpec(
+    "Projectile Gear",
+    "projectilegear.yaml",
+    item_template(
+        "projectilegear",
         {
-            "sohl": {
-                "legendary": {
-                    "heftBase": weapongear["heft"],
-                },
-            },
-        },
-    )
-    weapons[weaponid] = {
-        "name": weaponname,
-        "type": "weapongear",
-        "img": weapongear["img"],
-        "_id": weaponid,
-        "_key": "!items!" + weaponid,
-        "system": {
-            "notes": weapongear["notes"],
-            "textReference": weapongear["textReference"],
-            "description": weapongear["description"],
-            "macros": weapongear["macros"],
+            "notes": Field("notes"),
+            "textReference": Field("textReference"),
+            "description": Field("description"),
+            "macros": Field("macros"),
             "nestedItems": [],
             "transfer": False,
-            "abbrev": weapongear["abbrev"],
+            "subType": Field("type"),
+            "abbrev": Field("abbrev"),
             "quantity": 1,
-            "weightBase": weapongear["weight"],
-            "valueBase": weapongear["value"],
-            "lengthBase": weapongear["length"],
+            "weightBase": Field("weight"),
+            "valueBase": Field("value"),
             "isCarried": True,
             "isEquipped": False,
             "qualityBase": 0,
-            "durabilityBase": weapongear["durability"],
+            "durabilityBase": Field("durability"),
+            "shortName": Field("easyname"),
+            "impactBase": {
+                "numDice": Computed(lambda gear: 1 if gear["impactDie"] > 0 else 0),
+                "die": Field("impactDie"),
+                "modifier": Field("impactMod"),
+                "aspect": Field("aspect"),
+            },
+        },
+        effects=[],
+        folder="ADQPHjgKsdWsJhyy",
+    ),
+    finish=add_projectile_effect,
+)
+
+
+build_strike_mode = compile_template(
+    {
+        "name": Field("subDesc"),
+        "type": "meleestrikemode",
+        "img": None,  # The weapon's image
+        "_id": Field("smId"),
+        "system": {
+            "notes": "",
+            "textReference": "",
+            "description": "",
+            "macros": Field("macros"),
+            "nestedItems": [],
+            "transfer": True,
+            "subType": Field("subType"),
+            "mode": Field("subDesc"),
+            "minParts": Field("minParts"),
+            "assocSkillName": Field("assocSkill"),
+            "impactBase": {
+                "numDice": Computed(lambda weaponsm: 1 if weaponsm["die"] > 0 else 0),
+                "die": Computed(lambda weaponsm: weaponsm["die"] if weaponsm["die"] > 0 else 0),
+                "modifier": Field("modifier"),
+                "aspect": Field("aspect"),
+            },
         },
         "effects": [],
-        "flags": weapongear["flags"],
-        "_stats": stats,
+        "flags": Field("flags"),
+        "_stats": Shared(STATS),
         "ownership": {"default": 3},
-        "folder": "c0GXEU9oCZ1N3mSl",
+        "folder": None,
     }
-    weapons[weaponid]["flags"].get("legendary", {})
+)
 
+read_traits, trait_changes = compile_trait_rules(STRIKE_MODE_TRAITS)
 
-with open(f"{args.dataDir}/weapons-strike-modes.yaml", "r", encoding="utf8") as infile:
-    weaponsmData = yaml.load(infile)
 
-for weaponsm in weaponsmData:
+def build_weapon_strike_mode(weaponsm, weapon):
     smname = f"{weaponsm['name']} ({weaponsm['subDesc']})"
     print(f"Processing StrikeMode {smname}")
-    weapon = weapons[weaponsm["weaponId"]]
     subdesc = weaponsm["subDesc"]
 
-    traits = {
-        "armorReduction": weaponsm["AR"],
-        "blockMod": weaponsm["blockMod"],
-        "counterMod": weaponsm["counterMod"],
-        "meleeMod": weaponsm["meleeMod"],
-        "opponentDef": weaponsm["oppDef"],
-        "deflectTN": weaponsm["deflectTN"],
-        "entangle": weaponsm["entangle"],
-        "envelop": weaponsm["envelop"],
-        "couched": weaponsm["couched"],
-        "blockSLMod": weaponsm["blockSLMod"],
-        "cxSLMod": weaponsm["cxSLMod"],
-        "noAttack": weaponsm["noAttack"],
-        "noBlock": weaponsm["noBlock"],
-        "lowAim": weaponsm["lowAim"],
-        "impactTA": weaponsm["impTA"],
-        "long": weaponsm["long"],
-        "onlyInClose": weaponsm["onlyInClose"],
-        "shieldMod": weaponsm["shieldMod"],
-        "slow": weaponsm["slow"],
-        "thrust": weaponsm["thrust"],
-        "swung": weaponsm["swung"],
-        "halfSword": weaponsm["halfSword"],
-        "bleed": weaponsm["bleed"],
-        "twoHandLen": weaponsm["2hLength"],
-        "noStrMod": weaponsm["noStrMod"],
-        "halfImpact": weaponsm["halfImpact"],
-        "durMod": weaponsm["durabilityMod"],
-    }
-
     if weaponsm["subType"] == "legendary":
         merge(
             weaponsm["flags"],
@@ -576,35 +429,8 @@ for weaponsm in weaponsmData:
             },
         )
 
-    sm = {
-        "name": subdesc,
-        "type": "meleestrikemode",
-        "img": weapon["img"],
-        "_id": weaponsm["smId"],
-        "system": {
-            "notes": "",
-            "textReference": "",
-            "description": "",
-            "macros": weaponsm["macros"],
-            "nestedItems": [],
-            "transfer": True,
-            "subType": weaponsm["subType"],
-            "mode": subdesc,
-            "minParts": weaponsm["minParts"],
-            "assocSkillName": weaponsm["assocSkill"],
-            "impactBase": {
-                "numDice": 1 if weaponsm["die"] > 0 else 0,
-                "die": weaponsm["die"] if weaponsm["die"] > 0 else 0,
-                "modifier": weaponsm["modifier"],
-                "aspect": weaponsm["aspect"],
-            },
-        },
-        "effects": [],
-        "flags": weaponsm["flags"],
-        "_stats": stats,
-        "ownership": {"default": 3},
-        "folder": None,
-    }
+    sm = build_strike_mode(weaponsm)
+    sm["img"] = weapon["img"]
     if subdesc == "Ranged" or subdesc == "Thrown":
         projtype = weaponsm["projtype"]
         if projtype == "arrow":
@@ -644,7 +470,7 @@ for weaponsm in weaponsmData:
                     },
                 },
             )
-            
+
 
     eid = weaponsm["AEID"]
     effect = {
@@ -676,294 +502,97 @@ for weaponsm in weaponsmData:
         "_key": "!items.effects!" + sm["_id"] + "." + eid,
     }
 
-    if weaponsm["shaft"] and weaponsm["subType"] == "legendary":
-        if not "sohl" in sm["flags"]:
-            sm["flags"] = {"sohl": {"legendary": {}}}
-        sm["flags"]["sohl"]["legendary"]["zoneDie"] = 8
-        sm["system"]["impactBase"]["die"] = 6
-        sm["system"]["impactBase"]["modifier"] = 1
-        sm["system"]["impactBase"]["aspect"] = "blunt"
-        traits["slow"] = False
-        traits["thrust"] = False
-        effect["changes"].append(
-            {"key": "mod:system.$length", "mode": 2, "value": -2, "priority": None}
-        )
-    if weaponsm["pommel"] and weaponsm["subType"] == "legendary":
-        if not "sohl" in sm["flags"]:
-            sm["flags"] = {"sohl": {"legendary": {}}}
-        sm["flags"]["sohl"]["legendary"]["zoneDie"] = 4
-        sm["system"]["impactBase"]["die"] = 6
-        sm["system"]["impactBase"]["modifier"] = 0
-        sm["system"]["impactBase"]["aspect"] = "blunt"
-        effect["changes"].append(
-            {"key": "mod:system.$length", "mode": 5, "value": 1, "priority": None}
-        )
-    if weaponsm["halfSword"]:
-        if sm["system"]["impactBase"]["aspect"] == "blunt":
-            sm["system"]["impactBase"]["modifier"] = 0
-            sm["system"]["impactBase"]["die"] = 6
-        if not "sohl" in sm["flags"]:
-            sm["flags"] = {"sohl": {"legendary": {}}}
-        if sm["flags"]["sohl"]["legendary"].get("zoneDie", 0) > 4:
-            sm["flags"]["sohl"]["legendary"]["zoneDie"] = (
-                sm["flags"]["sohl"]["legendary"]["zoneDie"] - 2
-            )
-        traits["thrust"] = True
-        effect["changes"].append(
-            {"key": "mod:system.$length", "mode": 2, "value": -2, "priority": None}
-        )
-        effect["changes"].append(
-            {"key": "mod:system.$length", "mode": 4, "value": 3, "priority": None}
-        )
-        effect["changes"].append(
-            {
-                "key": "system.$traits.halfSword",
-                "mode": 5,
-                "value": "true",
-                "priority": None,
-            }
-        )
-    if traits["armorReduction"] > 0:
-        effect["changes"].append(
-            {
-                "key": "mod:system.$impact.armorReduction",
-                "mode": 2,
-                "value": traits["armorReduction"],
-                "priority": None,
-            }
-        )
-    if traits["blockMod"]:
-        effect["changes"].append(
-            {
-                "key": "mod:system.$defense.block",
-                "mode": 2,
-                "value": traits["blockMod"],
-                "priority": None,
-            }
-        )
-    if traits["counterMod"]:
-        effect["changes"].append(
-            {
-                "key": "mod:system.$defense.counterstrike",
-                "mode": 2,
-                "value": traits["counterMod"],
-                "priority": None,
-            }
-        )
-    if traits["meleeMod"]:
-        effect["changes"].append(
-            {
-                "key": "mod:system.$attack.block",
-                "mode": 2,
-                "value": traits["meleeMod"],
-                "priority": None,
-            }
-        )
-    if traits["opponentDef"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.opponentDef",
-                "mode": 2,
-                "value": traits["opponentDef"],
-                "priority": None,
-            }
-        )
-    if traits["deflectTN"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.deflectTN",
-                "mode": 5,
-                "value": traits["deflectTN"],
-                "priority": None,
-            }
-        )
-    if traits["entangle"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.entangle",
-                "mode": 5,
-                "value": "true",
-                "priority": None,
-            }
-        )
-    if traits["envelop"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.envelop",
-                "mode": 5,
-                "value": "true",
-                "priority": None,
-            }
-        )
-    if traits["couched"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.couched",
-                "mode": 5,
-                "value": traits["couched"],
-                "priority": None,
-            }
-        )
-    if traits["impactTA"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.impactTA",
-                "mode": 5,
-                "value": traits["impactTA"],
-                "priority": None,
-            }
-        )
-    if traits["long"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.long",
-                "mode": 5,
-                "value": "true",
-                "priority": None,
-            }
-        )
-    if traits["onlyInClose"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.onlyInClose",
-                "mode": 5,
-                "value": "true",
-                "priority": None,
-            }
-        )
-    if traits["shieldMod"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.shieldMod",
-                "mode": 5,
-                "value": "true",
-                "priority": None,
-            }
-        )
-    if traits["slow"]:
-        effect["changes"].append(
-            {"key": "system.$traits.slow", "mode": 5, "value": "true", "priority": None}
-        )
-    if traits["thrust"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.thrust",
-                "mode": 5,
-                "value": "true",
-                "priority": None,
-            }
-        )
-    if traits["swung"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.swung",
-                "mode": 5,
-                "value": "true",
-                "priority": None,
-            }
-        )
-    if traits["bleed"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.extraBleedRisk",
-                "mode": 5,
-                "value": "true",
-                "priority": None,
-            }
-        )
-    if traits["twoHandLen"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.twoHandLen",
-                "mode": 2,
-                "value": traits["twoHandLen"],
-                "priority": None,
-            }
-        )
-    if traits["noStrMod"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.noStrMod",
-                "mode": 5,
-                "value": "true",
-                "priority": None,
-            }
-        )
-    if traits["halfImpact"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.halfImpact",
-                "mode": 5,
-                "value": "true",
-                "priority": None,
-            }
-        )
-    if traits["durMod"]:
-        effect["changes"].append(
-            {
-                "key": "mod:system.$durability",
-                "mode": 2,
-                "value": traits["durMod"],
-                "priority": None,
-            }
-        )
-    if traits["blockSLMod"]:
-        effect["changes"].append(
-            {
-                "key": "system.$defense.block.successLevelMod",
-                "mode": 2,
-                "value": traits["blockSLMod"],
-                "priority": None,
-            }
-        )
-    if traits["cxSLMod"]:
-        effect["changes"].append(
-            {
-                "key": "system.$defense.counterstrike.successLevelMod",
-                "mode": 2,
-                "value": traits["cxSLMod"],
-                "priority": None,
-            }
-        )
-    if traits["noAttack"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.noAttack",
-                "mode": 5,
-                "value": "true",
-                "priority": None,
-            }
-        )
-    if traits["noBlock"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.noBlock",
-                "mode": 5,
-                "value": "true",
-                "priority": None,
-            }
-        )
-    if traits["lowAim"]:
-        effect["changes"].append(
-            {
-                "key": "system.$traits.lowAim",
-                "mode": 5,
-                "value": "true",
-                "priority": None,
-            }
-        )
+    traits = read_traits(weaponsm)
+    apply_rewrites(STRIKE_MODE_REWRITES, weaponsm, sm, traits, effect["changes"])
+    effect["changes"].extend(trait_changes(traits))
 
     sm["effects"].append(effect)
     sm["sort"] = (len(weapon["system"]["nestedItems"]) + 1) * 100000
-    weapon["system"]["nestedItems"].append(sm)
-
-for weaponid in weapons.keys():
-    if weaponid == None:
-        continue
-    fname = weapons[weaponid]["name"] + "_" + weaponid
-    fname = unidecode(fname)
-    fname = re.sub(r"[^0-9a-zA-Z]+", "_", fname) + ".json"
-    pname = args.outputDir + "/" + fname
-
-    with open(pname, "w", encoding="utf8") as outfile:
-        json.dump(weapons[weaponid], outfile, indent=2, ensure_ascii=False)
+    add_impact_table(sm)
+    return sm
+
+
+def prepare_weapon(weapongear):
+    merge(
+        weapongear["flags"],
+        {
+            "sohl": {
+                "legendary": {
+                    "heftBase": weapongear["heft"],
+                },
+            },
+        },
+    )
+
+
+def add_strike_modes(weapongear, out, strikeModes):
+    for weaponsm in strikeModes:
+        out["system"]["nestedItems"].append(build_weapon_strike_mode(weaponsm, out))
+
+
+WEAPON_GEAR = DocumentSpec(
+    "Weapon Gear",
+    "weapongear.yaml",
+    item_template(
+        "weapongear",
+        {
+            "notes": Field("notes"),
+            "textReference": Field("textReference"),
+            "description": Field("description"),
+            "macros": Field("macros"),
+            "nestedItems": [],
+            "transfer": False,
+            "abbrev": Field("abbrev"),
+            "quantity": 1,
+            "weightBase": Field("weight"),
+            "valueBase": Field("value"),
+            "lengthBase": Field("length"),
+            "isCarried": True,
+            "isEquipped": False,
+            "qualityBase": 0,
+            "durabilityBase": Field("durability"),
+        },
+        effects=[],
+        folder="c0GXEU9oCZ1N3mSl",
+    ),
+    prepare=prepare_weapon,
+    finish=add_strike_modes,
+    related_source=("weapons-strike-modes.yaml", "smId"),
+)
+
+
+def generate_weapon_gear(dataDir, output):
+    # A weapon document embeds its strike modes, so its digest must cover the
+    # weapon record and every strike mode record that refers to it.
+    strikeModesByWeapon = {}
+    for weaponsm in iter_yaml(f"{dataDir}/weapons-strike-modes.yaml"):
+        strikeModesByWeapon.setdefault(weaponsm["weaponId"], []).append(weaponsm)
+
+    WEAPON_GEAR.generate(
+        dataDir, output, related=lambda weapongear: strikeModesByWeapon.pop(weapongear["id"], [])
+    )
+
+    if strikeModesByWeapon:
+        raise KeyError(f"Strike modes refer to unknown weapons: {list(strikeModesByWeapon)}")
+
+
+def generate(dataDir, output):
+    """
+    Generates the possessions pack. Armor coverage is resolved against the
+    body location layouts of the anatomies of the characteristics pack,
+    read from its data files rather than its generated documents, so that
+    the two packs can be built side by side.
+    """
+    with phase("load"):
+        layouts = anatomy_layouts(iter_yaml(f"{sibling_data_dir(dataDir, 'characteristics')}/anatomies.yaml"))
+    MISC_GEAR.generate(dataDir, output)
+    CONTAINER_GEAR.generate(dataDir, output)
+    CONCOCTION_GEAR.generate(dataDir, output)
+    FOLDER.generate(dataDir, output)
+    ARMOR_GEAR.generate(dataDir, output, related=lambda armorgear: layouts)
+    PROJECTILE_GEAR.generate(dataDir, output)
+    generate_weapon_gear(dataDir, output)
+
+
+if __name__ == "__main__":
+    run_generator(generate)
@@ -0,0 +1 @@
+"""Shared helpers for the build-packs generator scripts."""
@@ -0,0 +1,96 @@
+import os
+import tempfile
+from packlib.jsonenc import loads
+
+BUNDLE_SUFFIX = ".ndjson"
+INDEX_SUFFIX = ".index"
+
+
+def bundle_path(output_dir):
+    """Returns the path of the bundle written alongside a pack's build directory."""
+    return os.path.normpath(output_dir) + BUNDLE_SUFFIX
+
+
+def index_path(path):
+    """Returns the path of the file listing the document file names of a bundle."""
+    return path + INDEX_SUFFIX
+
+
+def read_bundle_lines(path):
+    """
+    Returns a dict mapping each document's file name to its (undecoded)
+    line in the bundle at path, as bytes, or an empty dict if there is no
+    usable bundle.
+    """
+    try:
+        with open(index_path(path), "r", encoding="utf8") as infile:
+            fnames = infile.read().splitlines()
+        with open(path, "rb") as infile:
+            lines = infile.read().splitlines()
+    except OSError:
+        return {}
+    if len(fnames) != len(lines):
+        return {}
+    return dict(zip(fnames, lines))
+
+
+def read_bundle(path):
+    """Yields the documents of the bundle at path, in order."""
+    with open(path, "rb") as infile:
+        for line in infile:
+            if line.strip():
+                yield loads(line)
+
+
+def read_pack_documents(build_dir, pack):
+    """
+    Returns the generated documents of a pack in build_dir, from its bundle
+    if it has one, from its JSON files otherwise.
+    """
+    bundle = bundle_path(os.path.join(build_dir, pack))
+    if os.path.isfile(bundle):
+        return list(read_bundle(bundle))
+    pack_dir = os.path.join(build_dir, pack)
+    if not os.path.isdir(pack_dir):
+        raise FileNotFoundError(f"No generated documents for {pack} in {build_dir}")
+    documents = []
+    for fname in sorted(os.listdir(pack_dir)):
+        if fname.endswith(".json") and not fname.startswith("."):
+            with open(os.path.join(pack_dir, fname), "rb") as infile:
+                documents.append(loads(infile.read()))
+    return documents
+
+
+def unbundle(path, dest):
+    """
+    Writes each document of the bundle at path to its own JSON file in dest,
+    named as it would have been by a per-document build. Returns the number
+    of documents written.
+    """
+    lines = read_bundle_lines(path)
+    if not lines:
+        # No index: fall back to naming documents by _id
+        lines = {f"{loads(line)['_id']}.json": line for line in _lines(path)}
+    os.makedirs(dest, exist_ok=True)
+    for fname, line in lines.items():
+        with open(os.path.join(dest, fname), "wb") as outfile:
+            outfile.write(line)
+    return len(lines)
+
+
+def _lines(path):
+    with open(path, "rb") as infile:
+        return [line for line in infile.read().splitlines() if line.strip()]
+
+
+def compile_bundle(pack, path, compile_dir):
+    """
+    Feeds the bundle at path to compile_dir(pack, source_dir), which compiles
+    a directory of documents. The Foundry CLI only reads directories, so the
+    documents are unpacked to a scratch directory, kept in memory-backed
+    storage where available, and removed afterwards.
+    """
+    scratch = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    with tempfile.TemporaryDirectory(prefix=f"{pack}-", dir=scratch) as tmpdir:
+        unbundle(path, tmpdir)
+        compile_dir(pack, tmpdir)
@@ -0,0 +1,56 @@
+class AmbiguousItemError(Exception):
+    """Exception raised when a lookup matches more than one catalogue item."""
+    pass
+
+
+class ItemCatalogue:
+    """
+    Index over the generated item documents (folders excluded), built once, for resolving the
+    items embedded in actors by (name, type), _id or _key in constant time.
+
+    Keys that are shared by more than one document are remembered rather
+    than silently resolved to whichever document happened to be read first;
+    looking one of them up raises AmbiguousItemError.
+    """
+
+    def __init__(self, items):
+        self.by_name_type = {}
+        self.by_id = {}
+        self.by_key = {}
+        self.ambiguous = {"name_type": {}, "id": {}, "key": {}}
+        for item in items:
+            if str(item.get("_key", "")).startswith("!folders!"):
+                continue
+            self._index("name_type", self.by_name_type, (item.get("name"), item.get("type")), item)
+            self._index("id", self.by_id, item.get("_id"), item)
+            self._index("key", self.by_key, item.get("_key"), item)
+
+    def _index(self, kind, index, key, item):
+        if key is None or key == (None, None):
+            return
+        if key in index:
+            self.ambiguous[kind].setdefault(key, [index[key]]).append(item)
+        else:
+            index[key] = item
+
+    def _lookup(self, kind, index, key):
+        if key in self.ambiguous[kind]:
+            matches = self.ambiguous[kind][key]
+            raise AmbiguousItemError(
+                f"{len(matches)} catalogue items match {kind} {key!r}"
+            )
+        return index.get(key)
+
+    def get(self, name, type):
+        """Returns the item with the given name and type, or None."""
+        return self._lookup("name_type", self.by_name_type, (name, type))
+
+    def get_by_id(self, id):
+        return self._lookup("id", self.by_id, id)
+
+    def get_by_key(self, key):
+        return self._lookup("key", self.by_key, key)
+
+    def duplicates(self):
+        """Returns the (name, type) pairs shared by more than one item."""
+        return sorted(self.ambiguous["name_type"], key=str)
@@ -0,0 +1,566 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class SimulationError(Exception):
+    """Exception raised when a combat simulation cannot be set up."""
+    pass
+
+
+# Success levels, in the order used to index the combat tables
+SUCCESS_LEVELS = ("cf", "mf", "ms", "cs")
+
+# Outcome flags of the combat tables
+FLAGS = ("atkFumble", "defFumble", "atkStumble", "defStumble", "dta", "block", "miss", "wild")
+
+# The legendary combat tables of module/legendary.js, by defense: for each
+# "attack:defense" success levels (or attack level alone, when the defender
+# ignores the attack), the outcome flags that are set, the attacker's impact
+# dice and the defender's impact dice.
+MELEE_TABLE = {
+    "block": {
+        "cf:cf": ("atkFumble defFumble", 0, 0),
+        "mf:cf": ("defFumble", 0, 0),
+        "ms:cf": ("", 2, 0),
+        "cs:cf": ("", 3, 0),
+        "cf:mf": ("atkFumble", 0, 0),
+        "mf:mf": ("block", 0, 0),
+        "ms:mf": ("", 1, 0),
+        "cs:mf": ("", 2, 0),
+        "cf:ms": ("dta", 0, 0),
+        "mf:ms": ("dta", 0, 0),
+        "ms:ms": ("block", 0, 0),
+        "cs:ms": ("", 1, 0),
+        "cf:cs": ("dta", 0, 0),
+        "mf:cs": ("dta", 0, 0),
+        "ms:cs": ("dta", 0, 0),
+        "cs:cs": ("block", 0, 0),
+    },
+    "counterstrike": {
+        "cf:cf": ("atkFumble defFumble", 0, 0),
+        "mf:cf": ("defFumble", 0, 0),
+        "ms:cf": ("", 3, 0),
+        "cs:cf": ("", 4, 0),
+        "cf:mf": ("atkFumble", 0, 0),
+        "mf:mf": ("block", 0, 0),
+        "ms:mf": ("", 2, 0),
+        "cs:mf": ("", 3, 0),
+        "cf:ms": ("", 0, 2),
+        "mf:ms": ("", 0, 1),
+        "ms:ms": ("", 1, 1),
+        "cs:ms": ("", 1, 0),
+        "cf:cs": ("", 0, 3),
+        "mf:cs": ("", 0, 2),
+        "ms:cs": ("", 0, 1),
+        "cs:cs": ("", 2, 2),
+    },
+    "dodge": {
+        "cf:cf": ("atkStumble defStumble", 0, 0),
+        "mf:cf": ("defStumble", 0, 0),
+        "ms:cf": ("", 2, 0),
+        "cs:cf": ("", 3, 0),
+        "cf:mf": ("atkStumble", 0, 0),
+        "mf:mf": ("miss", 0, 0),
+        "ms:mf": ("", 1, 0),
+        "cs:mf": ("", 2, 0),
+        "cf:ms": ("dta", 0, 0),
+        "mf:ms": ("miss", 0, 0),
+        "ms:ms": ("miss", 0, 0),
+        "cs:ms": ("", 1, 0),
+        "cf:cs": ("dta", 0, 0),
+        "mf:cs": ("dta", 0, 0),
+        "ms:cs": ("miss", 0, 0),
+        "cs:cs": ("miss", 0, 0),
+    },
+    "ignore": {
+        "cf": ("dta", 0, 0),
+        "mf": ("", 1, 0),
+        "ms": ("", 3, 0),
+        "cs": ("", 4, 0),
+    },
+}
+
+MISSILE_TABLE = {
+    "block": {
+        "cf:cf": ("wild", 0, 0),
+        "mf:cf": ("miss", 0, 0),
+        "ms:cf": ("", 2, 0),
+        "cs:cf": ("", 3, 0),
+        "cf:mf": ("wild", 0, 0),
+        "mf:mf": ("miss", 0, 0),
+        "ms:mf": ("", 1, 0),
+        "cs:mf": ("", 2, 0),
+        "cf:ms": ("wild", 0, 0),
+        "mf:ms": ("miss", 0, 0),
+        "ms:ms": ("block", 0, 0),
+        "cs:ms": ("", 1, 0),
+        "cf:cs": ("wild", 0, 0),
+        "mf:cs": ("miss", 0, 0),
+        "ms:cs": ("block", 0, 0),
+        "cs:cs": ("block", 0, 0),
+    },
+    "dodge": {
+        "cf:cf": ("wild", 0, 0),
+        "mf:cf": ("miss", 0, 0),
+        "ms:cf": ("", 2, 0),
+        "cs:cf": ("", 3, 0),
+        "cf:mf": ("wild", 0, 0),
+        "mf:mf": ("miss", 0, 0),
+        "ms:mf": ("", 1, 0),
+        "cs:mf": ("", 2, 0),
+        "cf:ms": ("wild", 0, 0),
+        "mf:ms": ("miss", 0, 0),
+        "ms:ms": ("miss", 0, 0),
+        "cs:ms": ("", 1, 0),
+        "cf:cs": ("wild", 0, 0),
+        "mf:cs": ("miss", 0, 0),
+        "ms:cs": ("miss", 0, 0),
+        "cs:cs": ("miss", 0, 0),
+    },
+    "ignore": {
+        "cf": ("wild", 0, 0),
+        "mf": ("miss", 0, 0),
+        "ms": ("", 2, 0),
+        "cs": ("", 3, 0),
+    },
+}
+
+COMBAT_TABLES = {"meleestrikemode": MELEE_TABLE, "missilestrikemode": MISSILE_TABLE}
+DEFENSES = tuple(MELEE_TABLE)
+
+# Effect change keys of the strike mode traits the simulation uses, and the
+# strike mode field each feeds (see packlib.traitrules)
+TRAIT_KEYS = {
+    "mod:system.$attack.block": "attackMod",
+    "mod:system.$defense.block": "blockMod",
+    "mod:system.$defense.counterstrike": "counterMod",
+    "system.$traits.opponentDef": "opponentDef",
+    "mod:system.$impact.armorReduction": "armorReduction",
+    "system.$defense.block.successLevelMod": "blockSLMod",
+    "system.$defense.counterstrike.successLevelMod": "cxSLMod",
+    "system.$traits.noAttack": "noAttack",
+    "system.$traits.noBlock": "noBlock",
+}
+
+# Mastery level targets are kept within these bounds, as by
+# MasteryLevelModifier
+MIN_TARGET = 5
+MAX_TARGET = 95
+
+UNARMORED = "(none)"
+
+# Traits that are flags rather than numbers
+BOOLEAN_TRAITS = {"noAttack", "noBlock"}
+
+
+def require_numpy():
+    if np is None:
+        raise SimulationError("The combat simulator requires numpy (pip install numpy)")
+
+
+def _number(value, default=0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _impact(profile, impact):
+    profile.update(
+        {
+            "numDice": int(_number(impact.get("numDice"))),
+            "die": int(_number(impact.get("die"))),
+            "modifier": int(_number(impact.get("modifier"))),
+            "aspect": impact.get("aspect") or "blunt",
+        }
+    )
+
+
+def _apply_traits(profile, effects):
+    for effect in effects:
+        for change in effect.get("changes", []):
+            field = TRAIT_KEYS.get(change["key"])
+            if field is None:
+                continue
+            if field in BOOLEAN_TRAITS:
+                profile[field] = str(change["value"]).lower() == "true"
+                continue
+            value = _number(change["value"], None)
+            if value is None:
+                # Such as the projectile bleed, which shares the armor
+                # reduction key
+                continue
+            if int(change["mode"]) == 2:
+                profile[field] += value
+            else:
+                profile[field] = value
+
+
+def strike_mode_profile(weapon, sm, projectile=None):
+    """
+    Returns what the simulation needs of a legendary strike mode of weapon:
+    its impact, zone die and the traits of its effect changes. A missile
+    strike mode shooting projectile takes the projectile's impact dice and
+    aspect, and its modifier unless that is -1 (none), and the traits of
+    its effects, as LgndWeaponGearItemData.setupVirtualItems does.
+    """
+    profile = {
+        "weapon": weapon["name"],
+        "mode": f"{sm['name']}, {projectile['name']}" if projectile else sm["name"],
+        "type": sm["type"],
+        "zoneDie": sm.get("flags", {}).get("sohl", {}).get("legendary", {}).get("zoneDie") or 0,
+    }
+    _impact(profile, sm["system"]["impactBase"])
+    profile.update({field: 0 for field in TRAIT_KEYS.values()})
+    effects = list(sm.get("effects", []))
+    if projectile:
+        impact = projectile["system"]["impactBase"]
+        modifier = profile["modifier"]
+        _impact(profile, impact)
+        if profile["modifier"] < 0:
+            profile["modifier"] = modifier
+        effects += projectile.get("effects", [])
+    _apply_traits(profile, effects)
+    return profile
+
+
+def weapon_strike_modes(documents):
+    """
+    Yields the profile of each legendary melee and missile strike mode of
+    the weapons. A missile strike mode with a projectile type yields one
+    profile per projectilegear of that type, and none without any.
+    """
+    projectiles = {}
+    for doc in documents:
+        if doc.get("type") == "projectilegear":
+            projectiles.setdefault(doc["system"].get("subType"), []).append(doc)
+    for doc in documents:
+        if doc.get("type") != "weapongear":
+            continue
+        for sm in doc["system"].get("nestedItems", []):
+            if sm["type"] not in COMBAT_TABLES or sm["system"].get("subType") != "legendary":
+                continue
+            projectileType = sm["system"].get("projectileType") or "none"
+            if sm["type"] == "missilestrikemode" and projectileType != "none":
+                for projectile in projectiles.get(projectileType, []):
+                    yield strike_mode_profile(doc, sm, projectile)
+            else:
+                yield strike_mode_profile(doc, sm)
+
+
+def armor_profiles(documents):
+    """
+    Returns the profile of each armor in documents: its legendary
+    protection by aspect and the body locations it covers.
+    """
+    armors = []
+    for doc in documents:
+        if doc.get("type") != "armorgear":
+            continue
+        protection = {}
+        for item in doc["system"].get("nestedItems", []):
+            if item["type"] == "protection" and item["system"].get("subType") == "legendary":
+                protection = item["system"]["protectionBase"]
+        locations = doc["system"].get("locations", {})
+        armors.append(
+            {
+                "name": doc["name"],
+                "protection": protection,
+                "locations": set(locations.get("flexible", [])) | set(locations.get("rigid", [])),
+            }
+        )
+    return armors
+
+
+def find_anatomy(documents, name):
+    for doc in documents:
+        if doc.get("type") == "anatomy" and doc["name"] == name:
+            return doc
+    raise SimulationError(f"No anatomy named {name}")
+
+
+class HitLocations:
+    """
+    The body locations of an anatomy, and its legendary hit tables as one
+    array: zone z's cumulative probabilities shifted by z - 1, so that a
+    strike to zone z with roll r in [0, 1) hits the first entry above
+    z - 1 + r, found by one binary search for all strikes at once.
+    """
+
+    def __init__(self, anatomy):
+        tables = anatomy.get("flags", {}).get("sohl", {}).get("legendary", {}).get("hitTables")
+        if not tables:
+            raise SimulationError(f"Anatomy {anatomy['name']} has no hit tables")
+        self.names = sorted({name for table in tables.values() for name in table["names"]})
+        # Index of "no location", where protection is 0
+        self.none = len(self.names)
+        index = {name: i for i, name in enumerate(self.names)}
+        self.maxZone = max(int(zone) for zone in tables)
+        bounds, locations = [], []
+        for zone in range(1, self.maxZone + 1):
+            table = tables.get(str(zone))
+            if table and table["cumulative"]:
+                bounds += [zone - 1 + c for c in table["cumulative"]]
+                locations += [index[name] for name in table["names"]]
+            else:
+                bounds.append(zone)
+                locations.append(self.none)
+        self.bounds = np.asarray(bounds + [np.inf], dtype=np.float64)
+        self.locations = np.asarray(locations + [self.none], dtype=np.intp)
+
+    def roll(self, rng, zoneDie, n):
+        """
+        Returns the index of the location hit by each of n strikes with
+        zoneDie, or self.none for a zone without locations. A strike mode
+        without a zone die, such as a missile, can hit any zone alike.
+        """
+        zones = rng.integers(0, zoneDie or self.maxZone, size=n)
+        found = np.searchsorted(self.bounds, zones + rng.random(n), side="right")
+        return self.locations[found]
+
+    def protection(self, armor, aspect):
+        """
+        Returns the protection of armor against aspect at each location,
+        indexed as names, and 0 at index self.none (no location).
+        """
+        value = armor["protection"].get(aspect, 0) if armor else 0
+        covered = [value if armor and name in armor["locations"] else 0 for name in self.names]
+        return np.asarray(covered + [0], dtype=np.int64)
+
+
+def compile_table(table, defense):
+    """
+    Returns the combat table of a defense as arrays indexed by attack level
+    * 4 + defense level: the outcome flags, attacker and defender dice.
+    """
+    flags = np.zeros((16, len(FLAGS)), dtype=bool)
+    atkDice = np.zeros(16, dtype=np.int64)
+    defDice = np.zeros(16, dtype=np.int64)
+    for key, (names, atk, dfn) in table[defense].items():
+        levels = [SUCCESS_LEVELS.index(level) for level in key.split(":")]
+        if len(levels) == 1:
+            cells = [levels[0] * 4 + d for d in range(4)]
+        else:
+            cells = [levels[0] * 4 + levels[1]]
+        for cell in cells:
+            for name in names.split():
+                flags[cell, FLAGS.index(name)] = True
+            atkDice[cell] = atk
+            defDice[cell] = dfn
+    return flags, atkDice, defDice
+
+
+def roll_levels(rng, target, n, levelMod=0):
+    """
+    Returns the success level index (into SUCCESS_LEVELS) of n d100 tests
+    against target: a success at or under the target, critical on a roll
+    ending in 5 or 0.
+    """
+    target = min(max(int(target), MIN_TARGET), MAX_TARGET)
+    rolls = rng.integers(1, 101, size=n)
+    success = rolls <= target
+    critical = rolls % 5 == 0
+    levels = np.where(success, np.where(critical, 3, 2), np.where(critical, 0, 1))
+    if levelMod:
+        levels = np.clip(levels + int(levelMod), 0, 3)
+    return levels
+
+
+def roll_impact(rng, profile, dice):
+    """Returns the impact of each strike, rolling the strike mode's dice dice times, plus its modifier."""
+    n = len(dice)
+    impact = np.zeros(n, dtype=np.int64)
+    count = dice * profile["numDice"]
+    most = int(count.max()) if n else 0
+    if profile["die"] > 0 and most:
+        faces = rng.integers(1, profile["die"] + 1, size=(n, most))
+        faces[np.arange(most) >= count[:, None]] = 0
+        impact += faces.sum(axis=1)
+    impact += profile["modifier"]
+    return np.where(dice > 0, np.maximum(impact, 0), 0)
+
+
+def _joint(impact, hit, hits, width):
+    """
+    Returns the histogram of the (impact, location) pairs of the hits, an
+    array indexed by impact and location, of width locations.
+    """
+    counts = np.bincount(impact[hits] * width + hit[hits])
+    counts = np.pad(counts, (0, -len(counts) % width))
+    return counts.reshape(-1, width)
+
+
+def _add(a, b):
+    """Returns the sum of two histograms, indexed from 0 along the first axis."""
+    if len(a) < len(b):
+        a, b = b, a
+    a = a.copy()
+    a[: len(b)] += b
+    return a
+
+
+def simulate_batch(rng, attacker, defender, locations, defense, n, attackML, defenseML):
+    """
+    Simulates n exchanges of the strike mode of attacker against defender,
+    and returns their outcomes, which do not depend on armor: the count of
+    each outcome flag and of the attacker's and defender's hits, and the
+    histograms of the impact and location of those hits.
+    """
+    flags, atkDice, defDice = compile_table(COMBAT_TABLES[attacker["type"]], defense)
+    attack = roll_levels(rng, attackML + attacker["attackMod"], n)
+    if defense == "ignore":
+        cells = attack * 4
+    else:
+        target = defenseML + attacker["opponentDef"]
+        levelMod = 0
+        if defense == "block":
+            target += defender["blockMod"]
+            levelMod = defender["blockSLMod"]
+        elif defense == "counterstrike":
+            target += defender["counterMod"]
+            levelMod = defender["cxSLMod"]
+        cells = attack * 4 + roll_levels(rng, target, n, levelMod)
+
+    dice = atkDice[cells]
+    counterDice = defDice[cells]
+    attackHits = dice > 0
+    counterHits = counterDice > 0
+    width = locations.none + 1
+    counts = dict(zip(FLAGS, (np.bincount(cells, minlength=16) @ flags.astype(np.int64)).tolist()))
+    counts["attackHit"] = int(attackHits.sum())
+    counts["counterHit"] = int(counterHits.sum())
+    return {
+        "counts": counts,
+        "impact": _joint(
+            roll_impact(rng, attacker, dice),
+            locations.roll(rng, attacker["zoneDie"], n),
+            attackHits,
+            width,
+        ),
+        "counterImpact": _joint(
+            roll_impact(rng, defender, counterDice),
+            locations.roll(rng, defender["zoneDie"], n),
+            counterHits,
+            width,
+        ),
+    }
+
+
+def through_armor(joint, protections, reduction):
+    """
+    Returns, for each armor, the histogram of the impact getting through
+    it, from joint, the histogram of the impact and location of the hits,
+    and protections, the protection of each armor at each location (as
+    returned by HitLocations.protection), less reduction.
+    """
+    impacts, width = joint.shape
+    reduced = np.maximum(protections - int(reduction), 0)
+    through = np.maximum(np.arange(impacts)[None, :, None] - reduced[:, None, :], 0)
+    rows = np.arange(len(protections))[:, None, None] * impacts
+    counts = np.bincount(
+        (rows + through).ravel(),
+        weights=np.broadcast_to(joint, through.shape).ravel(),
+        minlength=len(protections) * impacts,
+    )
+    return np.rint(counts).astype(np.int64).reshape(len(protections), impacts)
+
+
+def simulate(
+    profile,
+    armors,
+    locations,
+    defense="block",
+    exchanges=1000000,
+    attackML=70,
+    defenseML=70,
+    batch=1000000,
+    rng=None,
+    defender=None,
+):
+    """
+    Simulates exchanges attacks with the strike mode of profile against
+    defender (by default, one wielding the same strike mode), in batches of
+    batch exchanges, and returns the result of each pairing with armors
+    (None: unarmored). The defender's strike mode gives the block and
+    counterstrike modifiers and the counterstrike impact; both combatants
+    wear the armor of the pairing. The same exchanges are scored against
+    every armor, so that the pairings differ by armor alone.
+    """
+    require_numpy()
+    rng = rng or np.random.default_rng()
+    defender = defender or profile
+    totals = None
+    remaining = exchanges
+    while remaining > 0:
+        n = min(batch, remaining)
+        outcome = simulate_batch(rng, profile, defender, locations, defense, n, attackML, defenseML)
+        if totals is None:
+            totals = outcome
+        else:
+            for name, count in outcome["counts"].items():
+                totals["counts"][name] += count
+            for key in ("impact", "counterImpact"):
+                totals[key] = _add(totals[key], outcome[key])
+        remaining -= n
+
+    impact = through_armor(
+        totals["impact"],
+        np.stack([locations.protection(armor, profile["aspect"]) for armor in armors]),
+        profile["armorReduction"],
+    )
+    counterImpact = through_armor(
+        totals["counterImpact"],
+        np.stack([locations.protection(armor, defender["aspect"]) for armor in armors]),
+        defender["armorReduction"],
+    )
+    return [
+        {
+            "weapon": profile["weapon"],
+            "mode": profile["mode"],
+            "defender": f"{defender['weapon']} ({defender['mode']})",
+            "armor": armor["name"] if armor else UNARMORED,
+            "defense": defense,
+            "exchanges": exchanges,
+            "counts": dict(totals["counts"]),
+            # Histograms of the impact getting through armor, by value
+            "impact": impact[i],
+            "counterImpact": counterImpact[i],
+        }
+        for i, armor in enumerate(armors)
+    ]
+
+
+def _impact_summary(histogram, hits):
+    if not hits:
+        return {"mean": 0, "p50": 0, "p90": 0, "penetrating": 0}
+    values = np.arange(len(histogram))
+    cumulative = np.cumsum(histogram)
+    return {
+        "mean": round(float((values * histogram).sum()) / hits, 3),
+        "p50": int(np.searchsorted(cumulative, 0.5 * hits)),
+        "p90": int(np.searchsorted(cumulative, 0.9 * hits)),
+        "penetrating": round(1 - float(histogram[0]) / hits, 4),
+    }
+
+
+def summarize(result):
+    """
+    Returns the outcome distribution of a simulation result: the fraction
+    of exchanges with each outcome, and the impact that got through armor
+    on the attacker's and the defender's hits.
+    """
+    n = result["exchanges"]
+    counts = result["counts"]
+    return {
+        "weapon": result["weapon"],
+        "mode": result["mode"],
+        "defender": result["defender"],
+        "armor": result["armor"],
+        "defense": result["defense"],
+        "exchanges": n,
+        "outcomes": {name: round(count / n, 4) for name, count in counts.items()},
+        "impact": _impact_summary(result["impact"], counts["attackHit"]),
+        "counterImpact": _impact_summary(result["counterImpact"], counts["counterHit"]),
+    }
@@ -0,0 +1,133 @@
+import os
+from packlib.jsonenc import dumps, loads
+
+try:
+    import plyvel
+except ImportError:
+    plyvel = None
+
+# Embedded collections of each document collection, as stored by Foundry:
+# every embedded document gets its own key, and the parent keeps only the
+# list of their ids (a single id for singleton embeds such as token deltas).
+HIERARCHY = {
+    "actors": {"items": [], "effects": []},
+    "cards": {"cards": []},
+    "combats": {"combatants": []},
+    "delta": {"items": [], "effects": []},
+    "items": {"effects": []},
+    "journal": {"pages": []},
+    "playlists": {"sounds": []},
+    "regions": {"behaviors": []},
+    "tables": {"results": []},
+    "tokens": {"delta": {}},
+    "scenes": {
+        "drawings": [],
+        "tokens": [],
+        "lights": [],
+        "notes": [],
+        "regions": [],
+        "sounds": [],
+        "templates": [],
+        "tiles": [],
+        "walls": [],
+    },
+}
+
+
+class CompendiumError(Exception):
+    """Exception raised when a compendium pack cannot be written or read."""
+    pass
+
+
+def _require_plyvel():
+    if plyvel is None:
+        raise CompendiumError(
+            "Writing compendium packs natively requires plyvel (pip install plyvel)"
+        )
+
+
+def _js_numbers(value):
+    # JSON.stringify writes 1.0 as 1; match it so values are byte-identical
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {k: _js_numbers(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_js_numbers(v) for v in value]
+    return value
+
+
+def encode_value(value):
+    return dumps(_js_numbers(value))
+
+
+def _embedded_key(parent_key, name, doc):
+    collection, ids = parent_key[1:].split("!", 1)
+    return f"!{collection}.{name}!{ids}.{doc['_id']}"
+
+
+def pack_entries(doc, key=None):
+    """
+    Yields the (key, value) pairs stored for a document with a _key such as
+    "!items!<id>": the document itself, with its embedded documents replaced
+    by their ids, followed by each embedded document under its own key.
+    """
+    key = key or doc.get("_key")
+    if not key or not key.startswith("!"):
+        raise CompendiumError(f"Document {doc.get('_id')} has no valid _key")
+    collection = key[1:].split("!", 1)[0].rsplit(".", 1)[-1]
+    value = {k: v for k, v in doc.items() if k != "_key"}
+    embedded = []
+    for name, kind in HIERARCHY.get(collection, {}).items():
+        children = value.get(name)
+        if isinstance(kind, list) and isinstance(children, list):
+            value[name] = [child["_id"] for child in children]
+            embedded.extend((name, child) for child in children)
+        elif isinstance(kind, dict) and isinstance(children, dict):
+            value[name] = children["_id"]
+            embedded.append((name, children))
+    yield key, value
+    for name, child in embedded:
+        yield from pack_entries(child, _embedded_key(key, name, child))
+
+
+def write_pack(path, documents):
+    """
+    Writes documents to the LevelDB compendium pack at path, as
+    `fvtt package pack` does: entries are written in a single batch, entries
+    of a previous build that are no longer generated are deleted, and the
+    database is compacted. Returns the number of entries written.
+    """
+    _require_plyvel()
+    os.makedirs(path, exist_ok=True)
+    db = plyvel.DB(path, create_if_missing=True)
+    try:
+        seen = set()
+        with db.write_batch(transaction=True) as batch:
+            for doc in documents:
+                for key, value in pack_entries(doc):
+                    bkey = key.encode("utf8")
+                    seen.add(bkey)
+                    batch.put(bkey, encode_value(value))
+            for bkey in db.iterator(include_value=False):
+                if bkey not in seen:
+                    batch.delete(bkey)
+        db.compact_range()
+    finally:
+        db.close()
+    return len(seen)
+
+
+def read_pack(path):
+    """Returns a dict mapping each key of the compendium pack at path to its decoded value."""
+    _require_plyvel()
+    if not os.path.isfile(os.path.join(path, "CURRENT")):
+        raise CompendiumError(f"{path} is not a LevelDB compendium pack")
+    db = plyvel.DB(path)
+    try:
+        return {
+            key.decode("utf8"): loads(value)
+            for key, value in db.iterator()
+        }
+    finally:
+        db.close()
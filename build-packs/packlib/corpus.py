@@ -0,0 +1,92 @@
+import copy
+import hashlib
+import os
+import shutil
+import yaml
+from packlib.yamlio import FastLoader
+
+_ID_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+# Data files multiplied in a synthetic corpus, with the paths of the ids
+# each copy of a record gets afresh and of the names it is renamed by.
+# Strike modes refer to their weapon by id and name, which are derived the
+# same way as the weapon's own, so they follow their weapon's copy.
+SCALED_FILES = {
+    ("possessions", "weapongear.yaml"): {
+        "ids": [("id",)],
+        "names": [("name",)],
+    },
+    ("possessions", "weapons-strike-modes.yaml"): {
+        "ids": [("weaponId",), ("smId",), ("AEID",)],
+        "names": [("name",)],
+    },
+    ("possessions", "armorgear.yaml"): {
+        "ids": [
+            ("id",),
+            ("encumbranceEffectId",),
+            ("perceptionSkillEffectId",),
+            ("perceptionTraitEffectId",),
+            ("legendary", "id"),
+            ("mistyisle", "id"),
+        ],
+        "names": [("name",)],
+    },
+    ("characters", "characters.yaml"): {
+        "ids": [("_id",)],
+        "names": [("name",), ("prototypeToken", "name")],
+    },
+}
+
+
+def copy_id(id, n):
+    """Returns the id of copy n (1 and up) of the record with the given id."""
+    digest = hashlib.sha256(f"{id}:{n}".encode("utf8")).digest()
+    return "".join(_ID_CHARS[b % len(_ID_CHARS)] for b in digest[:16])
+
+
+def _rewrite(rec, path, func):
+    *parents, name = path
+    for key in parents:
+        rec = rec.get(key) if isinstance(rec, dict) else None
+    if isinstance(rec, dict) and rec.get(name):
+        rec[name] = func(rec[name])
+
+
+def scale_records(records, factor, ids=(), names=()):
+    """
+    Returns records followed by factor - 1 copies of them. Each copy gets
+    new ids at the given paths and has " #<n>" appended to its names, so
+    that every generated document has its own file name and key.
+    """
+    scaled = list(records)
+    for n in range(1, factor):
+        for rec in records:
+            dup = copy.deepcopy(rec)
+            for path in ids:
+                _rewrite(dup, path, lambda id: copy_id(id, n))
+            for path in names:
+                _rewrite(dup, path, lambda name: f"{name} #{n + 1}")
+            scaled.append(dup)
+    return scaled
+
+
+def build_corpus(packs_base, dest, factor):
+    """
+    Copies the data and unique documents of every pack in packs_base to
+    dest, with the files in SCALED_FILES multiplied by factor. Returns dest,
+    which can then be used in place of packs_base.
+    """
+    for pack in sorted(os.listdir(packs_base)):
+        for sub in ("data", "unique"):
+            src = os.path.join(packs_base, pack, sub)
+            if os.path.isdir(src):
+                shutil.copytree(src, os.path.join(dest, pack, sub), dirs_exist_ok=True)
+    if factor > 1:
+        for (pack, fname), fields in SCALED_FILES.items():
+            path = os.path.join(dest, pack, "data", fname)
+            with open(path, "r", encoding="utf8") as infile:
+                records = yaml.load(infile, Loader=FastLoader) or []
+            records = scale_records(records, factor, fields["ids"], fields["names"])
+            with open(path, "w", encoding="utf8") as outfile:
+                yaml.safe_dump(records, outfile, allow_unicode=True, sort_keys=False)
+    return dest
@@ -0,0 +1,84 @@
+from packlib.hitlocations import location_layout
+
+# Bits in each word of a coverage mask, so that every word is exact as a
+# JSON number and fits JavaScript's 32-bit bitwise operators
+WORD_BITS = 32
+
+
+class CoverageError(ValueError):
+    """Exception raised when an armor covers a body location no anatomy has."""
+    pass
+
+
+def anatomy_layouts(anatomies):
+    """
+    Returns the coverage bit layout of each of anatomies, records of
+    anatomies.yaml: its _id, its name and, in locationBits, the names of
+    its body locations in bit order. Armor coverage depends on these alone,
+    not on the rest of the anatomies.
+    """
+    return [
+        {"_id": anatomy["_id"], "name": anatomy["name"], "locationBits": location_layout(anatomy)}
+        for anatomy in anatomies
+    ]
+
+
+def coverage_mask(names, layout):
+    """
+    Returns the mask of the body locations named by names in layout, a list
+    of WORD_BITS-bit words, lowest bits first, with trailing zero words
+    dropped. Names layout does not have are left out.
+    """
+    words = [0] * ((len(layout) + WORD_BITS - 1) // WORD_BITS)
+    for name in names:
+        bit = layout.get(name)
+        if bit is not None:
+            words[bit // WORD_BITS] |= 1 << (bit % WORD_BITS)
+    while words and not words[-1]:
+        words.pop()
+    return words
+
+
+def locations_hash(flexible, rigid):
+    """
+    Returns a 32-bit FNV-1a hash of the flexible and rigid location names of
+    an armor, over the UTF-16 code units of each list joined with newlines,
+    the two separated by a NUL, as Utility.locationsHash computes it in the
+    game.
+    """
+    units = ("\n".join(flexible) + "\0" + "\n".join(rigid)).encode("utf-16-le")
+    h = 0x811C9DC5
+    for i in range(0, len(units), 2):
+        h ^= units[i] | units[i + 1] << 8
+        h = (h * 0x01000193) & 0xFFFFFFFF
+    return h
+
+
+def armor_coverage(armorgear, layouts):
+    """
+    Returns the coverage of armorgear: a hash of the flexible and rigid
+    locations the masks were built from, so that the game can tell when
+    they have been edited since, and the masks of each in each of layouts, as returned by
+    anatomy_layouts(), keyed by anatomy name. Raises CoverageError if it
+    names a location none of the anatomies has.
+    """
+    layouts = {layout["name"]: {name: bit for bit, name in enumerate(layout["locationBits"])} for layout in layouts}
+    flexible = armorgear.get("flexloc") or []
+    rigid = armorgear.get("rigidloc") or []
+    unknown = [
+        name for name in dict.fromkeys(flexible + rigid) if not any(name in layout for layout in layouts.values())
+    ]
+    if unknown:
+        raise CoverageError(f"{armorgear['name']} covers unknown body locations {', '.join(unknown)}")
+    return {
+        "locationsHash": locations_hash(flexible, rigid),
+        "masks": {
+            anatomy: {"flexible": coverage_mask(flexible, layout), "rigid": coverage_mask(rigid, layout)}
+            for anatomy, layout in layouts.items()
+        },
+    }
+
+
+def add_armor_coverage(armorgear, out, layouts):
+    """Embeds the coverage masks of armorgear in the sohl flags of its document out."""
+    out.setdefault("flags", {}).setdefault("sohl", {})["coverage"] = armor_coverage(armorgear, layouts)
@@ -0,0 +1,121 @@
+import json
+import os
+
+DEPENDENCIES_NAME = ".dependencies"
+DEPENDENCIES_VERSION = 1
+
+# The graph links documents, named by their _key (e.g. "!actors!<id>" or
+# "!items!<id>"), to what they were built from: the source records, named
+# by record_node(), and, for actors, the catalogue items they embed.
+
+
+def record_node(pack, source, id):
+    """Returns the graph node of the record with the given id in a pack's data file."""
+    return f"{pack}/{source}#{id}"
+
+
+class PackDependencies:
+    """
+    The dependencies of the documents of one pack, saved in the pack's
+    build directory. In incremental mode the entries of documents that were
+    not regenerated are carried over from the previous build.
+    """
+
+    def __init__(self, output_dir, incremental=False):
+        self.output_dir = output_dir
+        self.pack = os.path.basename(os.path.normpath(output_dir))
+        self.entries = {}
+        self.previous = self._load() if incremental else {}
+
+    @property
+    def path(self):
+        return os.path.join(self.output_dir, DEPENDENCIES_NAME)
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf8") as infile:
+                data = json.load(infile)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != DEPENDENCIES_VERSION:
+            return {}
+        return data.get("documents", {})
+
+    def add(self, fname, document, sources=(), uses=()):
+        """
+        Records that the document in fname was built from sources, (data
+        file, record id) pairs of this pack, and from the documents whose
+        keys are in uses.
+        """
+        self.entries[fname] = {
+            "key": document.get("_key"),
+            "name": document.get("name"),
+            "uses": [record_node(self.pack, source, id) for source, id in sources]
+            + list(uses),
+        }
+
+    def keep(self, fname):
+        """Carries over the entry of a document that was not regenerated."""
+        if fname in self.previous:
+            self.entries[fname] = self.previous[fname]
+
+    def close(self):
+        with open(self.path, "w", encoding="utf8") as outfile:
+            json.dump(
+                {"version": DEPENDENCIES_VERSION, "documents": self.entries},
+                outfile,
+                indent=1,
+                ensure_ascii=False,
+            )
+            outfile.write("\n")
+
+
+class DependencyGraph:
+    """
+    The dependencies of the documents of every pack in a build directory:
+    uses[node] is the set of nodes node was built from, and users[node] the
+    set of nodes built from node, both found in constant time.
+    """
+
+    def __init__(self):
+        self.uses = {}
+        self.users = {}
+        self.names = {}
+        self.packs = {}
+
+    @classmethod
+    def load(cls, build_dir, packs=None):
+        """Loads the graph saved by the builds of packs (default: all) in build_dir."""
+        graph = cls()
+        if packs is None:
+            packs = [p for p in sorted(os.listdir(build_dir)) if os.path.isdir(os.path.join(build_dir, p))]
+        for pack in packs:
+            for entry in PackDependencies(os.path.join(build_dir, pack), True).previous.values():
+                graph.add(entry["key"], entry["uses"], entry.get("name"), pack)
+        return graph
+
+    def add(self, node, uses, name=None, pack=None):
+        self.uses.setdefault(node, set()).update(uses)
+        for used in uses:
+            self.users.setdefault(used, set()).add(node)
+        if name is not None:
+            self.names[node] = name
+        if pack is not None:
+            self.packs[node] = pack
+
+    def dependents(self, nodes):
+        """Returns every node built, directly or not, from one of nodes."""
+        result = set()
+        pending = list(nodes)
+        while pending:
+            for user in self.users.get(pending.pop(), ()):
+                if user not in result:
+                    result.add(user)
+                    pending.append(user)
+        return result
+
+    def find(self, query):
+        """Returns the nodes that are named query, or whose key or record node is query."""
+        if query in self.uses or query in self.users:
+            return {query}
+        return {node for node, name in self.names.items() if name == query}
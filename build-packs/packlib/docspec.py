@@ -0,0 +1,216 @@
+import functools
+import re
+from unidecode import unidecode
+from packlib.depgraph import record_node
+from packlib.effects import compile_effects
+from packlib.incremental import record_digest
+from packlib.yamlio import iter_yaml
+
+# The _stats block of every generated document. It is never modified, so
+# all documents share this one dict.
+STATS = {
+    "systemId": "sohl",
+    "systemVersion": "0.9.0",
+    "coreVersion": "12.330",
+    "createdTime": 0,
+    "modifiedTime": 0,
+    "lastModifiedBy": "TMJsvJWT6ytpHZ0M",
+}
+
+_SLUG_RE = re.compile(r"[^0-9a-zA-Z]+")
+
+
+@functools.lru_cache(maxsize=None)
+def slug(name, id):
+    """Returns the output file name (without .json) of the document with the given name and id."""
+    return _SLUG_RE.sub("_", unidecode(name + "_" + id))
+
+
+class Field:
+    """
+    Template value copied from a field of the source record, or from a
+    nested field when given a path such as Field("legendary", "blunt").
+    If optional, a missing field yields default.
+    """
+
+    def __init__(self, *path, default=None, optional=False):
+        self.path = path
+        self.default = default
+        self.optional = optional
+
+
+class Computed:
+    """Template value computed from the whole source record by func(rec)."""
+
+    def __init__(self, func):
+        self.func = func
+
+
+class Shared:
+    """Template value shared, not copied, between every document built."""
+
+    def __init__(self, value):
+        self.value = value
+
+
+class Concat:
+    """Template value joining strings and Fields, such as a _key."""
+
+    def __init__(self, *parts):
+        self.parts = parts
+
+
+def _compile_value(value, names):
+    def bind(obj):
+        name = f"_v{len(names)}"
+        names[name] = obj
+        return name
+
+    if isinstance(value, Field):
+        *parents, name = value.path
+        expr = "rec" + "".join(f"[{p!r}]" for p in parents)
+        if value.optional:
+            return f"{expr}.get({name!r}, {bind(value.default)})"
+        return f"{expr}[{name!r}]"
+    if isinstance(value, Computed):
+        return f"{bind(value.func)}(rec)"
+    if isinstance(value, Shared):
+        return bind(value.value)
+    if isinstance(value, Concat):
+        return "(" + " + ".join(_compile_value(p, names) for p in value.parts) + ")"
+    if isinstance(value, dict):
+        items = ", ".join(
+            f"{k!r}: {_compile_value(v, names)}" for k, v in value.items()
+        )
+        return "{" + items + "}"
+    if isinstance(value, list):
+        return "[" + ", ".join(_compile_value(v, names) for v in value) + "]"
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return repr(value)
+    raise TypeError(f"Unsupported template value {value!r}")
+
+
+def compile_template(template):
+    """
+    Compiles a document template into a function build(rec) that returns a
+    new document for the source record rec. The template is a dict of
+    constants, nested dicts and lists (created afresh for each document),
+    and Field, Computed, Shared and Concat values. Keys keep the template's
+    order in the built documents.
+    """
+    names = {}
+    body = _compile_value(template, names)
+    namespace = dict(names)
+    exec(f"def build(rec):\n    return {body}\n", namespace)
+    return namespace["build"]
+
+
+def item_template(type, system, **fields):
+    """
+    Returns the template of a top-level item document of the given type,
+    with the usual identity, effects, flags, _stats, ownership and folder
+    fields. Any of those can be overridden through fields; system holds the
+    type-specific system data.
+    """
+    template = {
+        "name": Field("name"),
+        "type": type,
+        "img": Field("img"),
+        "_id": Field("id"),
+        "_key": Concat("!items!", Field("id")),
+        "system": system,
+        "effects": Field("effects"),
+        "flags": Field("flags"),
+        "_stats": Shared(STATS),
+        "ownership": {"default": 3},
+        "folder": Field("folderId"),
+    }
+    template.update(fields)
+    return template
+
+
+def folder_template(sort=True, ownership=True):
+    """Returns the template of a Foundry folder document built from a folders.yaml record."""
+    template = {
+        "name": Field("name"),
+        "sorting": "a",
+        "folder": Computed(lambda rec: rec["parentFolderId"] or None),
+        "type": "Item",
+        "_id": Field("id"),
+        "sort": 0,
+        "color": Field("color"),
+        "flags": {},
+        "_stats": Shared(STATS),
+        "ownership": {"default": 3},
+        "_key": Concat("!folders!", Field("id")),
+    }
+    if not sort:
+        del template["sort"]
+    if not ownership:
+        del template["ownership"]
+    return template
+
+
+class DocumentSpec:
+    """
+    Maps the records of one data file to one kind of document. template is
+    compiled once by compile_template(). For each record, prepare(rec) may
+    adjust the record first, and finish(rec, out, related) may add to the
+    built document, whose active effects are then checked and pre-parsed
+    by compile_effects(). related_source, the (data file, id field) of the
+    related records passed to generate(), or (data file, id field, pack)
+    when the data file is another pack's, names them in the dependency
+    graph.
+    """
+
+    def __init__(
+        self,
+        label,
+        source,
+        template,
+        id_field="id",
+        prepare=None,
+        finish=None,
+        related_source=None,
+    ):
+        self.label = label
+        self.source = source
+        self.related_source = related_source
+        self.build = compile_template(template)
+        self.id_field = id_field
+        self.prepare = prepare
+        self.finish = finish
+
+    def generate(self, dataDir, output, related=None):
+        """
+        Builds a document from each record of the source file in dataDir.
+        related(rec), if given, returns other source records the document
+        depends on, which are included in its digest and passed to finish.
+        """
+        for rec in iter_yaml(f"{dataDir}/{self.source}"):
+            fname = slug(rec["name"], rec[self.id_field]) + ".json"
+            if related:
+                records = related(rec)
+                digest = record_digest(rec, records)
+            else:
+                records = None
+                digest = record_digest(rec)
+            if output.is_current(fname, digest):
+                continue
+            print(f"Processing {self.label} {rec['name']}")
+
+            if self.prepare:
+                self.prepare(rec)
+            out = self.build(rec)
+            if self.finish:
+                self.finish(rec, out, records)
+            compile_effects(out)
+            sources = [(self.source, rec[self.id_field])]
+            uses = []
+            if records and self.related_source:
+                source, id_field, *pack = self.related_source
+                if pack:
+                    uses = [record_node(pack[0], source, related[id_field]) for related in records]
+                else:
+                    sources.extend((source, related[id_field]) for related in records)
+            output.add(fname, out, digest, sources, uses)
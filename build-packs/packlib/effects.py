@@ -0,0 +1,302 @@
+import re
+
+# Active effect change modes (CONST.ACTIVE_EFFECT_MODES)
+CUSTOM = 0
+MULTIPLY = 1
+ADD = 2
+DOWNGRADE = 3
+UPGRADE = 4
+OVERRIDE = 5
+
+# ValueModifier method applying each mode of a "mod:" change (see
+# SohlActiveEffect._handleAEMods in module/sohl-common.js)
+MODIFIER_OPERATIONS = {
+    ADD: "add",
+    MULTIPLY: "multiply",
+    UPGRADE: "floor",
+    DOWNGRADE: "ceiling",
+    OVERRIDE: "set",
+}
+
+# Kinds of the data model paths a change key may name: a ValueModifier,
+# the target of "mod:" keys; a plain value, the target of the others; and
+# an object whose entries the changes themselves create, such as $traits.
+MODIFIER = "modifier"
+VALUE = "value"
+OPEN = "open"
+
+_KEY = re.compile(r"^(mod:)?(system(?:\.\$?[A-Za-z_][A-Za-z0-9_]*)+)$")
+
+# Target names that _globrex turns into a plain anchored expression
+_LITERAL_NAME = re.compile(r"^[A-Za-z0-9_ ]+$")
+
+
+class EffectChangeError(ValueError):
+    """Exception raised when an active effect change key does not fit the data model it targets."""
+    pass
+
+
+def _mastery_level(path, **children):
+    """Returns the paths of a MasteryLevelModifier at path: itself and the properties a change may set."""
+    paths = {path: MODIFIER}
+    for prop in ("minTarget", "maxTarget", "successLevelMod"):
+        paths[f"{path}.{prop}"] = VALUE
+    for name, kind in children.items():
+        paths[f"{path}.{name}"] = kind
+    return paths
+
+
+def _combat(path):
+    return _mastery_level(path, fate=MODIFIER)
+
+
+def _paths(*parts, **paths):
+    result = {}
+    for part in parts:
+        result.update(part)
+    result.update({f"system.{name}": kind for name, kind in paths.items()})
+    return result
+
+
+# Keys the pack data has always used for paths the data models do not set
+# up: meleeMod's mod:system.$attack.block, and the armor reduction (and
+# projectile bleed) mod:system.$impact.armorReduction. They are accepted,
+# and applied as before, until a world-data migration moves the existing
+# effects to the paths they mean.
+_LEGACY = {
+    "system.$attack.block": MODIFIER,
+    "system.$impact.armorReduction": MODIFIER,
+}
+
+_STRIKE_MODE = _paths(
+    _LEGACY,
+    _combat("system.$attack"),
+    _combat("system.$defense.block"),
+    _combat("system.$defense.counterstrike"),
+    _combat("system.$dodge"),
+    **{
+        "$durability": MODIFIER,
+        "$length": MODIFIER,
+        "$impact": MODIFIER,
+        "$reach": MODIFIER,
+        "$heft": MODIFIER,
+        "$traits": OPEN,
+    },
+)
+
+_GEAR = _paths(
+    **{"$value": MODIFIER, "$weight": MODIFIER, "$quality": MODIFIER, "$durability": MODIFIER}
+)
+
+_MASTERY_LEVEL = _paths(
+    _mastery_level("system.$masteryLevel", fate=MODIFIER),
+    **{"$boosts": VALUE},
+)
+
+# The data model paths the changes of an effect may name, by the type of
+# the document it targets, as set up by the prepareBaseData of each data
+# model (including those of the Legendary variant).
+DATA_MODEL_PATHS = {
+    "meleestrikemode": _STRIKE_MODE,
+    "missilestrikemode": _STRIKE_MODE,
+    "combattechniquestrikemode": _STRIKE_MODE,
+    "miscgear": _GEAR,
+    "containergear": _paths(_GEAR, **{"$capacity": MODIFIER}),
+    "concoctiongear": _GEAR,
+    "armorgear": _paths(_GEAR, **{"$encumbrance": MODIFIER, "$traits": OPEN}),
+    "weapongear": _GEAR,
+    "projectilegear": _paths(
+        _GEAR,
+        _LEGACY,
+        _combat("system.$attack"),
+        **{"$impact": MODIFIER, "$traits": OPEN},
+    ),
+    "skill": _MASTERY_LEVEL,
+    "trait": _paths(_MASTERY_LEVEL, **{"$score": MODIFIER, "textValue": VALUE}),
+    "mystery": _paths(**{"$charges": MODIFIER, "$charges.max": VALUE, "$level": MODIFIER}),
+    "mysticalability": _paths(
+        **{
+            "$charges": MODIFIER,
+            "$charges.max": VALUE,
+            "$level": MODIFIER,
+            "$fatigue": MODIFIER,
+        }
+    ),
+}
+
+
+def resolve_path(path, paths):
+    """Returns the kind of the data model path, or None if paths has no such path."""
+    kind = paths.get(path)
+    if kind is None:
+        parent, _, name = path.rpartition(".")
+        if paths.get(parent) == OPEN and not name.startswith("$"):
+            kind = VALUE
+    return kind
+
+
+def parse_change(change, paths):
+    """
+    Returns the pre-parsed form of an effect change: its key, the data
+    model path it names, whether that is a ValueModifier and, if so, the
+    ValueModifier operation its mode applies. Raises EffectChangeError if
+    the key does not name a path of the right kind in paths.
+    """
+    key = change["key"]
+    match = _KEY.match(key)
+    if not match:
+        raise EffectChangeError(f"malformed change key {key!r}")
+    modifier, path = bool(match.group(1)), match.group(2)
+    kind = resolve_path(path, paths)
+    if kind is None:
+        raise EffectChangeError(f"change key {key!r}: the data model has no {path}")
+    if modifier != (kind == MODIFIER):
+        expected = f"mod:{path}" if kind == MODIFIER else path
+        raise EffectChangeError(f"change key {key!r}: {path} is a {kind}, use {expected!r}")
+    parsed = {"key": key, "path": path, "modifier": modifier}
+    if modifier:
+        if change["mode"] not in MODIFIER_OPERATIONS:
+            raise EffectChangeError(f"change key {key!r}: mode {change['mode']} does not apply to a ValueModifier")
+        parsed["operation"] = MODIFIER_OPERATIONS[change["mode"]]
+    return parsed
+
+
+def parse_target_name(targetName):
+    """
+    Returns the pre-parsed form of an effect's targetName (see the
+    targetNameRE, targetHasAttr and targetHasPrimaryAttr getters of
+    SohlActiveEffectData): the name, the attribute it selects by, if any,
+    and the expression names must match, when it is known at build time.
+    """
+    target = {"name": targetName}
+    if not targetName:
+        target["re"] = ".+"
+    elif targetName.startswith("attr:"):
+        target["attr"] = targetName[5:].strip()
+        target["re"] = ".+"
+    elif targetName.startswith("primeattr:"):
+        target["primeAttr"] = targetName[10:].strip()
+        target["re"] = ".+"
+    elif targetName.startswith("regex:"):
+        target["re"] = targetName[6:].strip()
+    elif _LITERAL_NAME.match(targetName):
+        target["re"] = f"^{targetName}$"
+    return target
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _combine(mode, values):
+    """Returns the single value equivalent to applying values in turn with mode, or None."""
+    if mode == OVERRIDE:
+        return values[-1]
+    numbers = [_number(value) for value in values]
+    if None in numbers:
+        return None
+    if mode == ADD:
+        result = sum(numbers)
+    elif mode == MULTIPLY:
+        result = 1
+        for number in numbers:
+            result *= number
+    elif mode == UPGRADE:
+        result = max(numbers)
+    elif mode == DOWNGRADE:
+        result = min(numbers)
+    else:
+        return None
+    return str(result) if isinstance(values[0], str) else result
+
+
+def _priority(change):
+    return change["priority"] if change["priority"] is not None else change["mode"] * 10
+
+
+def coalesce_changes(changes, parsed):
+    """
+    Merges the changes of one effect that apply the same mode to the same
+    key at the same priority into the first of them, where the mode allows:
+    adding, multiplying, upgrading and downgrading numbers, and overriding
+    a plain value (the last wins). ValueModifier overrides are kept apart,
+    as the first of them wins, and so are the changes of a key and priority
+    that mix modes. Returns the remaining changes and their parsed forms.
+    """
+    groups = {}
+    for i, change in enumerate(changes):
+        groups.setdefault((change["key"], _priority(change)), []).append(i)
+
+    values = {}
+    for group in groups.values():
+        if len(group) < 2:
+            continue
+        first = changes[group[0]]
+        if any(changes[i]["mode"] != first["mode"] for i in group):
+            continue
+        if parsed[group[0]]["modifier"] and first["mode"] == OVERRIDE:
+            continue
+        value = _combine(first["mode"], [changes[i]["value"] for i in group])
+        if value is not None:
+            values[group[0]] = value
+            values.update((i, None) for i in group[1:])
+
+    result, resultParsed = [], []
+    for i, (change, form) in enumerate(zip(changes, parsed)):
+        if i in values:
+            if values[i] is None:
+                continue
+            change = dict(change, value=values[i])
+        result.append(change)
+        resultParsed.append(form)
+    return result, resultParsed
+
+
+def compile_effects(document):
+    """
+    Validates the change keys of the active effects of document and its
+    nested items against the data models they target, coalesces their
+    changes, and embeds the pre-parsed changes, with the mode and value of
+    each once coalesced, and the target name of each effect in its sohl
+    flags.
+    """
+    docType = document.get("type")
+    for effect in document.get("effects") or ():
+        system = effect.get("system") or {}
+        targetType = system.get("targetType") or "this"
+        modelType = docType if targetType == "this" else targetType
+        changes = effect.get("changes") or []
+        if not changes:
+            continue
+        paths = DATA_MODEL_PATHS.get(modelType)
+        if paths is None:
+            raise EffectChangeError(
+                f"{document.get('name')}: effect {effect.get('name')!r} targets a {modelType}, "
+                f"which has no known data model"
+            )
+        try:
+            parsed = [parse_change(change, paths) for change in changes]
+        except EffectChangeError as e:
+            raise EffectChangeError(f"{document.get('name')}: effect {effect.get('name')!r}: {e}") from None
+        effect["changes"], parsed = coalesce_changes(changes, parsed)
+        # The mode and value each form was parsed with, so that the game can
+        # tell when a change has been edited since
+        for change, form in zip(effect["changes"], parsed):
+            form["mode"] = change["mode"]
+            form["value"] = change["value"]
+        flags = effect.setdefault("flags", {}).setdefault("sohl", {})
+        flags["changes"] = parsed
+        flags["target"] = parse_target_name(system.get("targetName") or "")
+    for nested in (document.get("system") or {}).get("nestedItems") or ():
+        compile_effects(nested)
@@ -0,0 +1,124 @@
+MISTYISLE_AIMS = ("high", "mid", "low")
+
+# Version of the hit tables, which the game (AnatomyItemData
+# .HIT_TABLES_VERSION) requires to use them rather than rebuild them
+HIT_TABLES_VERSION = 1
+
+
+def _nested(item, type):
+    return [it for it in item["system"].get("nestedItems", []) if it["type"] == type]
+
+
+def _flag(item, *path):
+    value = item.get("flags", {}).get("sohl", {})
+    for key in path:
+        value = value.get(key, {}) if isinstance(value, dict) else {}
+    return value or 0
+
+
+def _weight(item, *path):
+    weight = _flag(item, *path)
+    if not isinstance(weight, (int, float)) or weight < 0:
+        raise ValueError(f"{item['type']} {item['name']} has invalid probWeight {weight!r}")
+    return weight
+
+
+def cumulative_table(entries):
+    """
+    Returns the hit table of entries, (location, probability weight) pairs:
+    the ids and names of the locations and the cumulative probability of
+    each and those before it, normalized so that the last is exactly 1. A
+    roll r in [0, 1) hits the first location whose cumulative probability
+    is greater than r, found by binary search. Without any weight, the
+    table is empty.
+    """
+    total = sum(weight for _, weight in entries)
+    table = {"ids": [], "names": [], "cumulative": []}
+    if not total:
+        return table
+    running = 0
+    for location, weight in entries:
+        running += weight
+        table["ids"].append(location["_id"])
+        table["names"].append(location["name"])
+        table["cumulative"].append(running / total)
+    table["cumulative"][-1] = 1
+    return table
+
+
+def zone_tables(anatomy):
+    """
+    Returns the legendary hit table of each zone number of anatomy, keyed by
+    zone number (as a string, for JSON). A hit in a zone falls on a body
+    part of one of the body zones covering that zone number, chosen by the
+    parts' probWeight, then on one of the part's body locations, chosen by
+    theirs.
+    """
+    parts = {}
+    for bodyzone in _nested(anatomy, "bodyzone"):
+        for zone in _flag(bodyzone, "legendary", "zones") or []:
+            parts.setdefault(zone, []).extend(_nested(bodyzone, "bodypart"))
+    tables = {}
+    for zone in sorted(parts):
+        entries = []
+        for bodypart in parts[zone]:
+            locations = [
+                (loc, _weight(loc, "legendary", "probWeight"))
+                for loc in _nested(bodypart, "bodylocation")
+            ]
+            partTotal = sum(weight for _, weight in locations)
+            if partTotal:
+                partWeight = _weight(bodypart, "legendary", "probWeight")
+                entries.extend((loc, partWeight * weight / partTotal) for loc, weight in locations)
+        tables[str(zone)] = cumulative_table(entries)
+    return tables
+
+
+def body_locations(anatomy):
+    """Returns the body locations of anatomy, zone by zone and part by part."""
+    return [
+        loc
+        for bodyzone in _nested(anatomy, "bodyzone")
+        for bodypart in _nested(bodyzone, "bodypart")
+        for loc in _nested(bodypart, "bodylocation")
+    ]
+
+
+def aim_tables(anatomy):
+    """
+    Returns the mistyisle hit table of each aim (high, mid and low) of
+    anatomy, over all its body locations, chosen by their probWeight for
+    that aim.
+    """
+    locations = body_locations(anatomy)
+    return {
+        aim: cumulative_table(
+            [(loc, _weight(loc, "mistyisle", "probWeight", aim)) for loc in locations]
+        )
+        for aim in MISTYISLE_AIMS
+    }
+
+
+def add_hit_tables(anatomy):
+    """Embeds the hit tables of anatomy, and their version, in its sohl flags."""
+    sohl = anatomy.setdefault("flags", {}).setdefault("sohl", {})
+    sohl["hitTablesVersion"] = HIT_TABLES_VERSION
+    sohl.setdefault("legendary", {})["hitTables"] = zone_tables(anatomy)
+    sohl.setdefault("mistyisle", {})["hitTables"] = aim_tables(anatomy)
+
+
+def location_layout(anatomy):
+    """
+    Returns the names of the body locations of anatomy in bit order: bit i
+    of an armor coverage mask (see packlib.coverage) stands for the i-th.
+    """
+    names = [loc["name"] for loc in body_locations(anatomy)]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Anatomy {anatomy['name']} has several body locations named {', '.join(duplicates)}")
+    return names
+
+
+def add_location_layout(anatomy):
+    """Embeds the coverage bit layout of the body locations of anatomy in its sohl flags."""
+    anatomy.setdefault("flags", {}).setdefault("sohl", {})["locationBits"] = location_layout(anatomy)
@@ -0,0 +1,101 @@
+from fractions import Fraction
+
+# Levels of the percentile table, in percent
+PERCENTILES = (10, 25, 50, 75, 90)
+
+# Digits kept of the probabilities in the tables
+PRECISION = 6
+
+
+def _integer(impact, key):
+    value = impact.get(key) or 0
+    if isinstance(value, str) and value.strip().lstrip("+-").isdigit():
+        return int(value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value == int(value):
+        return int(value)
+    raise ValueError(f"impact {key} {value!r} is not an integer")
+
+
+def convolve(a, b):
+    """Returns the distribution of the sum of two independent distributions, lists of counts from 0."""
+    result = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                result[i + j] += x * y
+    return result
+
+
+def dice_counts(numDice, die):
+    """
+    Returns the number of ways of rolling each total of numDice dice of die
+    sides, a list indexed by the total less numDice (the lowest total).
+    """
+    counts = [1]
+    face = [1] * die
+    # Squaring keeps the number of convolutions logarithmic in numDice
+    while numDice:
+        if numDice & 1:
+            counts = convolve(counts, face)
+        numDice >>= 1
+        if numDice:
+            face = convolve(face, face)
+    return counts
+
+
+def impact_table(impact):
+    """
+    Returns the exact distribution of the impact roll of impact, an
+    impactBase (numDice dice of die sides plus modifier): its lowest and
+    highest values, mean and standard deviation, the impact at each of the
+    PERCENTILES (the lowest value rolled at least that often, or less), and
+    the chance of rolling each value or more, from the lowest; and the
+    impactBase it was computed from, so that the game can tell when the
+    dice have been edited since.
+    """
+    numDice = _integer(impact, "numDice")
+    die = _integer(impact, "die")
+    modifier = _integer(impact, "modifier")
+    if numDice < 0 or die < 0:
+        raise ValueError(f"impact {numDice}d{die} has a negative number of dice or sides")
+    impactBase = {"numDice": numDice, "die": die, "modifier": modifier}
+    if not die:
+        numDice = 0
+    counts = dice_counts(numDice, die)
+    total = sum(counts)
+    low = numDice + modifier
+
+    mean = Fraction(sum(i * n for i, n in enumerate(counts)), total)
+    variance = Fraction(sum(i * i * n for i, n in enumerate(counts)), total) - mean * mean
+    atLeast = []
+    remaining = total
+    for n in counts:
+        atLeast.append(round(remaining / total, PRECISION))
+        remaining -= n
+
+    percentiles = {}
+    levels = iter(PERCENTILES)
+    level = next(levels)
+    cumulative = 0
+    for i, n in enumerate(counts):
+        cumulative += n
+        # Exact: cumulative / total >= level / 100
+        while level is not None and cumulative * 100 >= level * total:
+            percentiles[str(level)] = low + i
+            level = next(levels, None)
+
+    return {
+        "min": low,
+        "max": low + len(counts) - 1,
+        "mean": round(float(mean) + modifier + numDice, PRECISION),
+        "stdDev": round(float(variance) ** 0.5, PRECISION),
+        "percentiles": percentiles,
+        "atLeast": atLeast,
+        "impactBase": impactBase,
+    }
+
+
+def add_impact_table(strikeMode):
+    """Embeds the impact distribution of strikeMode in its sohl flags."""
+    table = impact_table(strikeMode["system"]["impactBase"])
+    strikeMode.setdefault("flags", {}).setdefault("sohl", {})["impactTable"] = table
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import sys
+
+MANIFEST_NAME = ".build-manifest"
+MANIFEST_VERSION = 1
+
+
+def _canonical(obj):
+    return json.dumps(
+        obj, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str
+    )
+
+
+def record_digest(*sources):
+    """
+    Returns a content hash of one or more source records. Records are hashed
+    in canonical (key-sorted) JSON form, so YAML formatting changes that do
+    not alter the data do not invalidate the output.
+    """
+    h = hashlib.sha256()
+    for src in sources:
+        h.update(_canonical(src).encode("utf8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def generator_digest(script_path=None, variant=""):
+    """
+    Returns a hash of the generator script and the packlib sources, so that
+    changing the transform code invalidates every cached output. variant
+    names any option that changes the output for the same code, such as
+    the release encoding.
+    """
+    script_path = script_path or sys.argv[0]
+    libdir = os.path.dirname(os.path.abspath(__file__))
+    paths = [os.path.abspath(script_path)] + sorted(
+        os.path.join(libdir, f) for f in os.listdir(libdir) if f.endswith(".py")
+    )
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as infile:
+            h.update(infile.read())
+    h.update(variant.encode("utf8"))
+    return h.hexdigest()
+
+
+class BuildManifest:
+    """
+    Tracks, for each generated output file, the hash of the source records it
+    was derived from. When incremental mode is disabled every record is
+    considered stale, but the manifest is still written so that a following
+    incremental build can reuse the outputs.
+
+    exists(fname), if given, tells whether a previous output is still
+    present; by default the output directory is checked for the file.
+    """
+
+    def __init__(
+        self, output_dir, incremental=False, script_path=None, exists=None, variant=""
+    ):
+        self.output_dir = output_dir
+        self.exists = exists or (lambda fname: os.path.isfile(os.path.join(output_dir, fname)))
+        self.incremental = incremental
+        self.generator = generator_digest(script_path, variant)
+        self.entries = {}
+        self.seen = set()
+        self.written = 0
+        self.skipped = 0
+        self.removed = 0
+        if incremental:
+            self._load()
+
+    @property
+    def path(self):
+        return os.path.join(self.output_dir, MANIFEST_NAME)
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf8") as infile:
+                data = json.load(infile)
+        except (OSError, ValueError):
+            return
+        if (
+            data.get("version") == MANIFEST_VERSION
+            and data.get("generator") == self.generator
+        ):
+            self.entries = data.get("entries", {})
+
+    def is_current(self, fname, digest):
+        """
+        Marks fname as produced by this build and returns True if the existing
+        output was generated from identical source records.
+        """
+        self.seen.add(fname)
+        current = (
+            self.incremental
+            and self.entries.get(fname) == digest
+            and self.exists(fname)
+        )
+        if current:
+            self.skipped += 1
+        return current
+
+    def update(self, fname, digest):
+        """Records that fname has just been written from the given sources."""
+        self.seen.add(fname)
+        self.entries[fname] = digest
+        self.written += 1
+
+    def close(self):
+        """
+        Saves the manifest. In incremental mode, also removes outputs that
+        were not produced by this build (for instance because their source
+        record was deleted).
+        """
+        if self.incremental:
+            for fname in os.listdir(self.output_dir):
+                if fname.endswith(".json") and fname not in self.seen:
+                    os.remove(os.path.join(self.output_dir, fname))
+                    self.removed += 1
+        self.entries = {k: v for k, v in self.entries.items() if k in self.seen}
+        with open(self.path, "w", encoding="utf8") as outfile:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION,
+                    "generator": self.generator,
+                    "entries": self.entries,
+                },
+                outfile,
+                indent=2,
+                sort_keys=True,
+            )
+        if self.incremental:
+            print(
+                f"Incremental build: {self.written} written, "
+                f"{self.skipped} unchanged, {self.removed} removed"
+            )
@@ -0,0 +1,106 @@
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKENDS = ("auto", "orjson", "stdlib")
+
+# orjson writes floats below 1e-4 in positional notation and large ones
+# without the exponent sign, where the stdlib writes 1e-05 and 1e+16. Any
+# output that may contain such a number is re-encoded with the stdlib;
+# a match inside a string only costs the re-encode. The cheaper _EXPONENT
+# scan runs first, since most documents contain no digit followed by an e.
+_EXPONENT = re.compile(rb"\d[eE]")
+_DIVERGENT_FLOAT = re.compile(rb"[:\[,]\s*-?\d+(?:\.\d+)?[eE]")
+
+# Exercises escaping, non-ASCII text, nesting, empty containers and the
+# number forms both encoders must agree on before orjson is used.
+_PROBE = {
+    "name": 'Épée "Ancienne"\\/\t\n\x1f \U0001f5e1',
+    "empty": {"list": [], "dict": {}, "str": ""},
+    "numbers": [0, -1, 2**53, 0.5, -0.0, 1.25e-3, 123456.789, 1e15],
+    "flags": [True, False, None],
+    "nested": [{"b": 1, "a": [{"z": {}}]}],
+}
+
+_backend = None
+
+
+def _stdlib_dumps(obj, pretty, sort_keys):
+    if pretty:
+        text = json.dumps(obj, indent=2, ensure_ascii=False, sort_keys=sort_keys)
+    else:
+        text = json.dumps(
+            obj, ensure_ascii=False, sort_keys=sort_keys, separators=(",", ":")
+        )
+    return text.encode("utf8")
+
+
+def _orjson_dumps(obj, pretty, sort_keys):
+    option = (orjson.OPT_INDENT_2 if pretty else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+    try:
+        data = orjson.dumps(obj, option=option)
+    except TypeError:
+        # Non-string keys, integers wider than 64 bits, unsupported types
+        return _stdlib_dumps(obj, pretty, sort_keys)
+    if b"0.0000" in data or (_EXPONENT.search(data) and _DIVERGENT_FLOAT.search(data)):
+        return _stdlib_dumps(obj, pretty, sort_keys)
+    return data
+
+
+def canonical_check():
+    """
+    Returns True if orjson encodes the probe document to exactly the bytes
+    the stdlib produces, in every mode the generators use.
+    """
+    if orjson is None:
+        return False
+    return all(
+        _orjson_dumps(_PROBE, pretty, sort_keys) == _stdlib_dumps(_PROBE, pretty, sort_keys)
+        for pretty in (False, True)
+        for sort_keys in (False, True)
+    )
+
+
+def use_backend(name="auto"):
+    """
+    Selects the JSON encoder. "auto" uses orjson when it is installed and
+    passes canonical_check(), and the stdlib otherwise; asking for orjson
+    explicitly raises ValueError if it cannot be used.
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{name}'")
+    if name == "stdlib" or (name == "auto" and not canonical_check()):
+        _backend = "stdlib"
+    elif canonical_check():
+        _backend = "orjson"
+    else:
+        raise ValueError("orjson is not installed or does not match the stdlib encoding")
+
+
+def backend_name():
+    if _backend is None:
+        use_backend()
+    return _backend
+
+
+def dumps(obj, pretty=False, sort_keys=False):
+    """
+    Returns obj encoded as UTF-8 JSON bytes, indented by two spaces if
+    pretty is set and minified otherwise, with non-ASCII text unescaped.
+    The bytes are the same whichever backend is in use.
+    """
+    if backend_name() == "orjson":
+        return _orjson_dumps(obj, pretty, sort_keys)
+    return _stdlib_dumps(obj, pretty, sort_keys)
+
+
+def loads(data):
+    """Decodes JSON from str or UTF-8 bytes."""
+    if backend_name() == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,207 @@
+import glob
+import os
+import shutil
+from packlib.bundle import bundle_path, index_path, read_bundle_lines
+from packlib.depgraph import PackDependencies
+from packlib.incremental import BuildManifest
+from packlib.jsonenc import dumps, loads
+from packlib.phases import phase
+
+# "files" writes one pretty-printed JSON file per document, "ndjson" a single
+# newline-delimited bundle per pack, and "both" does both, which keeps the
+# per-document files around for debugging a bundled build.
+OUTPUT_FORMATS = ("files", "ndjson", "both")
+
+
+class PackOutput:
+    """
+    Receives the documents generated for one pack and writes them to the
+    pack's build directory, one JSON file per document, and/or to a single
+    NDJSON bundle next to it (see OUTPUT_FORMATS).
+
+    When deferred is set, documents are kept in memory and only written by
+    close(), so that an in-process pipeline can hand them to later
+    generators without a write/read round trip through the filesystem.
+
+    When release is set, documents are written minified with their keys
+    sorted, and close() reports how much smaller that is than the
+    pretty-printed development output.
+    """
+
+    def __init__(
+        self,
+        output_dir,
+        incremental=False,
+        deferred=False,
+        script_path=None,
+        output_format="files",
+        release=False,
+    ):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}'")
+        self.output_dir = output_dir
+        self.deferred = deferred
+        self.release = release
+        self.pretty_bytes = 0
+        self.compact_bytes = 0
+        self.files = output_format in ("files", "both")
+        self.bundle = output_format in ("ndjson", "both")
+        self.bundle_path = bundle_path(output_dir)
+        self.previous = read_bundle_lines(self.bundle_path) if incremental and self.bundle else {}
+        self.manifest = BuildManifest(
+            output_dir,
+            incremental,
+            script_path,
+            exists=self._exists,
+            variant="release" if release else "",
+        )
+        self.dependencies = PackDependencies(output_dir, incremental)
+        self.generated = {}
+        self.digests = {}
+        self.unchanged = []
+        self.order = []
+        self.lines = {}
+        self.added_files = {}
+
+    def _exists(self, fname):
+        if self.bundle and fname not in self.previous:
+            return False
+        return not self.files or os.path.isfile(os.path.join(self.output_dir, fname))
+
+    def is_current(self, fname, digest):
+        """
+        Returns True if fname is up to date with respect to the source records
+        hashed in digest, in which case the caller should skip the record.
+        """
+        current = self.manifest.is_current(fname, digest)
+        if current:
+            self.dependencies.keep(fname)
+            self.unchanged.append(fname)
+            self.order.append(fname)
+            if self.bundle:
+                self.lines[fname] = self.previous[fname]
+        return current
+
+    def add(self, fname, document, digest, sources=(), uses=()):
+        """
+        Adds a generated document. The document must not be modified
+        afterwards. sources lists the (data file, record id) pairs it was
+        built from, and uses the keys of other documents it embeds or refers
+        to, for the pack's dependency graph (see packlib.depgraph).
+        """
+        self.order.append(fname)
+        self.dependencies.add(fname, document, sources, uses)
+        if self.deferred:
+            self.generated[fname] = document
+            self.digests[fname] = digest
+        else:
+            self._write(fname, document, digest)
+
+    def add_file(self, path):
+        """Adds a document maintained by hand as a JSON file, rather than generated."""
+        fname = os.path.basename(path)
+        if self.files and not self.release:
+            shutil.copy(path, self.output_dir)
+        if self.bundle or self.deferred or self.release:
+            with phase("load"), open(path, "rb") as infile:
+                document = loads(infile.read())
+            if self.release:
+                self._write_document(fname, document)
+            elif self.bundle:
+                with phase("encode"):
+                    self.lines[fname] = dumps(document)
+            if self.deferred:
+                self.added_files[fname] = document
+        self.order.append(fname)
+        self.manifest.seen.add(fname)
+
+    def _write_file(self, fname, data):
+        with phase("write"), open(os.path.join(self.output_dir, fname), "wb") as outfile:
+            outfile.write(data)
+
+    def _write_document(self, fname, document):
+        if self.release:
+            with phase("encode"):
+                data = dumps(document, sort_keys=True)
+                self.compact_bytes += len(data)
+                self.pretty_bytes += len(dumps(document, pretty=True))
+            if self.files:
+                self._write_file(fname, data)
+            if self.bundle:
+                self.lines[fname] = data
+            return
+        if self.files:
+            with phase("encode"):
+                data = dumps(document, pretty=True)
+            self._write_file(fname, data)
+        if self.bundle:
+            with phase("encode"):
+                self.lines[fname] = dumps(document)
+
+    def _write(self, fname, document, digest):
+        self._write_document(fname, document)
+        self.manifest.update(fname, digest)
+
+    def size_report(self):
+        """Returns a one-line comparison of the compact and pretty sizes of the documents written."""
+        saved = self.pretty_bytes - self.compact_bytes
+        percent = 100 * saved / self.pretty_bytes if self.pretty_bytes else 0
+        pack = os.path.basename(os.path.normpath(self.output_dir))
+        return (
+            f"Release output for {pack}: {self.compact_bytes} bytes compact, "
+            f"{self.pretty_bytes} bytes pretty ({percent:.1f}% smaller)"
+        )
+
+    def documents(self):
+        """
+        Yields every document of the pack: those generated by this run, those
+        skipped by an incremental build (read back from disk) and those added
+        with add_file(). Only available in deferred mode.
+        """
+        if not self.deferred:
+            raise RuntimeError("documents() requires a deferred PackOutput")
+        yield from self.generated.values()
+        yield from self.added_files.values()
+        for fname in self.unchanged:
+            with phase("load"):
+                if self.bundle:
+                    document = loads(self.previous[fname])
+                else:
+                    with open(os.path.join(self.output_dir, fname), "rb") as infile:
+                        document = loads(infile.read())
+            yield document
+
+    def _write_bundle(self):
+        with open(self.bundle_path, "wb") as outfile:
+            for fname in self.order:
+                outfile.write(self.lines[fname])
+                outfile.write(b"\n")
+        with open(index_path(self.bundle_path), "w", encoding="utf8") as outfile:
+            for fname in self.order:
+                outfile.write(fname)
+                outfile.write("\n")
+
+    def _remove_stale(self):
+        # Outputs of a previous build in the other format would otherwise be
+        # picked up by readers of this pack
+        if not self.bundle:
+            for path in (self.bundle_path, index_path(self.bundle_path)):
+                if os.path.isfile(path):
+                    os.remove(path)
+        if not self.files:
+            for path in glob.glob(os.path.join(self.output_dir, "*.json")):
+                os.remove(path)
+
+    def close(self):
+        """Writes any deferred documents and the bundle, and saves the build manifest."""
+        for fname, digest in self.digests.items():
+            self._write(fname, self.generated[fname], digest)
+        self.digests = {}
+        with phase("write"):
+            self.manifest.close()
+            self.dependencies.close()
+            if self.bundle:
+                self._write_bundle()
+            self._remove_stale()
+        if self.release and self.pretty_bytes:
+            print(self.size_report())
@@ -0,0 +1,28 @@
+class MaxDepthExceededError(Exception):
+    """Exception raised when recursion exceeds the maximum allowed depth."""
+    pass
+
+
+def overlay(base, override, max_depth=10):
+    """
+    Returns base with the values from override deep-replaced into it, without
+    modifying either argument. Only the dicts along the paths that override
+    touches are copied; every other value, and every value taken from
+    override, is shared with the inputs. The result therefore serializes
+    exactly like a deep copy of base merged with override, but callers must
+    treat it (and both inputs) as read-only afterwards.
+    """
+    def recursive_overlay(d1, d2, depth):
+        if depth > max_depth:
+            raise MaxDepthExceededError(f"Maximum recursion depth of {max_depth} exceeded.")
+        result = dict(d1)
+        for key, value in d2.items():
+            if key in result and isinstance(value, dict) and isinstance(result[key], dict):
+                # If both values are dictionaries, recurse
+                result[key] = recursive_overlay(result[key], value, depth + 1)
+            else:
+                # Replace the value, or add it if the key is new
+                result[key] = value
+        return result
+
+    return recursive_overlay(base, override, depth=1)
@@ -0,0 +1,146 @@
+import functools
+import time
+
+# Phases of a pack build. Time not spent in one of the others, that is in
+# the generator code itself, counts as transform.
+PHASES = ("load", "merge", "transform", "encode", "write")
+
+_timer = None
+
+
+class PhaseTimer:
+    """
+    Accumulates the wall-clock and CPU time spent in each phase of a build,
+    and the number of records read from each data file. Phases nest; time is
+    charged to the innermost phase only, so the phase times add up to the
+    total. A timer can be started and stopped several times, for instance
+    around each step of an in-process build that concern its pack.
+    """
+
+    def __init__(self, default="transform"):
+        self.wall = dict.fromkeys(PHASES, 0.0)
+        self.cpu = dict.fromkeys(PHASES, 0.0)
+        self.records = {}
+        self.stack = [default]
+        self.mark = self.cpu_mark = None
+
+    def start(self):
+        self.mark = time.perf_counter()
+        self.cpu_mark = time.process_time()
+
+    def _charge(self):
+        now, cpu_now = time.perf_counter(), time.process_time()
+        top = self.stack[-1]
+        self.wall[top] = self.wall.get(top, 0.0) + now - self.mark
+        self.cpu[top] = self.cpu.get(top, 0.0) + cpu_now - self.cpu_mark
+        self.mark, self.cpu_mark = now, cpu_now
+
+    def enter(self, name):
+        self._charge()
+        self.stack.append(name)
+
+    def leave(self):
+        self._charge()
+        self.stack.pop()
+
+    def stop(self):
+        self._charge()
+
+    def count(self, source, n=1):
+        self.records[source] = self.records.get(source, 0) + n
+
+    @property
+    def total(self):
+        return sum(self.wall.values())
+
+    @property
+    def cpu_total(self):
+        return sum(self.cpu.values())
+
+
+class _Phase:
+    __slots__ = ("timer", "name")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.timer.enter(self.name)
+
+    def __exit__(self, *exc):
+        self.timer.leave()
+
+
+class _NoPhase:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NO_PHASE = _NoPhase()
+
+
+def start_timer(timer=None):
+    """Starts (or resumes) timing phases with timer, a new PhaseTimer by default, and returns it."""
+    global _timer
+    _timer = timer or PhaseTimer()
+    _timer.start()
+    return _timer
+
+
+def stop_timer():
+    """Stops timing phases and returns the PhaseTimer, or None if none was started."""
+    global _timer
+    timer, _timer = _timer, None
+    if timer:
+        timer.stop()
+    return timer
+
+
+def phase(name):
+    """
+    Returns a context manager charging the time spent in it to the named
+    phase. It does nothing unless a timer has been started.
+    """
+    if _timer is None:
+        return _NO_PHASE
+    return _Phase(_timer, name)
+
+
+def timed(name, func):
+    """Returns func wrapped so that the time spent in its calls is charged to the named phase."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with phase(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def timed_iter(name, iterable, source=None):
+    """
+    Returns iterable, with the time spent producing each item charged to the
+    named phase if a timer has been started. If source is given, the items
+    are counted as records read from it.
+    """
+    if _timer is None:
+        return iterable
+    return _timed_iter(_timer, name, iter(iterable), source)
+
+
+def _timed_iter(timer, name, iterator, source):
+    while True:
+        timer.enter(name)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            timer.leave()
+        if source:
+            timer.count(source)
+        yield item
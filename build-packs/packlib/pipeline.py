@@ -0,0 +1,272 @@
+import argparse
+import contextlib
+import filecmp
+import glob
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+from packlib.bundle import bundle_path, compile_bundle, read_bundle
+from packlib.compendium import write_pack
+from packlib.jsonenc import loads
+from packlib.output import OUTPUT_FORMATS, PackOutput
+from packlib.profiling import PackProfile, format_report
+from packlib.yamlio import close_source_cache, use_fast_loader, use_source_cache
+
+BUILD_PACKS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKS_BASE = os.path.join(BUILD_PACKS_DIR, "..", "assets", "packs")
+PACKS_OUTPUT_DIR = os.path.join(BUILD_PACKS_DIR, "..", "packs")
+SOURCE_CACHE_DIR = os.path.join(BUILD_PACKS_DIR, "build", ".source-cache")
+
+# Each pack and the packs whose generated documents it reads. The character
+# actors embed items from the item packs (generate-characters.py resolves
+# them against the characteristics, mysteries and possessions documents).
+PACK_DEPENDENCIES = {
+    "characteristics": [],
+    "mysteries": [],
+    "possessions": [],
+    "characters": ["characteristics", "mysteries", "possessions"],
+    "creatures": [],
+}
+
+# Each pack that reads the data files of other packs, and those packs.
+# Mystical abilities resolve their skill base formulas against the
+# characteristics traits, and armor its coverage against the location
+# layouts of the characteristics anatomies; both read the source records
+# rather than the generated documents, so that they need not wait for the
+# characteristics pack to be generated, but are rebuilt when its data
+# changes.
+SOURCE_DEPENDENCIES = {
+    "mysteries": ["characteristics"],
+    "possessions": ["characteristics"],
+}
+
+# Stands in for a PackProfile when not profiling
+_NO_PROFILE = contextlib.nullcontext()
+
+
+def run_generator(generate):
+    """Command line entry point shared by the generate-*.py scripts."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("dataDir", help="folder where data files are located")
+    parser.add_argument("outputDir", help="folder where generated files should be placed")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only regenerate documents whose source records have changed",
+    )
+    parser.add_argument(
+        "--fast-yaml",
+        action="store_true",
+        help="load data files with the libyaml-backed safe loader",
+    )
+    parser.add_argument(
+        "--source-cache",
+        action="store_true",
+        help=f"cache parsed data files in {SOURCE_CACHE_DIR}",
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=OUTPUT_FORMATS,
+        default="files",
+        help="write one JSON file per document, one NDJSON bundle per pack, or both",
+    )
+    parser.add_argument(
+        "--release",
+        action="store_true",
+        help="write minified, key-sorted JSON and report the size saved",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="write a report of the time spent in each phase next to outputDir",
+    )
+    parser.add_argument(
+        "--profile-detail",
+        action="store_true",
+        help="also dump cProfile statistics and measure peak memory (implies --profile)",
+    )
+    args = parser.parse_args()
+
+    use_fast_loader(args.fast_yaml)
+    use_source_cache(SOURCE_CACHE_DIR if args.source_cache else None)
+    output = PackOutput(
+        args.outputDir,
+        args.incremental,
+        script_path=sys.argv[0],
+        output_format=args.output_format,
+        release=args.release,
+    )
+    profile = None
+    if args.profile or args.profile_detail:
+        pack = os.path.basename(os.path.normpath(args.outputDir))
+        profile = PackProfile(pack, args.outputDir, args.profile_detail)
+    with profile or _NO_PROFILE:
+        generate(args.dataDir, output)
+        add_unique_documents(os.path.join(args.dataDir, "..", "unique"), output)
+        output.close()
+    close_source_cache()
+    if profile:
+        print(format_report(profile.write(output)))
+
+
+def generator_path(pack):
+    return os.path.join(BUILD_PACKS_DIR, f"generate-{pack}.py")
+
+
+def load_generator(pack):
+    """Imports generate-<pack>.py as a module."""
+    path = generator_path(pack)
+    if not os.path.isfile(path):
+        raise ValueError(f"No such file {path}")
+    spec = importlib.util.spec_from_file_location(f"generate_{pack}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def pack_data_dir(pack):
+    return os.path.join(PACKS_BASE, pack, "data")
+
+
+def sibling_data_dir(data_dir, pack):
+    """Returns the data directory of pack in the same tree as data_dir, that of another pack."""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(data_dir))), pack, "data")
+
+
+def add_unique_documents(unique_dir, output):
+    """Adds the hand-maintained documents of a pack to its output."""
+    for path in sorted(glob.glob(os.path.join(unique_dir, "*.json"))):
+        output.add_file(path)
+
+
+def compare_dirs(left, right):
+    """Returns the list of JSON files that differ or exist on only one side."""
+    lfiles = {f for f in os.listdir(left) if f.endswith(".json")}
+    rfiles = {f for f in os.listdir(right) if f.endswith(".json")}
+    _, mismatch, errors = filecmp.cmpfiles(
+        left, right, sorted(lfiles & rfiles), shallow=False
+    )
+    return sorted(mismatch + errors + list(lfiles ^ rfiles))
+
+
+def pack_type(pack):
+    """Returns the document type of a pack, as given in its pack.properties."""
+    with open(os.path.join(PACKS_BASE, pack, "pack.properties"), "r", encoding="utf8") as infile:
+        for line in infile:
+            if line.startswith("type="):
+                return line.split("=", 1)[1].strip()
+    raise ValueError(f"No type defined in pack.properties for pack {pack}")
+
+
+def _fvtt_pack(pack, source_dir):
+    subprocess.run(
+        [
+            "fvtt", "package", "pack", "-n", pack, "-v",
+            "--type", "System", "--id", "sohl", "-t", pack_type(pack),
+            "--in", source_dir, "--out", PACKS_OUTPUT_DIR,
+        ],
+        check=True,
+    )
+
+
+def _read_pack_documents(source_dir):
+    for path in sorted(glob.glob(os.path.join(source_dir, "*.json"))):
+        with open(path, "rb") as infile:
+            yield loads(infile.read())
+
+
+def compile_pack(pack, build_dir="build", output_format="files", native=False):
+    """
+    Compiles the generated documents of a pack with the Foundry CLI, from
+    the per-document files if they were written, otherwise from the bundle.
+    If native is set, the pack is written by packlib.compendium instead.
+    """
+    if native:
+        if output_format == "files":
+            documents = _read_pack_documents(os.path.join(build_dir, pack))
+        else:
+            documents = read_bundle(bundle_path(os.path.join(build_dir, pack)))
+        write_pack(os.path.join(PACKS_OUTPUT_DIR, pack), documents)
+    elif output_format == "ndjson":
+        compile_bundle(pack, bundle_path(os.path.join(build_dir, pack)), _fvtt_pack)
+    else:
+        _fvtt_pack(pack, os.path.join(build_dir, pack))
+
+
+def run_pipeline(
+    packs=None,
+    build_dir="build",
+    incremental=False,
+    fast_yaml=False,
+    source_cache=False,
+    output_format="files",
+    release=False,
+    profile=False,
+    profile_detail=False,
+):
+    """
+    Runs the generators for packs (default: all) in this interpreter, in
+    dependency order. Documents stay in memory until every generator has
+    run; actor generators receive the item documents directly rather than
+    reading them back from the build directory. Returns a dict mapping pack
+    name to its PackOutput.
+
+    With profile set, a report of each pack's generation is written next to
+    its build directory (see packlib.profiling).
+    """
+    use_fast_loader(fast_yaml)
+    use_source_cache(SOURCE_CACHE_DIR if source_cache else None)
+    packs = list(packs or PACK_DEPENDENCIES)
+    outputs = {}
+    profiles = {}
+    for pack in [p for p in PACK_DEPENDENCIES if p in packs]:
+        for dep in PACK_DEPENDENCIES[pack]:
+            if dep not in outputs:
+                raise ValueError(f"Pack {pack} requires {dep} to be generated as well")
+        generator = load_generator(pack)
+        output_dir = os.path.join(build_dir, pack)
+        if not incremental and os.path.isdir(output_dir):
+            shutil.rmtree(output_dir)
+        os.makedirs(output_dir, exist_ok=True)
+        output = PackOutput(
+            output_dir,
+            incremental,
+            deferred=True,
+            script_path=generator.__file__,
+            output_format=output_format,
+            release=release,
+        )
+        print(f"Generating pack {pack}")
+        if profile or profile_detail:
+            profiles[pack] = PackProfile(pack, output_dir, profile_detail)
+        with profiles.get(pack, _NO_PROFILE):
+            deps = PACK_DEPENDENCIES[pack]
+            if deps:
+                items = [doc for dep in deps for doc in outputs[dep].documents()]
+                generator.generate(pack_data_dir(pack), output, items)
+            else:
+                generator.generate(pack_data_dir(pack), output)
+            # Before the documents reach dependent packs, as in a standalone
+            # run, where they read the pack back from its build directory
+            add_unique_documents(os.path.join(PACKS_BASE, pack, "unique"), output)
+        outputs[pack] = output
+
+    for pack, output in outputs.items():
+        with profiles.get(pack, _NO_PROFILE):
+            output.close()
+    close_source_cache()
+    for pack, pack_profile in profiles.items():
+        print(format_report(pack_profile.write(outputs[pack])))
+    return outputs
+
+
+def write_packs(outputs, packs_dir=PACKS_OUTPUT_DIR):
+    """
+    Writes the compendium pack of each output returned by run_pipeline(),
+    straight from the documents in memory, without starting the Foundry CLI.
+    """
+    for pack, output in outputs.items():
+        count = write_pack(os.path.join(packs_dir, pack), output.documents())
+        print(f"Wrote {count} entries to compendium pack {pack}")
@@ -0,0 +1,144 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+
+class CycleError(Exception):
+    """Exception raised when the task graph contains a dependency cycle."""
+    pass
+
+
+class TaskFailedError(Exception):
+    """Exception raised when one or more tasks in the graph fail."""
+    pass
+
+
+class TaskGraph:
+    """
+    A set of named tasks and the names of the tasks each one depends on.
+    Each task is a picklable callable run in a worker process.
+    """
+
+    def __init__(self):
+        self.tasks = {}
+        self.deps = {}
+
+    def add(self, name, func, *args, deps=()):
+        self.tasks[name] = (func, args)
+        self.deps[name] = list(deps)
+
+    def subgraph(self, names):
+        """Returns the graph restricted to names and everything they depend on."""
+        wanted = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name in wanted:
+                continue
+            if name not in self.tasks:
+                raise KeyError(f"Unknown task '{name}'")
+            wanted.add(name)
+            stack.extend(self.deps[name])
+        sub = TaskGraph()
+        for name in self.tasks:
+            if name in wanted:
+                func, args = self.tasks[name]
+                sub.add(name, func, *args, deps=self.deps[name])
+        return sub
+
+    def order(self):
+        """Returns the task names in a dependency-respecting order."""
+        result = []
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise CycleError(" -> ".join(path + [name]))
+            if name not in self.tasks:
+                raise KeyError(f"Task '{path[-1]}' depends on unknown task '{name}'")
+            state[name] = "visiting"
+            for dep in self.deps[name]:
+                visit(dep, path + [name])
+            state[name] = "done"
+            result.append(name)
+
+        for name in self.tasks:
+            visit(name, [])
+        return result
+
+
+def _timed(func, args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_graph(graph, max_workers=None, on_complete=None):
+    """
+    Runs every task in the graph in a process pool, starting each task as
+    soon as all of its dependencies have finished. Returns a dict mapping
+    task name to (result, duration in seconds), and calls
+    on_complete(name, result, duration) as each task finishes. If a task
+    raises, no new tasks are started and TaskFailedError is raised once the
+    running tasks have finished.
+    """
+    graph.order()  # Validates the graph before anything is started
+    remaining = {name: set(deps) for name, deps in graph.deps.items()}
+    results = {}
+    failures = {}
+    running = {}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+
+        def submit_ready():
+            for name in [n for n, deps in remaining.items() if not deps]:
+                del remaining[name]
+                func, args = graph.tasks[name]
+                running[pool.submit(_timed, func, args)] = name
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    failures[name] = e
+                    continue
+                if on_complete:
+                    on_complete(name, *results[name])
+                for deps in remaining.values():
+                    deps.discard(name)
+            if not failures:
+                submit_ready()
+
+    if failures:
+        details = ", ".join(f"{name}: {err}" for name, err in failures.items())
+        raise TaskFailedError(f"Failed tasks: {details}")
+    return results
+
+
+def critical_path(graph, durations):
+    """
+    Returns (path, length) for the longest chain of dependent tasks, using the
+    measured duration of each task. This is the lower bound on wall time no
+    matter how many workers are available.
+    """
+    finish = {}
+    via = {}
+    for name in graph.order():
+        prev = max(graph.deps[name], key=lambda d: finish[d], default=None)
+        start = finish[prev] if prev is not None else 0.0
+        finish[name] = start + durations[name]
+        via[name] = prev
+    if not finish:
+        return [], 0.0
+    name = max(finish, key=finish.get)
+    length = finish[name]
+    path = []
+    while name is not None:
+        path.append(name)
+        name = via[name]
+    return list(reversed(path)), length
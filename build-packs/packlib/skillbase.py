@@ -0,0 +1,120 @@
+import re
+
+# Patterns as SkillBase._parseFormula applies them, with JavaScript's ASCII
+# \W and \d
+_SUNSIGN = re.compile(r"\W", re.ASCII)
+_BONUS = re.compile(r"[-+]?\d+", re.ASCII)
+_NUMBER = re.compile(r"[-+]?\d+", re.ASCII)
+
+
+class SkillBaseError(ValueError):
+    """Exception raised when a skill base formula is invalid or refers to an unknown or chained attribute."""
+    pass
+
+
+def parse_formula(formula):
+    """
+    Parses a skill base formula, such as "@str, @int, @sta, 5", exactly as
+    SkillBase._parseFormula in module/sohl-common.js does: case-insensitive
+    comma-separated terms, each an attribute ("@" and its abbrev), a sunsign
+    (starting with a character other than a letter, digit or underscore,
+    with an optional ":" and bonus) or an unsigned integer. Returns the same
+    terms: "attr:abbrev", "ss:name:bonus" and, for each integer, the sum of
+    those so far. Returns None for an empty formula, and raises
+    SkillBaseError where _parseFormula would find the formula invalid.
+    """
+    if not formula:
+        return None
+    terms = []
+    modifier = 0
+    for param in formula.lower().split(","):
+        param = param.strip()
+        if not param:
+            continue
+        if param.startswith("@"):
+            if len(param) == 1:
+                raise SkillBaseError(f"Skill base formula {formula!r} has an empty attribute")
+            terms.append(f"attr:{param[1:]}")
+        elif _SUNSIGN.match(param):
+            parts = param.split(":")
+            if len(parts) > 2:
+                raise SkillBaseError(f"Skill base formula {formula!r} has an invalid sunsign {param!r}")
+            bonus = 1
+            if len(parts) == 2:
+                match = _BONUS.match(parts[1].strip())
+                if not match:
+                    raise SkillBaseError(f"Skill base formula {formula!r} has an invalid sunsign bonus {param!r}")
+                bonus = int(match.group(0))
+            terms.append(f"ss:{parts[0].strip()}:{bonus}")
+        elif _NUMBER.fullmatch(param):
+            modifier += int(param)
+            terms.append(modifier)
+        else:
+            raise SkillBaseError(f"Skill base formula {formula!r} has an invalid term {param!r}")
+    return terms
+
+
+def formula_attributes(terms):
+    """Returns the abbrevs of the attributes among the parsed terms of a formula."""
+    return [term[5:] for term in terms if isinstance(term, str) and term.startswith("attr:")]
+
+
+def attribute_index(traits):
+    """Returns the numeric attribute traits among traits.yaml records, keyed by their lowercased abbrev."""
+    index = {}
+    for trait in traits:
+        if trait.get("intensity") == "attribute" and trait.get("isNumeric") and trait.get("abbrev"):
+            index[trait["abbrev"].lower()] = trait
+    return index
+
+
+def _chained(abbrev, trait):
+    """Returns whether the skill base formula of the attribute trait refers to other attributes."""
+    terms = parse_formula(trait.get("skillBaseFormula")) or []
+    return any(other != abbrev for other in formula_attributes(terms))
+
+
+def referenced_attributes(rec, index):
+    """
+    Returns the attribute traits of index the skill base formula of rec
+    refers to. The game evaluates an attribute term from the stored value
+    of the attribute, never from its skill base, so skill bases can be
+    computed in any order as long as no formula refers to an attribute
+    whose own skill base refers to other attributes; raises SkillBaseError
+    if one does, as it does for unknown attributes.
+    """
+    terms = parse_formula(rec.get("skillBaseFormula"))
+    if not terms:
+        return []
+    attributes = formula_attributes(terms)
+    missing = [abbrev for abbrev in attributes if abbrev not in index]
+    if missing:
+        raise SkillBaseError(
+            f"{rec['name']}: skill base formula {rec['skillBaseFormula']!r} refers to "
+            f"unknown attributes {', '.join('@' + abbrev for abbrev in missing)}"
+        )
+    chained = [abbrev for abbrev in dict.fromkeys(attributes) if _chained(abbrev, index[abbrev])]
+    if chained:
+        raise SkillBaseError(
+            f"{rec['name']}: skill base formula {rec['skillBaseFormula']!r} refers to "
+            f"attributes whose skill base refers to other attributes: "
+            f"{', '.join('@' + abbrev for abbrev in chained)}"
+        )
+    return [index[abbrev] for abbrev in dict.fromkeys(attributes)]
+
+
+def add_skill_base(rec, out, attributes):
+    """
+    Embeds the parsed skill base formula of rec in the sohl flags of its
+    document out: the formula it was parsed from, so that the game can tell
+    when it has been edited since, its terms, and dependsOn, the ids of the
+    attribute traits it refers to, as returned by referenced_attributes().
+    """
+    formula = rec.get("skillBaseFormula")
+    terms = parse_formula(formula)
+    if terms is not None:
+        out["flags"].setdefault("sohl", {})["skillBase"] = {
+            "formula": formula,
+            "terms": terms,
+            "dependsOn": [trait["id"] for trait in attributes],
+        }
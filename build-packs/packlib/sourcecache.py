@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+INDEX_NAME = "index.json"
+CACHE_VERSION = 1
+
+
+class SourceCache:
+    """
+    On-disk cache of parsed data files, stored as pickles.
+
+    Entries are found by file path, size and modification time, and stored
+    under the SHA-256 of the file contents and the name of the loader that
+    parsed them, so a file that was merely touched (or copied elsewhere) is
+    still served from the cache after hashing it. When the cache grows past
+    max_bytes, the least recently used entries are evicted.
+
+    The index of entries and their access times is kept in memory and
+    written once, by close().
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = self._read_index()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.cache_dir, INDEX_NAME)
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf8") as infile:
+                data = json.load(infile)
+        except (OSError, ValueError):
+            return {"version": CACHE_VERSION, "files": {}, "blobs": {}}
+        if data.get("version") != CACHE_VERSION:
+            return {"version": CACHE_VERSION, "files": {}, "blobs": {}}
+        return data
+
+    def _write_index(self):
+        # Written atomically, since parallel pack builds share the cache
+        fd, tmppath = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf8") as outfile:
+            json.dump(self.index, outfile)
+        os.replace(tmppath, self.index_path)
+
+    def _blob_path(self, blob):
+        return os.path.join(self.cache_dir, blob + ".pickle")
+
+    def _read_blob(self, blob):
+        try:
+            with open(self._blob_path(blob), "rb") as infile:
+                return pickle.load(infile)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def load(self, path, loader, parse):
+        """
+        Returns the parsed contents of path. On a cache miss, parse(text) is
+        called and its result stored; loader names the parser, so results
+        from different loaders are kept apart.
+        """
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        fkey = f"{loader}:{path}"
+        entry = self.index["files"].get(fkey)
+        if entry and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime_ns:
+            data = self._read_blob(entry["blob"])
+            if data is not None:
+                self._touch(entry["blob"])
+                self.hits += 1
+                return data
+
+        with open(path, "rb") as infile:
+            raw = infile.read()
+        blob = hashlib.sha256(raw).hexdigest() + "-" + loader
+        self.index["files"][fkey] = {
+            "size": st.st_size,
+            "mtime": st.st_mtime_ns,
+            "blob": blob,
+        }
+        data = self._read_blob(blob) if blob in self.index["blobs"] else None
+        if data is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            data = parse(raw.decode("utf8"))
+            self._store(blob, data)
+        self._touch(blob)
+        return data
+
+    def close(self):
+        """
+        Writes the index if entries were added or used since it was read,
+        evicting the least recently used entries first. Entries added by
+        other builds sharing the cache in the meantime are kept.
+        """
+        if not self.dirty:
+            return
+        current = self._read_index()
+        blobs = self.index["blobs"]
+        for blob, entry in current["blobs"].items():
+            if blob not in blobs and os.path.isfile(self._blob_path(blob)):
+                blobs[blob] = entry
+        for fkey, entry in current["files"].items():
+            self.index["files"].setdefault(fkey, entry)
+        self._evict()
+        self._write_index()
+        self.dirty = False
+
+    def _store(self, blob, data):
+        fd, tmppath = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as outfile:
+            pickle.dump(data, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmppath, self._blob_path(blob))
+        self.index["blobs"][blob] = {
+            "size": os.path.getsize(self._blob_path(blob)),
+            "used": time.time(),
+        }
+
+    def _touch(self, blob):
+        if blob in self.index["blobs"]:
+            self.index["blobs"][blob]["used"] = time.time()
+            self.dirty = True
+
+    def _evict(self):
+        blobs = self.index["blobs"]
+        total = sum(b["size"] for b in blobs.values())
+        for blob in sorted(blobs, key=lambda b: blobs[b]["used"]):
+            if total <= self.max_bytes:
+                break
+            total -= blobs[blob]["size"]
+            del blobs[blob]
+            try:
+                os.remove(self._blob_path(blob))
+            except OSError:
+                pass
+        self.index["files"] = {
+            k: v for k, v in self.index["files"].items() if v["blob"] in blobs
+        }
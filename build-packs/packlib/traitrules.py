@@ -0,0 +1,161 @@
+from packlib.docspec import Field, compile_template
+
+# Value of a trait rule's change that is the trait's own value
+TRAIT_VALUE = object()
+
+# Tests deciding whether a trait rule applies to a trait value
+TRUTHY = "truthy"
+POSITIVE = "positive"
+
+# Strike mode traits, in the order their changes are added to the strike
+# mode's effect: (trait, source field, change key, change mode, change
+# value, test).
+STRIKE_MODE_TRAITS = [
+    ("armorReduction", "AR", "mod:system.$impact.armorReduction", 2, TRAIT_VALUE, POSITIVE),
+    ("blockMod", "blockMod", "mod:system.$defense.block", 2, TRAIT_VALUE, TRUTHY),
+    ("counterMod", "counterMod", "mod:system.$defense.counterstrike", 2, TRAIT_VALUE, TRUTHY),
+    ("meleeMod", "meleeMod", "mod:system.$attack.block", 2, TRAIT_VALUE, TRUTHY),
+    ("opponentDef", "oppDef", "system.$traits.opponentDef", 2, TRAIT_VALUE, TRUTHY),
+    ("deflectTN", "deflectTN", "system.$traits.deflectTN", 5, TRAIT_VALUE, TRUTHY),
+    ("entangle", "entangle", "system.$traits.entangle", 5, "true", TRUTHY),
+    ("envelop", "envelop", "system.$traits.envelop", 5, "true", TRUTHY),
+    ("couched", "couched", "system.$traits.couched", 5, TRAIT_VALUE, TRUTHY),
+    ("impactTA", "impTA", "system.$traits.impactTA", 5, TRAIT_VALUE, TRUTHY),
+    ("long", "long", "system.$traits.long", 5, "true", TRUTHY),
+    ("onlyInClose", "onlyInClose", "system.$traits.onlyInClose", 5, "true", TRUTHY),
+    ("shieldMod", "shieldMod", "system.$traits.shieldMod", 5, "true", TRUTHY),
+    ("slow", "slow", "system.$traits.slow", 5, "true", TRUTHY),
+    ("thrust", "thrust", "system.$traits.thrust", 5, "true", TRUTHY),
+    ("swung", "swung", "system.$traits.swung", 5, "true", TRUTHY),
+    ("bleed", "bleed", "system.$traits.extraBleedRisk", 5, "true", TRUTHY),
+    ("twoHandLen", "2hLength", "system.$traits.twoHandLen", 2, TRAIT_VALUE, TRUTHY),
+    ("noStrMod", "noStrMod", "system.$traits.noStrMod", 5, "true", TRUTHY),
+    ("halfImpact", "halfImpact", "system.$traits.halfImpact", 5, "true", TRUTHY),
+    ("durMod", "durabilityMod", "mod:system.$durability", 2, TRAIT_VALUE, TRUTHY),
+    ("blockSLMod", "blockSLMod", "system.$defense.block.successLevelMod", 2, TRAIT_VALUE, TRUTHY),
+    ("cxSLMod", "cxSLMod", "system.$defense.counterstrike.successLevelMod", 2, TRAIT_VALUE, TRUTHY),
+    ("noAttack", "noAttack", "system.$traits.noAttack", 5, "true", TRUTHY),
+    ("noBlock", "noBlock", "system.$traits.noBlock", 5, "true", TRUTHY),
+    ("lowAim", "lowAim", "system.$traits.lowAim", 5, "true", TRUTHY),
+    # Read for the halfSword rewrite, which adds its own change
+    ("halfSword", "halfSword", None, None, None, None),
+]
+
+# Rewrites of a strike mode by the part of the weapon it strikes with,
+# applied in order before the trait rules. Each applies when its trait is
+# set (and the strike mode has the given subType, if any), and may:
+#   zoneDie      set the legendary zone die
+#   zoneDieStep  add to the legendary zone die, if it is larger than 4
+#   impact       set impact fields
+#   bluntImpact  set impact fields, if the impact aspect is blunt
+#   traits       override trait values
+#   changes      add (key, mode, value) effect changes
+STRIKE_MODE_REWRITES = [
+    {
+        "trait": "shaft",
+        "subType": "legendary",
+        "zoneDie": 8,
+        "impact": {"die": 6, "modifier": 1, "aspect": "blunt"},
+        "traits": {"slow": False, "thrust": False},
+        "changes": [("mod:system.$length", 2, -2)],
+    },
+    {
+        "trait": "pommel",
+        "subType": "legendary",
+        "zoneDie": 4,
+        "impact": {"die": 6, "modifier": 0, "aspect": "blunt"},
+        "changes": [("mod:system.$length", 5, 1)],
+    },
+    {
+        "trait": "halfSword",
+        "bluntImpact": {"modifier": 0, "die": 6},
+        "zoneDieStep": -2,
+        "traits": {"thrust": True},
+        "changes": [
+            ("mod:system.$length", 2, -2),
+            ("mod:system.$length", 4, 3),
+            ("system.$traits.halfSword", 5, "true"),
+        ],
+    },
+]
+
+
+def effect_change(key, mode, value):
+    """Returns an active effect change."""
+    return {"key": key, "mode": mode, "value": value, "priority": None}
+
+
+def record_changes(effectChanges):
+    """
+    Returns the active effect changes listed explicitly in a data file
+    record, such as the effectChanges of combattechsm.yaml, normalized the
+    way the rule-generated changes are: integer mode, string value.
+    """
+    return [
+        effect_change(chg["key"], int(chg["mode"]), str(chg["value"]))
+        for chg in effectChanges
+    ]
+
+
+def _test_source(test):
+    if test == POSITIVE:
+        return "v > 0"
+    if test == TRUTHY:
+        return "v"
+    raise ValueError(f"Unknown trait rule test {test!r}")
+
+
+def compile_trait_rules(rules):
+    """
+    Compiles a trait rule table into two functions: read_traits(rec), which
+    returns the dict of trait values of a source record, and
+    trait_changes(traits), which returns the effect changes for those
+    values, in table order.
+    """
+    read_traits = compile_template({trait: Field(field) for trait, field, *_ in rules})
+
+    names = {}
+    lines = ["def trait_changes(traits):", "    changes = []"]
+    for trait, field, key, mode, value, test in rules:
+        if key is None:
+            continue
+        if value is TRAIT_VALUE:
+            value_source = "v"
+        else:
+            value_source = f"_v{len(names)}"
+            names[value_source] = value
+        lines.append(f"    v = traits[{trait!r}]")
+        lines.append(f"    if {_test_source(test)}:")
+        lines.append(
+            f"        changes.append({{'key': {key!r}, 'mode': {mode!r}, "
+            f"'value': {value_source}, 'priority': None}})"
+        )
+    lines.append("    return changes")
+    namespace = dict(names)
+    exec("\n".join(lines) + "\n", namespace)
+    return read_traits, namespace["trait_changes"]
+
+
+def apply_rewrites(rewrites, rec, sm, traits, changes):
+    """
+    Applies the rewrites whose trait is set in the source record rec to the
+    strike mode document sm, its trait values and its effect changes.
+    """
+    impact = sm["system"]["impactBase"]
+    for rewrite in rewrites:
+        if not rec[rewrite["trait"]]:
+            continue
+        if rewrite.get("subType", rec["subType"]) != rec["subType"]:
+            continue
+        if "bluntImpact" in rewrite and impact["aspect"] == "blunt":
+            impact.update(rewrite["bluntImpact"])
+        if not "sohl" in sm["flags"]:
+            sm["flags"] = {"sohl": {"legendary": {}}}
+        legendary = sm["flags"]["sohl"].setdefault("legendary", {})
+        if "zoneDie" in rewrite:
+            legendary["zoneDie"] = rewrite["zoneDie"]
+        if "zoneDieStep" in rewrite and legendary.get("zoneDie", 0) > 4:
+            legendary["zoneDie"] += rewrite["zoneDieStep"]
+        impact.update(rewrite.get("impact", {}))
+        traits.update(rewrite.get("traits", {}))
+        changes.extend(effect_change(*chg) for chg in rewrite.get("changes", []))
@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+from packlib.pipeline import PACK_DEPENDENCIES, PACKS_BASE, SOURCE_DEPENDENCIES
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+# Directories of a pack whose files feed its build
+WATCHED_DIRS = ("data", "unique")
+WATCHED_SUFFIXES = (".yaml", ".json")
+
+# Seconds without further changes before a batch of changes is reported, so
+# that an editor saving several files (or one file in several writes)
+# triggers a single rebuild
+DEFAULT_SETTLE = 0.3
+
+
+def watched_dirs(packs, packs_base=PACKS_BASE):
+    """Returns the existing data and unique directories of packs."""
+    paths = [os.path.join(packs_base, pack, sub) for pack in packs for sub in WATCHED_DIRS]
+    return [path for path in paths if os.path.isdir(path)]
+
+
+def _watched(path):
+    return path.endswith(WATCHED_SUFFIXES) and not os.path.basename(path).startswith(".")
+
+
+def snapshot(dirs):
+    """Returns the size and modification time of each watched file in dirs, keyed by path."""
+    files = {}
+    for dir in dirs:
+        for entry in os.scandir(dir):
+            if entry.is_file() and _watched(entry.path):
+                st = entry.stat()
+                files[entry.path] = (st.st_size, st.st_mtime_ns)
+    return files
+
+
+def changed_packs(paths, packs_base=PACKS_BASE):
+    """Returns the names of the packs the changed files at paths belong to."""
+    base = os.path.abspath(packs_base)
+    packs = set()
+    for path in paths:
+        rel = os.path.relpath(os.path.abspath(path), base).split(os.sep)
+        if len(rel) == 3 and rel[1] in WATCHED_DIRS and rel[0] in PACK_DEPENDENCIES:
+            packs.add(rel[0])
+    return packs
+
+
+def data_readers(packs):
+    """Returns packs and every pack that reads the data files of one of them."""
+    result = set(packs)
+    result.update(pack for pack, sources in SOURCE_DEPENDENCIES.items() if result.intersection(sources))
+    return result
+
+
+def dependents(packs):
+    """
+    Returns data_readers(packs) and every pack that reads, directly or not,
+    the documents of one of them.
+    """
+    result = data_readers(packs)
+    grew = True
+    while grew:
+        grew = False
+        for pack, deps in PACK_DEPENDENCIES.items():
+            if pack not in result and result.intersection(deps):
+                result.add(pack)
+                grew = True
+    return result
+
+
+def with_dependencies(packs):
+    """Returns packs and every pack they read documents from, in build order."""
+    needed = set(packs)
+    for pack in reversed(list(PACK_DEPENDENCIES)):
+        if pack in needed:
+            needed.update(PACK_DEPENDENCIES[pack])
+    return [pack for pack in PACK_DEPENDENCIES if pack in needed]
+
+
+class PollingWatcher:
+    """Detects changes to the files in dirs by comparing snapshots every interval seconds."""
+
+    def __init__(self, dirs, interval=1.0, settle=DEFAULT_SETTLE):
+        self.dirs = dirs
+        self.interval = interval
+        self.settle = settle
+        self.files = snapshot(dirs)
+
+    def _changes(self):
+        files = snapshot(self.dirs)
+        changed = {
+            path
+            for path in files.keys() | self.files.keys()
+            if files.get(path) != self.files.get(path)
+        }
+        self.files = files
+        return changed
+
+    def wait(self):
+        """Blocks until files change, and returns the set of their paths."""
+        while True:
+            time.sleep(self.interval)
+            changed = self._changes()
+            if changed:
+                break
+        while True:
+            time.sleep(self.settle)
+            more = self._changes()
+            if not more:
+                return changed
+            changed |= more
+
+    def close(self):
+        pass
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.changed = set()
+        self.event = threading.Event()
+        self.last = 0.0
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        paths = {os.fsdecode(p) for p in paths if p and _watched(os.fsdecode(p))}
+        if event.event_type in ("opened", "closed_no_write") or not paths:
+            return
+        with self.lock:
+            self.changed |= paths
+            self.last = time.monotonic()
+        self.event.set()
+
+
+class NotifyWatcher:
+    """Detects changes to the files in dirs through filesystem notifications, using watchdog."""
+
+    def __init__(self, dirs, settle=DEFAULT_SETTLE):
+        self.settle = settle
+        self.handler = _ChangeHandler()
+        self.observer = Observer()
+        for dir in dirs:
+            self.observer.schedule(self.handler, dir, recursive=False)
+        self.observer.start()
+
+    def wait(self):
+        """Blocks until files change, and returns the set of their paths."""
+        handler = self.handler
+        while True:
+            handler.event.wait()
+            with handler.lock:
+                quiet = time.monotonic() - handler.last
+                if quiet >= self.settle:
+                    changed, handler.changed = handler.changed, set()
+                    handler.event.clear()
+                    return changed
+            time.sleep(self.settle - quiet)
+
+    def close(self):
+        self.observer.stop()
+        self.observer.join()
+
+
+def make_watcher(dirs, poll=False, interval=1.0):
+    """
+    Returns a watcher of dirs: a NotifyWatcher if watchdog is installed and
+    poll is not set, a PollingWatcher checking every interval seconds
+    otherwise.
+    """
+    if Observer is not None and not poll:
+        return NotifyWatcher(dirs)
+    return PollingWatcher(dirs, interval)
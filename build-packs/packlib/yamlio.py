@@ -0,0 +1,110 @@
+import os
+import yaml as pyyaml
+from ruamel.yaml import YAML
+from yaml.composer import Composer
+from yaml.constructor import SafeConstructor
+from yaml.resolver import Resolver
+from packlib.phases import phase, timed_iter
+from packlib.sourcecache import DEFAULT_MAX_BYTES, SourceCache
+
+# libyaml-backed loader when PyYAML was built with it, pure Python otherwise
+FastLoader = getattr(pyyaml, "CSafeLoader", pyyaml.SafeLoader)
+
+if FastLoader is pyyaml.SafeLoader:
+    _RecordLoader = pyyaml.SafeLoader
+else:
+    from yaml._yaml import CParser
+
+    class _RecordLoader(CParser, Composer, SafeConstructor, Resolver):
+        """
+        CSafeLoader only composes whole documents; pairing libyaml's event
+        parser with the Python composer lets us build one list item at a time.
+        """
+
+        def __init__(self, stream):
+            CParser.__init__(self, stream)
+            Composer.__init__(self)
+            SafeConstructor.__init__(self)
+            Resolver.__init__(self)
+
+_rt_yaml = YAML(typ="rt")
+_fast = False
+_cache = None
+
+
+def use_fast_loader(fast=True):
+    """
+    Selects the loader used by load_yaml(). The default is ruamel's
+    round-trip loader, which preserves comments and formatting we never
+    use; the fast loader is PyYAML's safe loader, backed by libyaml when
+    available. check-yaml-parity.py verifies both produce identical output.
+    """
+    global _fast
+    _fast = fast
+
+
+def use_source_cache(cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Enables (or, with cache_dir None, disables) the on-disk cache of parsed
+    data files used by load_yaml().
+    """
+    global _cache
+    close_source_cache()
+    _cache = SourceCache(cache_dir, max_bytes) if cache_dir else None
+
+
+def close_source_cache():
+    """Writes the index of the source cache, if enabled, once the data files have been loaded."""
+    if _cache:
+        _cache.close()
+
+
+def loader_name():
+    return f"PyYAML {FastLoader.__name__}" if _fast else "ruamel round-trip"
+
+
+def _parse(stream):
+    if _fast:
+        return pyyaml.load(stream, Loader=FastLoader)
+    return _rt_yaml.load(stream)
+
+
+def load_yaml(path):
+    with phase("load"):
+        if _cache:
+            return _cache.load(path, "fast" if _fast else "rt", _parse)
+        with open(path, "r", encoding="utf8") as infile:
+            return _parse(infile)
+
+
+def iter_yaml(path):
+    """
+    Yields the records of a data file whose top level is a list, one at a
+    time. With the fast loader (and no source cache) the file is streamed,
+    so each record is constructed only when the caller asks for it and can
+    be released as soon as it has been transformed; otherwise the whole
+    file is loaded first.
+    """
+    return timed_iter("load", _iter_records(path), source=os.path.basename(path))
+
+
+def _iter_records(path):
+    if not _fast or _cache:
+        yield from load_yaml(path) or []
+        return
+    with open(path, "r", encoding="utf8") as infile:
+        loader = _RecordLoader(infile)
+        try:
+            loader.get_event()  # StreamStartEvent
+            if loader.check_event(pyyaml.StreamEndEvent):
+                return
+            loader.get_event()  # DocumentStartEvent
+            if loader.check_event(pyyaml.ScalarEvent) and loader.peek_event().value == "":
+                return  # Empty document
+            if not loader.check_event(pyyaml.SequenceStartEvent):
+                raise ValueError(f"{path}: top level is not a list")
+            loader.get_event()
+            while not loader.check_event(pyyaml.SequenceEndEvent):
+                yield loader.construct_document(loader.compose_node(None, None))
+        finally:
+            loader.dispose()
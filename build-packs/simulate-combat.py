@@ -0,0 +1,188 @@
+#!./venv/bin/python3
+
+import argparse
+import json
+import os
+import sys
+import time
+from packlib.bundle import read_pack_documents
+from packlib.combatsim import (
+    COMBAT_TABLES,
+    DEFENSES,
+    HitLocations,
+    SimulationError,
+    armor_profiles,
+    find_anatomy,
+    np,
+    require_numpy,
+    simulate,
+    summarize,
+    weapon_strike_modes,
+)
+from packlib.pipeline import BUILD_PACKS_DIR
+
+
+def _matches(name, patterns):
+    return not patterns or any(p.casefold() in name.casefold() for p in patterns)
+
+
+def format_summary(summary):
+    outcomes = summary["outcomes"]
+    impact = summary["impact"]
+    fumbles = outcomes["atkFumble"] + outcomes["atkStumble"] + outcomes["wild"]
+    return (
+        f"{summary['weapon'] + ' (' + summary['mode'] + ')':<36} {summary['armor']:<24} "
+        f"hit {outcomes['attackHit']:6.1%}  "
+        f"blocked {outcomes['block'] + outcomes['miss']:6.1%}  "
+        f"fumble {fumbles:5.1%}  "
+        f"countered {outcomes['counterHit']:6.1%}  "
+        f"impact {impact['mean']:5.2f} (p90 {impact['p90']:>2}, "
+        f"{impact['penetrating']:6.1%} through)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulate attack and defense exchanges between the weapons and "
+        "armors of the generated possessions pack, and report the outcome "
+        "distribution of each weapon against each armor"
+    )
+    parser.add_argument(
+        "-w",
+        "--weapon",
+        action="append",
+        default=[],
+        help="simulate the weapons whose name contains this (repeatable; default: all)",
+    )
+    parser.add_argument(
+        "-a",
+        "--armor",
+        action="append",
+        default=[],
+        help="against the armors whose name contains this (repeatable; default: all)",
+    )
+    parser.add_argument(
+        "-d",
+        "--defense",
+        choices=DEFENSES,
+        default="block",
+        help="how the defender responds (default: block)",
+    )
+    parser.add_argument(
+        "-n",
+        "--exchanges",
+        type=int,
+        default=1000000,
+        help="exchanges simulated per pairing (default: 1000000)",
+    )
+    parser.add_argument(
+        "--attack-ml", type=int, default=70, help="attacker's mastery level (default: 70)"
+    )
+    parser.add_argument(
+        "--defense-ml", type=int, default=70, help="defender's mastery level (default: 70)"
+    )
+    parser.add_argument(
+        "--defender",
+        help="strike mode the defender blocks and counterstrikes with, the first whose "
+        "'weapon (mode)' contains this (default: the attacker's own)",
+    )
+    parser.add_argument(
+        "--anatomy", default="Humanoid", help="anatomy of the defender (default: Humanoid)"
+    )
+    parser.add_argument("--seed", type=int, help="seed of the random generator")
+    parser.add_argument(
+        "-b",
+        "--build-dir",
+        default=os.path.join(BUILD_PACKS_DIR, "build"),
+        help="build directory of the generated packs",
+    )
+    parser.add_argument("-o", "--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    try:
+        require_numpy()
+        possessions = read_pack_documents(args.build_dir, "possessions")
+        anatomy = find_anatomy(read_pack_documents(args.build_dir, "characteristics"), args.anatomy)
+    except (SimulationError, FileNotFoundError) as e:
+        print(f"\033[0;31mERROR:\033[0m {e}", file=sys.stderr)
+        return 2
+    locations = HitLocations(anatomy)
+    armors = [None] + [a for a in armor_profiles(possessions) if _matches(a["name"], args.armor)]
+    if args.armor:
+        armors = armors[1:]
+    allProfiles = list(weapon_strike_modes(possessions))
+    profiles = [p for p in allProfiles if _matches(p["weapon"], args.weapon)]
+    defender = None
+    if args.defender:
+        defender = next(
+            (
+                p
+                for p in allProfiles
+                if p["type"] == "meleestrikemode" and _matches(f"{p['weapon']} ({p['mode']})", [args.defender])
+            ),
+            None,
+        )
+        if defender is None:
+            print(f"\033[0;31mERROR:\033[0m No melee strike mode matches {args.defender}", file=sys.stderr)
+            return 2
+        print(f"Defender: {defender['weapon']} ({defender['mode']}), wearing each armor")
+    else:
+        print("Defender: the attacker's own strike mode, wearing each armor")
+
+    rng = np.random.default_rng(args.seed)
+    summaries = []
+    exchanges = 0
+    start = time.perf_counter()
+    for profile in profiles:
+        if profile["noAttack"]:
+            continue
+        if args.defense not in COMBAT_TABLES[profile["type"]]:
+            print(f"Skipping {profile['weapon']} ({profile['mode']}): no {args.defense} against it")
+            continue
+        if args.defense == "block" and (defender or profile)["noBlock"]:
+            print(f"Skipping {profile['weapon']} ({profile['mode']}): the defender cannot block")
+            continue
+        results = simulate(
+            profile,
+            armors,
+            locations,
+            args.defense,
+            args.exchanges,
+            args.attack_ml,
+            args.defense_ml,
+            rng=rng,
+            defender=defender,
+        )
+        exchanges += args.exchanges
+        for result in results:
+            summary = summarize(result)
+            summaries.append(summary)
+            print(format_summary(summary))
+    elapsed = time.perf_counter() - start
+    if exchanges:
+        # Each exchange is rolled once and scored against every armor
+        print(
+            f"Simulated {exchanges} exchanges, each against {len(armors)} armors, in "
+            f"{elapsed:.2f}s ({exchanges / elapsed / 1e6:.2f}M exchanges/s, "
+            f"{exchanges * len(armors) / elapsed / 1e6:.0f}M weapon-armor exchanges/s)"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as outfile:
+            json.dump(
+                {
+                    "attackML": args.attack_ml,
+                    "defenseML": args.defense_ml,
+                    "anatomy": args.anatomy,
+                    "defender": f"{defender['weapon']} ({defender['mode']})" if defender else None,
+                    "results": summaries,
+                },
+                outfile,
+                indent=1,
+            )
+            outfile.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+#!./venv/bin/python3
+
+import argparse
+import os
+import sys
+import time
+from packlib.depgraph import DependencyGraph
+from packlib.output import OUTPUT_FORMATS
+from packlib.pipeline import (
+    BUILD_PACKS_DIR,
+    PACK_DEPENDENCIES,
+    SOURCE_DEPENDENCIES,
+    compile_pack,
+    run_pipeline,
+)
+from packlib.watcher import (
+    Observer,
+    changed_packs,
+    data_readers,
+    dependents,
+    make_watcher,
+    watched_dirs,
+    with_dependencies,
+)
+
+BUILD_DIR = os.path.join(BUILD_PACKS_DIR, "build")
+
+
+def _build(packs, args):
+    return run_pipeline(
+        with_dependencies(packs),
+        BUILD_DIR,
+        incremental=True,
+        fast_yaml=args.fast_yaml,
+        source_cache=True,
+        output_format=args.output_format,
+    )
+
+
+def _regenerated_keys(output):
+    entries = output.dependencies.entries
+    return {entries[fname]["key"] for fname in output.generated}
+
+
+def rebuild(packs, changed, args):
+    """
+    Rebuilds incrementally the packs whose files changed (all packs if
+    changed is empty) and those reading their data files, then those of
+    packs with a document embedding one that was regenerated, according to
+    the dependency graph. Recompiles the
+    packs that had files changed or documents regenerated.
+    """
+    start = time.perf_counter()
+    outputs = _build([p for p in packs if p in data_readers(changed)] if changed else packs, args)
+    rest = [p for p in packs if p not in outputs]
+    if rest:
+        keys = set().union(*(_regenerated_keys(output) for output in outputs.values()))
+        removed = any(output.manifest.removed for output in outputs.values())
+        graph = DependencyGraph.load(BUILD_DIR, rest)
+        users = {graph.packs.get(node) for node in graph.dependents(keys)}
+        affected = [p for p in rest if removed or p in users]
+        if affected:
+            for pack, output in _build(affected, args).items():
+                outputs.setdefault(pack, output)
+
+    compiled = []
+    for pack in packs:
+        if pack not in outputs:
+            continue
+        manifest = outputs[pack].manifest
+        if pack in changed or manifest.written or manifest.removed:
+            if not args.no_compile:
+                compile_pack(pack, BUILD_DIR, args.output_format, args.native)
+            compiled.append(f"{pack} ({manifest.written} regenerated, {manifest.removed} removed)")
+    elapsed = time.perf_counter() - start
+    print(f"Rebuilt {', '.join(compiled) or 'nothing'} in {elapsed:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Watch the pack data files and rebuild the documents and "
+        "packs affected by each change"
+    )
+    parser.add_argument("packs", nargs="*", help="packs to watch (default: all)")
+    parser.add_argument(
+        "-f",
+        "--fast-yaml",
+        action="store_true",
+        help="load data files with the libyaml-backed safe loader",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-format",
+        choices=OUTPUT_FORMATS,
+        default="files",
+        help="write one JSON file per document, one NDJSON bundle per pack, or both",
+    )
+    parser.add_argument(
+        "-n",
+        "--native",
+        action="store_true",
+        help="write the compendium packs from Python instead of the Foundry CLI",
+    )
+    parser.add_argument(
+        "--no-compile", action="store_true", help="only regenerate the build directories"
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="poll for changes instead of using filesystem notifications",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=1.0, help="seconds between polls (default: 1)"
+    )
+    args = parser.parse_args()
+
+    packs = [p for p in PACK_DEPENDENCIES if p in (args.packs or PACK_DEPENDENCIES)]
+    packs = [p for p in PACK_DEPENDENCIES if p in dependents(packs)]
+    # Also the packs whose data files the watched packs read
+    sources = {dep for pack in packs for dep in SOURCE_DEPENDENCIES.get(pack, [])}
+    watcher = make_watcher(watched_dirs(packs + sorted(sources - set(packs))), args.poll, args.interval)
+    how = "notifications" if Observer is not None and not args.poll else "polling"
+    try:
+        # Brings the build directories up to date with changes made while
+        # not watching
+        rebuild(packs, set(), args)
+        print(f"Watching {', '.join(packs)} for changes ({how}); press Ctrl-C to stop")
+        while True:
+            paths = watcher.wait()
+            changed = changed_packs(paths)
+            if not changed:
+                continue
+            for path in sorted(paths):
+                print(f"Changed: {os.path.relpath(path)}")
+            try:
+                rebuild([p for p in packs if p in dependents(changed)], changed, args)
+            except Exception as e:
+                # Most likely a data file saved half-edited; keep watching
+                # and retry on the next change
+                print(f"\033[0;31mERROR:\033[0m {e}", file=sys.stderr)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
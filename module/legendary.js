@@ -255,6 +255,18 @@ function LgndStrikeModeItemDataMixin(BaseMLID) {
             return this.item.getFlag("sohl", "legendary.zoneDie") || 0;
         }
 
+        /**
+         * Rolls the zone struck on the zone die of this strike mode.
+         *
+         * @override
+         * @returns {number|null} The zone, or null without a zone die
+         */
+        rollAim() {
+            return this.zoneDie
+                ? Math.floor(Math.random() * this.zoneDie) + 1
+                : null;
+        }
+
         static get tactialAdvantages() {
             return {
                 action: "Action",
@@ -2760,10 +2772,86 @@ class LgndAfflictionItemData extends sohl.AfflictionItemData {
 
 class LgndAnatomyItemData extends sohl.AnatomyItemData {
     $maxZones;
+    $hitTables;
+
+    /**
+     * Cumulative hit tables of each zone, precomputed by the pack build from
+     * the body part and body location probability weights, or built from
+     * the actor's body zones, parts and locations if the anatomy has none.
+     */
+    get hitTables() {
+        if (!this.$hitTables) {
+            this.$hitTables = this.hasCompiledHitTables
+                ? this.item.getFlag("sohl", "legendary.hitTables") || {}
+                : this.liveHitTables() || {};
+        }
+        return this.$hitTables;
+    }
+
+    /**
+     * Builds the hit table of each zone from the body zones, parts and
+     * locations of the actor, as the pack build does: a hit in a zone falls
+     * on a body part of one of the body zones covering it, chosen by the
+     * parts' probability weights, then on one of that part's body locations,
+     * chosen by theirs.
+     *
+     * @returns {object|null} The hit tables keyed by zone, or null without an actor
+     */
+    liveHitTables() {
+        if (!this.actor) return null;
+        const parts = {};
+        for (const it of this.actor.allItems()) {
+            if (
+                it.system instanceof LgndBodyZoneItemData &&
+                it.nestedIn?.id === this.id
+            ) {
+                for (const zone of it.system.zoneNumbers) {
+                    parts[zone] ||= [];
+                    parts[zone].push(...(it.system.$bodyParts || []));
+                }
+            }
+        }
+        const tables = {};
+        for (const [zone, bodyParts] of Object.entries(parts)) {
+            const entries = [];
+            for (const bodyPart of bodyParts) {
+                const locations = (bodyPart.system.$bodyLocations || []).map(
+                    (loc) => [loc, loc.system.probWeight],
+                );
+                const partTotal = locations.reduce(
+                    (sum, [, weight]) => sum + weight,
+                    0,
+                );
+                if (partTotal) {
+                    const partWeight = bodyPart.system.probWeight;
+                    for (const [loc, weight] of locations) {
+                        entries.push([loc, (partWeight * weight) / partTotal]);
+                    }
+                }
+            }
+            tables[zone] = sohl.Utility.cumulativeTable(entries);
+        }
+        return tables;
+    }
+
+    /**
+     * Determines the body location hit by a strike to a zone.
+     *
+     * @param {number} zone Zone number
+     * @param {number} [roll] Random number in [0, 1)
+     * @returns {{id: string, name: string}|null} The body location hit, or null if nothing can be hit in the zone
+     */
+    hitLocation(zone, roll = Math.random()) {
+        const table = this.hitTables[zone];
+        if (!table?.cumulative.length) return null;
+        const idx = sohl.Utility.bisectRight(table.cumulative, roll);
+        return { id: table.ids[idx], name: table.names[idx] };
+    }
 
     prepareBaseData() {
         super.prepareBaseData();
         this.$maxZones = 0;
+        this.$hitTables = null;
     }
 }
 
@@ -801,6 +801,16 @@ function IsleStrikeModeItemDataMixin(BaseMLID) {
             return sohl.Utility.simpleMerge(super.effectKeys, {});
         }
 
+        /**
+         * Strikes are aimed mid unless told otherwise.
+         *
+         * @override
+         * @returns {string} The aim, "high", "mid" or "low"
+         */
+        rollAim() {
+            return "mid";
+        }
+
         prepareBaseData() {
             super.prepareBaseData();
             foundry.utils.mergeObject(this.$traits, {
@@ -1163,8 +1173,67 @@ class IsleAfflictionItemData extends sohl.AfflictionItemData {
 class IsleAnatomyItemData extends sohl.AnatomyItemData {
     $aim;
     $aimTotal;
+    $hitTables;
+
+    /**
+     * Cumulative hit tables of each aim (high, mid and low), precomputed by
+     * the pack build from the body location probability weights, or built
+     * from the actor's body locations if the anatomy has none.
+     */
+    get hitTables() {
+        if (!this.$hitTables) {
+            this.$hitTables = this.hasCompiledHitTables
+                ? this.item.getFlag("sohl", "mistyisle.hitTables") || {}
+                : this.liveHitTables() || {};
+        }
+        return this.$hitTables;
+    }
+
+    /**
+     * Builds the hit table of each aim from the body locations of the actor
+     * nested in this anatomy, chosen by their probability weights for that
+     * aim, as the pack build does.
+     *
+     * @returns {object|null} The hit tables keyed by aim, or null without an actor
+     */
+    liveHitTables() {
+        if (!this.actor) return null;
+        const locations = [];
+        for (const it of this.actor.allItems()) {
+            if (
+                it.system instanceof IsleBodyLocationItemData &&
+                it.nestedIn?.nestedIn?.nestedIn?.id === this.id
+            ) {
+                locations.push(it);
+            }
+        }
+        return Object.fromEntries(
+            ["high", "mid", "low"].map((aim) => [
+                aim,
+                sohl.Utility.cumulativeTable(
+                    locations.map((loc) => [loc, loc.system.probWeight[aim]]),
+                ),
+            ]),
+        );
+    }
+
+    /**
+     * Determines the body location hit by a strike with the given aim.
+     *
+     * @param {string} aim "high", "mid" or "low"
+     * @param {number} [roll] Random number in [0, 1)
+     * @returns {{id: string, name: string}|null} The body location hit, or null if nothing can be hit with that aim
+     */
+    hitLocation(aim, roll = Math.random()) {
+        const table = this.hitTables[aim];
+        if (!table?.cumulative.length) return null;
+        const idx = sohl.Utility.bisectRight(table.cumulative, roll);
+        return { id: table.ids[idx], name: table.names[idx] };
+    }
 
     prepareBaseData() {
+        super.prepareBaseData();
+        this.$hitTables = null;
         this.$aim = { low: {}, mid: {}, high: {} };
         this.$aimTotal = {
             low: 0,
@@ -1888,11 +1888,13 @@ export class SohlItem extends Item {
             if (!effect.active) continue;
             const targets = effect.system.targets;
             if (!targets?.length) continue;
+            const parsed = effect.parsedChanges;
             changes.push(
-                ...effect.changes.map((change) => {
+                ...effect.changes.map((change, i) => {
                     const c = foundry.utils.deepClone(change);
                     c.targets = targets;
                     c.effect = effect;
+                    c.parsed = parsed?.[i];
                     c.priority = c.priority ?? c.mode * 10;
                     return c;
                 }),
@@ -3461,12 +3463,17 @@ export class AnimateEntityActorData extends SohlActorData {
      * @param {object}  [rollData.impactMod] A CombatModifier object representing the impact
      * @param {string}  [rollData.strikeModeUuid] UUID of strike mode
      * @param {number}  [numImpactTAs=0] Number of Impact Tactical Advantages
+     * @param {string}  [rollData.bodyLocationUuid] UUID of the body location hit
+     * @param {*}       [rollData.aim] Where the strike was aimed (zone or aim, as the
+     *                  variant defines it); without bodyLocationUuid, the body location
+     *                  hit is rolled on the target's anatomy
      * @param {boolean} [rollData.skipDialog=false] if true, do not display dialog
      */
     async damageRoll({
         targetToken,
         impactMod,
         bodyLocationUuid,
+        aim = null,
         skipDialog = false,
         ...options
     } = {}) {
@@ -3478,9 +3485,15 @@ export class AnimateEntityActorData extends SohlActorData {
             impactMod.parent instanceof StrikeModeItemData
                 ? impactMod.parent.item
                 : null;
-        const bodyLocation = bodyLocationUuid
+        let bodyLocation = bodyLocationUuid
             ? await fromUuid(bodyLocationUuid)
             : null;
+        if (!bodyLocation && aim !== null) {
+            const anatomy = targetToken?.actor?.itemTypes[
+                AnatomyItemData.typeName
+            ].at(0);
+            bodyLocation = anatomy?.system.rollHitLocation(aim) || null;
+        }
 
         const dialogOptions = {
             type: "damage",
@@ -4270,11 +4283,7 @@ export class ProtectionItemData extends SubtypeMixin(SohlItemData) {
             armorGearData = this.item.nestedIn.system;
             this.$bodyLocations = this.actor.itemTypes[
                 BodyLocationItemData.typeName
-            ].filter(
-                (i) =>
-                    armorGearData.locations.flexible.includes(i.name) ||
-                    armorGearData.locations.rigid.includes(i.name),
-            );
+            ].filter((i) => armorGearData.coverageOf(i));
         } else if (this.item.nestedIn.system instanceof BodyLocationItemData) {
             this.$bodyLocations.push(this.item.nestedIn);
         }
@@ -4298,8 +4307,7 @@ export class ProtectionItemData extends SubtypeMixin(SohlItemData) {
                 }
 
                 // If any of the armor is rigid, then flag the whole bodylocation as rigid.
-                blData.$traits.isRigid ||=
-                    armorGearData.locations.rigid.includes(bl.name);
+                blData.$traits.isRigid ||= armorGearData.coverageOf(bl) === 2;
             }
         });
     }
@@ -4473,6 +4481,8 @@ export class StrikeModeItemData extends SubtypeMixin(SohlItemData) {
             noChat = false,
             type = `${this.type}-${this.name}-impact-roll`,
             title = `${this.item.label} Impact Roll`,
+            targetToken = game.user.targets.first() || null,
+            aim = this.rollAim(),
             // biome-ignore lint/correctness/noUnusedVariables: <explanation>
             ...scope
         } = {},
@@ -4486,8 +4496,61 @@ export class StrikeModeItemData extends SubtypeMixin(SohlItemData) {
             self: this,
         }));
 
-        // TODO - Implement Impact Calculation
-        ui.notifications.warn("Impact Calculation Not Implemented");
+        return actor.system.damageRoll({
+            targetToken,
+            impactMod: this.$impact,
+            aim,
+            skipDialog,
+        });
+    }
+
+    /**
+     * Determines where a strike with this strike mode is aimed, as the
+     * variant defines it, for rolling the body location it hits.
+     *
+     * @returns {*} The aim, or null if the variant has none
+     */
+    rollAim() {
+        return null;
+    }
+
+    /**
+     * Exact distribution of the base impact roll, precomputed by the pack
+     * build: min, max, mean, stdDev, percentiles (impact by percent level)
+     * and atLeast (chance of rolling each impact or more, from min). Null
+     * if the impact base has been edited since the table was built from it.
+     */
+    get impactTable() {
+        const table = this.item.getFlag("sohl", "impactTable");
+        const built = table?.impactBase;
+        if (
+            !built ||
+            built.numDice !== this.impactBase.numDice ||
+            built.die !== this.impactBase.die ||
+            built.modifier !== this.impactBase.modifier
+        ) {
+            return null;
+        }
+        return table;
+    }
+
+    /**
+     * Mean of the current impact roll, shifting the precomputed mean by any
+     * change to the impact modifier, or null if there is no current table or
+     * the dice have changed.
+     */
+    get expectedImpact() {
+        const table = this.impactTable;
+        if (
+            !table ||
+            this.$impact.die !== table.impactBase.die ||
+            this.$impact.numDice !== table.impactBase.numDice
+        ) {
+            return null;
+        }
+        return (
+            table.mean + this.$impact.effective - table.impactBase.modifier
+        );
     }
 
     /** @override */
@@ -5756,6 +5819,7 @@ export class MasteryLevelItemData extends SohlItemData {
         this.$masteryLevel.setBase(this.masteryLevelBase);
         this.$skillBase ||= new SkillBase(this.skillBaseFormula, {
             items: this.actor?.items,
+            compiled: this.item.getFlag("sohl", "skillBase"),
         });
     }
 
@@ -7495,23 +7559,49 @@ export class TraitItemData extends SubtypeMixin(MasteryLevelItemData) {
         });
     }
 
+    /**
+     * Returns the valueDesc labels as ascending thresholds and parallel
+     * labels: the table compiled by the pack build, if its thresholds and
+     * labels are those of valueDesc, entry for entry, or one compiled from
+     * valueDesc otherwise.
+     *
+     * @param {object[]} valueDesc Array of {label, maxValue}
+     * @param {object} [compiled] Table compiled by the pack build
+     * @returns {{thresholds: number[], labels: string[]}}
+     */
+    static valueDescTable(valueDesc, compiled) {
+        if (
+            compiled?.thresholds?.length === valueDesc.length &&
+            compiled.labels?.length === valueDesc.length &&
+            valueDesc.every(
+                (desc, idx) =>
+                    compiled.thresholds[idx] === desc.maxValue &&
+                    compiled.labels[idx] === desc.label,
+            )
+        ) {
+            return compiled;
+        }
+        const sorted = valueDesc
+            .concat()
+            .sort((a, b) => a.maxValue - b.maxValue);
+        return {
+            thresholds: sorted.map((desc) => desc.maxValue),
+            labels: sorted.map((desc) => desc.label),
+        };
+    }
+
     /** @override */
     prepareBaseData() {
         super.prepareBaseData();
-        this.$valueDesc = this.valueDesc
-            .concat()
-            .sort((a, b) => a.maxValue - b.maxValue);
+        this.$valueDesc = TraitItemData.valueDescTable(
+            this.valueDesc,
+            this.item.getFlag("sohl", "valueDescTable"),
+        );
         this.$score = new ValueModifier(this, {
             valueDesc: (thisVM) => {
-                let desc = "";
-                const len = this.$valueDesc.length;
-                for (let i = 0; !desc && i < len; i++) {
-                    if (thisVM.effective <= this.$valueDesc[i].maxValue) {
-                        desc = this.$valueDesc[i].label;
-                        break;
-                    }
-                }
-                return desc;
+                const { thresholds, labels } = this.$valueDesc;
+                const idx = Utility.bisectLeft(thresholds, thisVM.effective);
+                return idx < labels.length ? labels[idx] : "";
             },
             max: this.max,
             displayVal: (thisVM) => {
@@ -7533,7 +7623,10 @@ export class TraitItemData extends SubtypeMixin(MasteryLevelItemData) {
                 this.$masteryLevel.fate.disabled = false;
                 this.$masteryLevel.setBase(scoreVal * 5);
             }
-            this.$skillBase = new SkillBase(this.skillBaseFormula, [this]);
+            this.$skillBase = new SkillBase(this.skillBaseFormula, {
+                items: [this],
+                compiled: this.item.getFlag("sohl", "skillBase"),
+            });
         } else {
             this.$score.disabled = true;
             this.$masteryLevel.disabled = true;
@@ -7761,6 +7854,7 @@ export class AffiliationItemData extends SohlItemData {
 
 export class AnatomyItemData extends SohlItemData {
     $sum;
+    $locationBits;
 
     static get typeName() {
         return "anatomy";
@@ -7776,6 +7870,66 @@ export class AnatomyItemData extends SohlItemData {
     static get defaultImage() {
         return "systems/sohl/assets/icons/person.svg";
     }
+
+    /**
+     * Version of the hit tables the pack build embeds (flags.sohl
+     * .hitTablesVersion); tables of any other version are rebuilt from the
+     * body locations instead.
+     */
+    static get HIT_TABLES_VERSION() {
+        return 1;
+    }
+
+    /**
+     * Whether the hit tables embedded in this anatomy by the pack build can
+     * be used as they are.
+     */
+    get hasCompiledHitTables() {
+        return (
+            this.item.getFlag("sohl", "hitTablesVersion") ===
+            AnatomyItemData.HIT_TABLES_VERSION
+        );
+    }
+
+    /**
+     * Determines the body location hit by a strike, from the hit tables of
+     * the variant.
+     *
+     * @param {*} aim Where the strike was aimed, as the variant defines it
+     * @param {number} [roll] Random number in [0, 1)
+     * @returns {{id: string, name: string}|null} The body location hit, or null if nothing can be hit
+     */
+    // biome-ignore lint/correctness/noUnusedVariables: <explanation>
+    hitLocation(aim, roll = Math.random()) {
+        return null;
+    }
+
+    /**
+     * Rolls the body location of this anatomy's actor hit by a strike.
+     *
+     * @param {*} aim Where the strike was aimed, as the variant defines it
+     * @param {number} [roll] Random number in [0, 1)
+     * @returns {SohlItem|null} The body location hit, or null if nothing can be hit
+     */
+    rollHitLocation(aim, roll = Math.random()) {
+        const hit = this.hitLocation(aim, roll);
+        if (!hit || !this.actor) return null;
+        // Nested items keep the ids they have in the anatomy
+        return (
+            this.actor.items.get(hit.id) ||
+            this.actor.system.virtualItems.get(hit.id) ||
+            null
+        );
+    }
+
+    /** @override */
+    prepareBaseData() {
+        super.prepareBaseData();
+        // Bit of each body location in the armor coverage masks, from the
+        // layout compiled by the pack build
+        const names = this.item.getFlag("sohl", "locationBits") || [];
+        this.$locationBits = new Map(names.map((name, bit) => [name, bit]));
+    }
 }
 
 export class BodyZoneItemData extends SohlItemData {
@@ -8369,6 +8523,7 @@ export class ContainerGearItemData extends GearItemData {
 export class ArmorGearItemData extends GearItemData {
     $protection;
     $traits;
+    $coverage;
 
     static get typeName() {
         return "armorgear";
@@ -8421,6 +8576,58 @@ export class ArmorGearItemData extends GearItemData {
         });
     }
 
+    /**
+     * The coverage masks of this armor in the bit layout of the actor's
+     * anatomy, as compiled by the pack build (flags.sohl.coverage), with
+     * that layout; or false if there are none, or the armor's locations
+     * have been edited since.
+     *
+     * @type {{bits: Map<string, number>, flexible: number[], rigid: number[]}|false}
+     */
+    get coverage() {
+        if (this.$coverage === null) {
+            const anatomy =
+                this.actor?.itemTypes[AnatomyItemData.typeName].at(0);
+            const compiled = this.item.getFlag("sohl", "coverage");
+            const masks = compiled?.masks[anatomy?.name];
+            this.$coverage =
+                !!masks &&
+                !!anatomy.system.$locationBits?.size &&
+                compiled.locationsHash ===
+                    Utility.locationsHash(
+                        this.locations.flexible,
+                        this.locations.rigid,
+                    )
+                    ? { bits: anatomy.system.$locationBits, ...masks }
+                    : false;
+        }
+        return this.$coverage;
+    }
+
+    /**
+     * Determines how this armor covers a body location.
+     *
+     * @param {SohlItem} bodyLocation Body location
+     * @returns {number} 0 if it is not covered, 1 if flexibly, 2 if rigidly
+     */
+    coverageOf(bodyLocation) {
+        const coverage = this.coverage;
+        if (coverage) {
+            const bit = coverage.bits.get(bodyLocation.name);
+            if (bit === undefined) return 0;
+            if (Utility.maskHas(coverage.rigid, bit)) return 2;
+            return Utility.maskHas(coverage.flexible, bit) ? 1 : 0;
+        }
+        if (this.locations.rigid.includes(bodyLocation.name)) return 2;
+        return this.locations.flexible.includes(bodyLocation.name) ? 1 : 0;
+    }
+
+    /** @override */
+    prepareBaseData() {
+        super.prepareBaseData();
+        this.$coverage = null;
+    }
+
     processSiblings() {
         super.processSiblings();
         this.$protection = {};
@@ -8916,7 +9123,19 @@ export class SkillBase {
     _parsedFormula;
     _value;
 
-    constructor(formula, { items = null, sunsign = null } = {}) {
+    /**
+     * @param {string} formula Skill base formula
+     * @param {object} [options]
+     * @param {Iterable} [options.items] Items to take the attributes from
+     * @param {object} [options.sunsign] Sunsign trait
+     * @param {object} [options.compiled] The formula as parsed by the
+     *     pack build (flags.sohl.skillBase), used instead of parsing it
+     *     if it was parsed from this formula
+     */
+    constructor(
+        formula,
+        { items = null, sunsign = null, compiled = null } = {},
+    ) {
         if (!formula) {
             this._formula = null;
             this._attrs = {};
@@ -8930,7 +9149,11 @@ export class SkillBase {
         this._formula = formula || null;
         this._attrs = {};
         this._sunsigns = sunsign?.system.textValue.split("-") || [];
-        this._parsedFormula = formula ? this._parseFormula : [];
+        if (formula && compiled?.formula === formula) {
+            this._parsedFormula = compiled.terms;
+        } else {
+            this._parsedFormula = formula ? this._parseFormula : [];
+        }
         this._value = 0;
         if (items) {
             this.setAttributes(items);
@@ -8938,14 +9161,15 @@ export class SkillBase {
     }
 
     setAttributes(items) {
-        const attributes = [];
+        const attributes = new Map();
         for (const it of items) {
             if (
                 it.type === "trait" &&
                 it.system.intensity === "attribute" &&
-                it.system.isNumeric
+                it.system.isNumeric &&
+                !attributes.has(it.system.abbrev)
             )
-                attributes.push(it);
+                attributes.set(it.system.abbrev, it);
         }
         this._parsedFormula.forEach((param) => {
             const type = typeof param;
@@ -8953,9 +9177,7 @@ export class SkillBase {
             if (type === "string") {
                 const [subType, name, mult = 1] = param.split(":");
                 if (subType === "attr") {
-                    const attr = attributes.find(
-                        (obj) => obj.system.abbrev === name,
-                    );
+                    const attr = attributes.get(name);
 
                     if (attr) {
                         const score = Number.parseInt(
@@ -9060,7 +9282,7 @@ export class SkillBase {
                         break;
                     }
 
-                    const ssName = ssParts[0].trim;
+                    const ssName = ssParts[0].trim();
                     let ssCount = 1;
                     // if second part provided, must be a number
                     if (ssParts.length === 2) {
@@ -9069,8 +9291,8 @@ export class SkillBase {
                             ssCount = Number.parseInt(ssNumber[0], 10);
                         } else {
                             isFormulaValid = false;
+                            break;
                         }
-                        break;
                     }
 
                     parseResult.push(`ss:${ssName}:${ssCount}`);
@@ -9268,6 +9490,106 @@ export class Utility {
         return +parseFloat(value).toFixed(precision);
     }
 
+    /**
+     * Finds, by binary search, how many entries of an array sorted in
+     * ascending order are less than or equal to a value.  Used to look up
+     * a roll in a cumulative probability table: the entry hit by a roll in
+     * [0, 1) is the one at the returned index.
+     *
+     * @param {number[]} sorted Array of numbers in ascending order
+     * @param {number} value Value to look up
+     * @returns {number} Index of the first entry greater than value, or the array length if there is none
+     */
+    static bisectRight(sorted, value) {
+        let lo = 0;
+        let hi = sorted.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >>> 1;
+            if (sorted[mid] <= value) lo = mid + 1;
+            else hi = mid;
+        }
+        return lo;
+    }
+
+    /**
+     * Builds a cumulative hit table, as the pack build embeds them in
+     * anatomies: the ids and names of the locations, and the cumulative
+     * probability of each and those before it, the last being exactly 1.
+     * Without any weight, the table is empty.
+     *
+     * @param {Array} entries [location, probability weight] pairs
+     * @returns {{ids: string[], names: string[], cumulative: number[]}} The hit table
+     */
+    static cumulativeTable(entries) {
+        const table = { ids: [], names: [], cumulative: [] };
+        const total = entries.reduce((sum, [, weight]) => sum + weight, 0);
+        if (!total) return table;
+        let running = 0;
+        for (const [location, weight] of entries) {
+            running += weight;
+            table.ids.push(location.id);
+            table.names.push(location.name);
+            table.cumulative.push(running / total);
+        }
+        table.cumulative[table.cumulative.length - 1] = 1;
+        return table;
+    }
+
+    /**
+     * Finds, by binary search, how many entries of an array sorted in
+     * ascending order are less than a value.  Used to look up a value in
+     * a table of upper thresholds: the entry applying to the value is the
+     * one at the returned index.
+     *
+     * @param {number[]} sorted Array of numbers in ascending order
+     * @param {number} value Value to look up
+     * @returns {number} Index of the first entry greater than or equal to value, or the array length if there is none
+     */
+    static bisectLeft(sorted, value) {
+        let lo = 0;
+        let hi = sorted.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >>> 1;
+            if (sorted[mid] < value) lo = mid + 1;
+            else hi = mid;
+        }
+        return lo;
+    }
+
+    /**
+     * Tests a bit of a mask made of 32-bit words, lowest bits first, such
+     * as the armor coverage masks compiled by the pack build.  Words past
+     * the end of the mask are zero.
+     *
+     * @param {number[]} mask Words of the mask
+     * @param {number} bit Index of the bit
+     * @returns {boolean} Whether the bit is set
+     */
+    static maskHas(mask, bit) {
+        return !!(((mask[bit >>> 5] ?? 0) >>> (bit & 31)) & 1);
+    }
+
+    /**
+     * Hashes the flexible and rigid location lists of an armor, as the pack
+     * build does (packlib.coverage.locations_hash), so that compiled
+     * coverage masks can be checked against the lists cheaply: 32-bit
+     * FNV-1a over the UTF-16 code units of the names, each list joined
+     * with newlines and the two separated by a NUL.
+     *
+     * @param {string[]} flexible Flexibly covered location names
+     * @param {string[]} rigid Rigidly covered location names
+     * @returns {number} Unsigned 32-bit hash
+     */
+    static locationsHash(flexible, rigid) {
+        const str = `${flexible.join("\n")}\0${rigid.join("\n")}`;
+        let hash = 0x811c9dc5;
+        for (let i = 0; i < str.length; i++) {
+            hash ^= str.charCodeAt(i);
+            hash = Math.imul(hash, 0x01000193);
+        }
+        return hash >>> 0;
+    }
+
     /**
      * Returns number of victory stars.
      * @param {*} atkSuccLvl
@@ -9953,6 +10275,9 @@ export class SohlActiveEffectData extends foundry.abstract.TypeDataModel {
 
     get targetNameRE() {
         let name = this.targetName;
+        // Names pre-parsed by the pack build (flags.sohl.target)
+        const target = this.parent.getFlag("sohl", "target");
+        if (target?.name === (name || "") && target.re) return target.re;
         // CASE 1: name is empty or starts with "attr:" means all names are valid
         if (!name || name.startsWith("attr:") || name.startsWith("primeattr:"))
             return ".+";
@@ -10586,10 +10911,35 @@ export class SohlActiveEffect extends ActiveEffect {
         }
     }
 
+    /**
+     * The changes of this effect as pre-parsed by the pack build
+     * (flags.sohl.changes), or null if there are none or the key, mode or
+     * value of any change has been edited since.
+     *
+     * @type {object[]|null}
+     */
+    get parsedChanges() {
+        const parsed = this.getFlag("sohl", "changes");
+        if (
+            parsed?.length !== this.changes.length ||
+            parsed.some((p, i) => {
+                const change = this.changes[i];
+                return (
+                    p.key !== change.key ||
+                    p.mode !== change.mode ||
+                    String(p.value) !== String(change.value)
+                );
+            })
+        ) {
+            return null;
+        }
+        return parsed;
+    }
+
     /** @override */
     apply(doc, change) {
         let changes = {};
-        if (change.key.startsWith("mod:")) {
+        if (change.parsed?.modifier ?? change.key.startsWith("mod:")) {
             // Any change that starts with "mod:" is a modifier
             this._handleAEMods(doc, change, changes);
         } else {
@@ -10600,7 +10950,7 @@ export class SohlActiveEffect extends ActiveEffect {
     }
 
     _handleAEMods(doc, change, changes) {
-        const modKey = change.key.slice(4);
+        const modKey = change.parsed?.path ?? change.key.slice(4);
 
         const mods = foundry.utils.getProperty(doc, modKey);
         if (!(mods instanceof ValueModifier)) {
@@ -10615,6 +10965,11 @@ export class SohlActiveEffect extends ActiveEffect {
         const modName = effectKeyValue.label;
         const modAbbr = effectKeyValue.abbrev;
 
+        if (change.parsed?.operation) {
+            mods[change.parsed.operation](modName, modAbbr, change.value);
+            return (changes[modKey] = mods);
+        }
+
         switch (change.mode) {
             case CONST.ACTIVE_EFFECT_MODES.ADD:
                 mods.add(modName, modAbbr, change.value);
@@ -11920,6 +12275,7 @@ export class SohlActor extends Actor {
                                 obj.system.skillBaseFormula,
                                 {
                                     items: updateData.items,
+                                    compiled: obj.flags?.sohl?.skillBase,
                                 },
                             );
                             obj.system.masteryLevelBase =
@@ -12284,11 +12640,13 @@ export class SohlActor extends Actor {
             if (!effect.active) continue;
             const targets = effect.system.targets;
             if (!targets?.length) continue;
+            const parsed = effect.parsedChanges;
             changes.push(
-                ...effect.changes.map((change) => {
+                ...effect.changes.map((change, i) => {
                     const c = foundry.utils.deepClone(change);
                     c.targets = targets;
                     c.effect = effect;
+                    c.parsed = parsed?.[i];
                     c.priority = c.priority ?? c.mode * 10;
                     return c;
                 }),